@@ -83,13 +83,99 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
+#
+# DATABASE_ENGINE picks the profile: "sqlite" (default) or "postgresql".
+#
+# SQLite is tuned for concurrent requests on every new connection: WAL lets
+# reads carry on while a write commits, IMMEDIATE transactions take the write
+# lock when they begin (a read that upgrades to a write mid-transaction fails
+# at once with "database is locked"), and a writer waits up to
+# SQLITE_BUSY_TIMEOUT seconds for the lock. synchronous=NORMAL is safe under
+# WAL; a power cut can lose the last commits but never corrupts the file.
+#
+# PostgreSQL needs psycopg (psycopg[pool] for POSTGRES_POOL). Connections are
+# kept for POSTGRES_CONN_MAX_AGE seconds and health-checked before reuse, or,
+# with POSTGRES_POOL=1, borrowed from a psycopg pool per request instead;
+# Django allows one or the other.
+
+DATABASE_ENGINE = os.getenv('DATABASE_ENGINE', 'sqlite')
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+    # Negative values are KiB
+    'cache_size': -int(os.getenv('SQLITE_CACHE_KIB', 20000)),
+    'temp_store': 'MEMORY',
+}
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+if DATABASE_ENGINE == 'postgresql':
+    POSTGRES_POOL = os.getenv('POSTGRES_POOL', '0') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'equitylaw'),
+            'USER': os.getenv('POSTGRES_USER', 'equitylaw'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if POSTGRES_POOL else int(os.getenv('POSTGRES_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.getenv('POSTGRES_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.getenv('POSTGRES_POOL_MAX_SIZE', 10)),
+                    'timeout': float(os.getenv('POSTGRES_POOL_TIMEOUT', 10)),
+                },
+            } if POSTGRES_POOL else {},
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                # sqlite3's timeout is the busy timeout, in seconds
+                'timeout': float(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),
+                'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            },
+        }
+    }
+
+
+# Cache
+# Local memory by default. Set DJANGO_CACHE_DIR to share cached schedules and
+# API responses between worker processes through the file-based backend.
+# Both cull a third of their entries once MAX_ENTRIES is reached (default 300),
+# which cached availability answers and responses would hit quickly
+
+CACHE_OPTIONS = {'MAX_ENTRIES': int(os.getenv('DJANGO_CACHE_MAX_ENTRIES', 5000))}
+
+if os.getenv('DJANGO_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('DJANGO_CACHE_DIR'),
+            'OPTIONS': CACHE_OPTIONS,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': CACHE_OPTIONS,
+        }
+    }
+
+# Rendered list/detail responses of the public content endpoints
+API_RESPONSE_CACHE_TIMEOUT = int(os.getenv('API_RESPONSE_CACHE_TIMEOUT', 60 * 60))
+
+# Hosts blog posts may embed iframes from (CKEditor's media embeds); other iframes are dropped
+CONTENT_IFRAME_HOSTS = os.getenv(
+    'CONTENT_IFRAME_HOSTS', 'www.youtube.com,www.youtube-nocookie.com,player.vimeo.com',
+).split(',')
 
 
 # Password validation
@@ -139,6 +225,14 @@ STORAGES = {
             "custom_domain": os.getenv('AWS_S3_CUSTOM_DOMAIN'),
         }
     },
+    # Local holding area for admin uploads until the image worker moves them to "default"
+    "image_staging": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {
+            "location": os.getenv('IMAGE_STAGING_ROOT', BASE_DIR / 'media' / 'staging'),
+            "base_url": '/media/staging/',
+        }
+    },
 }
 #okay
 
@@ -164,9 +258,34 @@ USE_TZ = True
 
 # Brevo API v3 (direct API calls, no SMTP)
 BREVO_API_KEY = os.getenv("SENDINBLUE_API_KEY")
+BREVO_API_URL = os.getenv("BREVO_API_URL", "https://api.brevo.com/v3/smtp/email")
+BREVO_POOL_SIZE = int(os.getenv("BREVO_POOL_SIZE", 10))
+BREVO_CONNECT_TIMEOUT = float(os.getenv("BREVO_CONNECT_TIMEOUT", 3.05))
+BREVO_READ_TIMEOUT = float(os.getenv("BREVO_READ_TIMEOUT", 15))
+BREVO_MAX_RETRIES = int(os.getenv("BREVO_MAX_RETRIES", 3))
 DEFAULT_FROM_EMAIL_ADDRESS = "contact@equitylawandco.com"
 DEFAULT_FROM_EMAIL_NAME = "Equity Law & Co."
 
+# Outbound email queue (drained by `manage.py send_outbound_emails`)
+EMAIL_OUTBOX_WORKERS = int(os.getenv("EMAIL_OUTBOX_WORKERS", 4))
+EMAIL_OUTBOX_MESSAGES_PER_REQUEST = int(os.getenv("EMAIL_OUTBOX_MESSAGES_PER_REQUEST", 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 8))
+EMAIL_OUTBOX_BACKOFF_SECONDS = 30
+EMAIL_OUTBOX_MAX_BACKOFF_SECONDS = 6 * 60 * 60
+EMAIL_OUTBOX_LEASE_SECONDS = 5 * 60
+
+# Responsive image derivatives (pages.images). Every width up to the original's is
+# rendered in each modern format plus a JPEG/PNG fallback; add 'avif' where the
+# slower encode is worth it.
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 1024, 1600)
+IMAGE_DERIVATIVE_FORMATS = tuple(os.getenv("IMAGE_DERIVATIVE_FORMATS", "webp").split(","))
+
+# Image processing queue (drained by `manage.py process_images`)
+IMAGE_QUEUE_WORKERS = int(os.getenv("IMAGE_QUEUE_WORKERS", 2))
+IMAGE_QUEUE_MAX_ATTEMPTS = int(os.getenv("IMAGE_QUEUE_MAX_ATTEMPTS", 5))
+IMAGE_QUEUE_BACKOFF_SECONDS = 30
+IMAGE_QUEUE_LEASE_SECONDS = 5 * 60
+
 
 
 # Static files (CSS, JavaScript, Images)
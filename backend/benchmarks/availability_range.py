@@ -0,0 +1,128 @@
+"""
+Benchmark long-horizon availability: the packed range computation against
+the per-day sweep.
+
+Fills a schedule (two windows on weekdays, a short Saturday) and a year of
+bookings in a throwaway SQLite database, then times, per duration:
+
+  sweep   occupancy_by_date once, then compute_free_slots for every day
+  range   get_available_slots_range (packed bitmaps, shifts and ANDs)
+  counts  get_available_slot_counts (what available_dates serves)
+
+Both paths are checked to return the same slots. Times are the best of
+--repeat runs, in milliseconds, including the occupancy query.
+
+Usage (from the backend directory):
+    python benchmarks/availability_range.py --days 365 --bookings-per-day 6
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time as clock
+from datetime import date, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connections  # noqa: E402
+
+from pages.availability import (  # noqa: E402
+    compute_free_slots, get_available_slot_counts, get_available_slots_range, get_weekly_windows,
+)
+from pages.models import Appointment, AppointmentDay, AvailableHours  # noqa: E402
+from pages.occupancy import occupancy_by_date  # noqa: E402
+from pages.schedule import invalidate_schedule  # noqa: E402
+
+
+DURATIONS = (30, 60, 90, 240)
+
+
+def prepare(days, bookings_per_day, seed):
+    for weekday in range(7):
+        day = AppointmentDay.objects.create(day_of_week=weekday, is_active=weekday < 6)
+        if weekday < 5:
+            AvailableHours.objects.create(day=day, start_time='09:00', end_time='12:30')
+            AvailableHours.objects.create(day=day, start_time='13:15', end_time='18:00')
+        elif weekday == 5:
+            AvailableHours.objects.create(day=day, start_time='10:00', end_time='13:00')
+    invalidate_schedule()
+
+    rng = random.Random(seed)
+    first_day = date.today() + timedelta(days=1)
+    appointments = []
+    for n in range(days):
+        # Whole-hour slots from 08:00 to 18:00 never overlap
+        for hour in rng.sample(range(8, 19), min(bookings_per_day, 11)):
+            appointments.append(Appointment(
+                client_name=f"Client {n}-{hour}", client_email='client@example.com', client_phone='9800000000',
+                appointment_date=first_day + timedelta(days=n), appointment_time=time(hour, 0),
+                duration_minutes=rng.choice((30, 60)),
+            ))
+    # bulk_create skips the booking signals; the occupancy bitmaps come from the rebuild
+    Appointment.objects.bulk_create(appointments, batch_size=500)
+    call_command('rebuild_occupancy', stdout=io.StringIO())
+    return first_day, len(appointments)
+
+
+def sweep(start_date, end_date, duration):
+    today = date.today()
+    weekly_windows = get_weekly_windows()
+    occupied_by_date = occupancy_by_date(max(start_date, today), end_date)
+    slots_by_date = {}
+    day = start_date
+    while day <= end_date:
+        windows = weekly_windows.get(day.weekday()) if day >= today else None
+        slots_by_date[day] = compute_free_slots(windows or (), occupied_by_date.get(day, 0), duration)
+        day += timedelta(days=1)
+    return slots_by_date
+
+
+def best(repeat, function, *args):
+    timings = []
+    for _ in range(repeat):
+        started = clock.perf_counter()
+        result = function(*args)
+        timings.append(clock.perf_counter() - started)
+    return min(timings) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--bookings-per-day', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        connections.settings['default']['NAME'] = os.path.join(directory, 'bench.sqlite3')
+        connections.close_all()
+        call_command('migrate', verbosity=0)
+        first_day, booked = prepare(args.days, args.bookings_per_day, args.seed)
+        last_day = first_day + timedelta(days=args.days - 1)
+        get_weekly_windows()
+
+        print(f"{args.days} days, {booked} appointments")
+        for duration in DURATIONS:
+            sweep_ms, expected = best(args.repeat, sweep, first_day, last_day, duration)
+            range_ms, slots = best(args.repeat, get_available_slots_range, first_day, last_day, duration)
+            counts_ms, counts = best(args.repeat, get_available_slot_counts, first_day, last_day, duration)
+            assert slots == expected, f"range and sweep disagree for {duration} minutes"
+            assert counts == {day: len(found) for day, found in expected.items() if found}
+            print(
+                f"{duration:4d} min  sweep {sweep_ms:7.1f} ms  range {range_ms:7.1f} ms  counts {counts_ms:7.1f} ms  "
+                f"({sum(map(len, slots.values()))} slots)"
+            )
+        connections.close_all()
+
+
+if __name__ == '__main__':
+    main()
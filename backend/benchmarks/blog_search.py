@@ -0,0 +1,131 @@
+"""
+Benchmark blog search on a synthetic corpus: the SearchFilter `?search=`
+(icontains OR-chains over title, excerpt, HTML content and author) against
+the full-text `?q=` mode.
+
+Builds a throwaway SQLite database with --posts posts of CKEditor-style
+HTML, indexes it with blogs.search, then times both modes for rare,
+common and multi-word queries through BlogViewSet. The response cache is
+cleared before every request so each one does the full work.
+
+Usage (from the backend directory):
+    python benchmarks/blog_search.py --posts 50000 --repeat 10
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from blogs import search  # noqa: E402
+from blogs.viewsets import BlogViewSet  # noqa: E402
+from pages.models import Blog  # noqa: E402
+
+
+VOCABULARY_SIZE = 5000
+WORDS_PER_POST = 400
+
+
+def make_vocabulary(rng):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return [''.join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(VOCABULARY_SIZE)]
+
+
+def make_post(rng, vocabulary, weights, index):
+    words = rng.choices(vocabulary, weights=weights, k=WORDS_PER_POST)
+    paragraphs = [' '.join(words[i:i + 40]) for i in range(0, len(words), 40)]
+    content = ''.join(
+        f'<p style="text-align: justify;">{paragraph} <strong>{rng.choice(vocabulary)}</strong></p>'
+        for paragraph in paragraphs
+    )
+    title = ' '.join(rng.choices(vocabulary, weights=weights, k=5))
+    return Blog(
+        title=f'{title} {index}', slug=f'post-{index}', author='Equity Law & Co',
+        excerpt=' '.join(rng.choices(vocabulary, weights=weights, k=20)), content=content,
+    )
+
+
+def populate(posts, rng):
+    vocabulary = make_vocabulary(rng)
+    # Zipf-like frequencies, so the head of the vocabulary is common and the tail rare
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY_SIZE)]
+    for start in range(0, posts, 2000):
+        Blog.objects.bulk_create([
+            make_post(rng, vocabulary, weights, index) for index in range(start, min(start + 2000, posts))
+        ])
+    return vocabulary
+
+
+def run(label, params, repeat):
+    view = BlogViewSet.as_view({'get': 'list'})
+    factory = APIRequestFactory(HTTP_HOST='localhost')
+    latencies = []
+    for _ in range(repeat):
+        cache.clear()
+        request = factory.get('/api/blogs/', params)
+        started = time.perf_counter()
+        response = view(request)
+        response.render()
+        latencies.append(time.perf_counter() - started)
+    assert response.status_code == 200, response.content
+
+    latencies.sort()
+    print(
+        f"  {label:<10} mean {statistics.mean(latencies) * 1000:9.2f} ms  "
+        f"p50 {latencies[len(latencies) // 2] * 1000:9.2f} ms  "
+        f"results on page {len(response.data['results'])}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection.settings_dict['NAME'] = os.path.join(directory, 'bench.sqlite3')
+        call_command('migrate', verbosity=0)
+
+        started = time.perf_counter()
+        vocabulary = populate(args.posts, rng)
+        print(f"inserted {args.posts} posts in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        search.rebuild_index(Blog.objects.all())
+        print(f"indexed them in {time.perf_counter() - started:.1f}s")
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        queries = {
+            'rare': vocabulary[-1],
+            'common': vocabulary[0],
+            'two words': f'{vocabulary[10]} {vocabulary[2000]}',
+            'missing': 'qqqqqqqqqq',
+        }
+        for label, query in queries.items():
+            print(f"{label} query {query!r}:")
+            run('?search=', {'search': query}, args.repeat)
+            run('?q=', {'q': query}, args.repeat)
+
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
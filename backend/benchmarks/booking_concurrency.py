@@ -0,0 +1,168 @@
+"""
+Benchmark concurrent booking throughput under two database profiles.
+
+Writer threads book distinct slots through AppointmentViewSet.create while
+reader threads poll available_slots, each call wrapped in the connection
+handling Django does around a request. Reported per profile: bookings per
+second, reads per second and requests that failed with a database error
+("database is locked").
+
+With DATABASE_ENGINE=sqlite (default) the profiles are:
+  stock  Django's defaults: rollback journal, deferred transactions, 5 s busy timeout
+  tuned  settings.DATABASES: WAL, synchronous=NORMAL, IMMEDIATE transactions, pragmas
+
+With DATABASE_ENGINE=postgresql, against a throwaway test database:
+  stock  a new connection per request (CONN_MAX_AGE=0, no pool)
+  tuned  settings.DATABASES: persistent connections or the psycopg pool
+
+Usage (from the backend directory):
+    python benchmarks/booking_concurrency.py --writers 8 --readers 4 --bookings 50
+"""
+import argparse
+import copy
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import DatabaseError, close_old_connections, connection, connections  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from pages.models import Appointment, AppointmentDay, AvailableHours  # noqa: E402
+from pages.schedule import invalidate_schedule  # noqa: E402
+from pages.viewsets import AppointmentViewSet  # noqa: E402
+
+
+# 30-minute slots between 09:00 and 17:00
+SLOTS_PER_DAY = 16
+
+TUNED = copy.deepcopy(connections.settings['default'])
+
+
+def stock_profile(settings_dict):
+    if settings_dict['ENGINE'].endswith('sqlite3'):
+        return dict(settings_dict, OPTIONS={})
+    options = {name: value for name, value in settings_dict['OPTIONS'].items() if name != 'pool'}
+    return dict(settings_dict, CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False, OPTIONS=options)
+
+
+def use_profile(settings_dict):
+    # Threads build their connections from this dict, so update it in place
+    connections.close_all()
+    connections.settings['default'].clear()
+    connections.settings['default'].update(copy.deepcopy(settings_dict))
+
+
+def prepare_schedule():
+    for weekday in range(7):
+        day = AppointmentDay.objects.create(day_of_week=weekday, is_active=True)
+        AvailableHours.objects.create(day=day, start_time='09:00', end_time='17:00')
+    invalidate_schedule()
+
+
+def request(view, http_request, counts, key):
+    """Run one view call the way a request would, counting successes and database errors"""
+    close_old_connections()
+    try:
+        response = view(http_request)
+        counts[key if response.status_code < 400 else 'rejected'] += 1
+    except DatabaseError:
+        counts['errors'] += 1
+    finally:
+        close_old_connections()
+
+
+def writer(index, writers, bookings, first_day, counts):
+    view = AppointmentViewSet.as_view({'post': 'create'})
+    factory = APIRequestFactory(HTTP_HOST='localhost')
+    for n in range(bookings):
+        day, slot = divmod(n * writers + index, SLOTS_PER_DAY)
+        payload = {
+            'client_name': f"Client {index}-{n}", 'client_email': 'client@example.com', 'client_phone': '9800000000',
+            'appointment_date': (first_day + timedelta(days=day)).isoformat(),
+            'appointment_time': f'{9 + slot // 2:02d}:{slot % 2 * 30:02d}', 'duration_minutes': 30,
+        }
+        request(view, factory.post('/api/appointments/', payload, format='json'), counts, 'booked')
+    connection.close()
+
+
+def reader(days, first_day, stop, counts):
+    view = AppointmentViewSet.as_view({'get': 'available_slots'})
+    factory = APIRequestFactory(HTTP_HOST='localhost')
+    n = 0
+    while not stop.is_set():
+        day = (first_day + timedelta(days=n % days)).isoformat()
+        request(view, factory.get('/api/appointments/available_slots/', {'date': day}), counts, 'read')
+        n += 1
+    connection.close()
+
+
+def run(label, args):
+    first_day = date.today() + timedelta(days=1)
+    days = (args.writers * args.bookings) // SLOTS_PER_DAY + 1
+    writer_counts = [dict(booked=0, rejected=0, errors=0) for _ in range(args.writers)]
+    reader_counts = [dict(read=0, rejected=0, errors=0) for _ in range(args.readers)]
+    stop = threading.Event()
+
+    readers = [threading.Thread(target=reader, args=(days, first_day, stop, counts)) for counts in reader_counts]
+    writers = [
+        threading.Thread(target=writer, args=(i, args.writers, args.bookings, first_day, counts))
+        for i, counts in enumerate(writer_counts)
+    ]
+    started = time.perf_counter()
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    booked = sum(counts['booked'] for counts in writer_counts)
+    reads = sum(counts['read'] for counts in reader_counts)
+    errors = sum(counts['errors'] for counts in writer_counts + reader_counts)
+    assert Appointment.objects.count() == booked
+    print(
+        f"{label:<6} {booked / elapsed:8.1f} bookings/s  {reads / elapsed:8.1f} reads/s  "
+        f"{errors:5d} database errors  ({booked}/{args.writers * args.bookings} booked in {elapsed:.1f}s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--bookings', type=int, default=50, help="Bookings per writer thread")
+    args = parser.parse_args()
+
+    for label, profile in (('stock', stock_profile(TUNED)), ('tuned', TUNED)):
+        if TUNED['ENGINE'].endswith('sqlite3'):
+            with tempfile.TemporaryDirectory() as directory:
+                use_profile(dict(profile, NAME=os.path.join(directory, 'bench.sqlite3')))
+                call_command('migrate', verbosity=0)
+                prepare_schedule()
+                run(label, args)
+                connections.close_all()
+        else:
+            use_profile(profile)
+            test_name = connection.creation.create_test_db(verbosity=0)
+            try:
+                prepare_schedule()
+                run(label, args)
+            finally:
+                connection.creation.destroy_test_db(test_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
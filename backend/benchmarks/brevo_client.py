@@ -0,0 +1,106 @@
+"""
+Benchmark per-message latency of the pooled BrevoClient against the
+previous one-connection-per-message requests.post path.
+
+Both paths talk to a local keep-alive HTTP stub, so the numbers isolate
+client-side connection handling from Brevo's own latency.
+
+Usage (from the backend directory):
+    python benchmarks/brevo_client.py --messages 500 --threads 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import requests  # noqa: E402
+
+from pages.brevo import BrevoClient  # noqa: E402
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Send each response in one segment so keep-alive is not penalised by delayed ACKs
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        body = b'{"messageId": "<stub@brevo>"}'
+        self.send_response(201)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def legacy_send(url, payload):
+    """The previous send_brevo_email: a fresh connection and no timeout per message"""
+    headers = {"accept": "application/json", "api-key": "bench", "content-type": "application/json"}
+    response = requests.post(url, json=payload, headers=headers)
+    return response.status_code, response.text
+
+
+def run(label, send, messages, threads):
+    latencies = []
+    lock = threading.Lock()
+
+    def one(_):
+        started = time.perf_counter()
+        send()
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(one, range(messages)))
+    total = time.perf_counter() - started
+
+    latencies.sort()
+    print(
+        f"{label:<8} {messages} msgs in {total:6.2f}s  "
+        f"mean {statistics.mean(latencies) * 1000:6.2f} ms  "
+        f"p50 {latencies[len(latencies) // 2] * 1000:6.2f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:6.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v3/smtp/email"
+
+    client = BrevoClient(api_key='bench', url=url, pool_size=args.threads)
+    payload = client.build_payload("bench@example.com", "Benchmark", "<p>Hello</p>")
+
+    run("legacy", lambda: legacy_send(url, payload), args.messages, args.threads)
+    run("pooled", lambda: client.post(payload), args.messages, args.threads)
+    print(f"pooled client stats: {client.stats.snapshot()}")
+
+    client.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
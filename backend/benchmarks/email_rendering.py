@@ -0,0 +1,130 @@
+"""
+Benchmark rendering of the contact admin email three ways:
+
+  legacy    the previous inline f-string with its full stylesheet
+  uncached  Django templates loaded and compiled on every send
+  compiled  pages.emails.render_email (compiled once, CSS embedded once)
+
+Usage (from the backend directory):
+    python benchmarks/email_rendering.py --messages 5000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.template import Context, Engine  # noqa: E402
+
+from pages.emails import EmailTemplate, TEMPLATE_ROOT, get_email_template, render_email  # noqa: E402
+
+
+def legacy_render(name, email, message):
+    """The previous contact admin body, built with an f-string on every send"""
+    return f"""
+            <html>
+                <head>
+                    <style>
+                        body {{ font-family: 'Noto Sans', Arial, sans-serif; color: #333; line-height: 1.8; font-size: 20px; }}
+                        .container {{ max-width: 1000px; margin: 0 auto; padding: 20px; }}
+                        .header {{ background: linear-gradient(135deg, #B45309 0%, #92400E 100%); color: white; padding: 30px; border-radius: 8px 8px 0 0; text-align: center; }}
+                        .header h1 {{ margin: 0; font-size: 36px; font-weight: bold; }}
+                        .content {{ background: #FFFBEB; padding: 30px; border: 2px solid #FCD34D; border-radius: 0 0 8px 8px; }}
+                        .info-block {{ background: white; padding: 20px; margin: 20px 0; border-left: 4px solid #B45309; }}
+                        .info-label {{ color: #92400E; font-weight: bold; font-size: 14px; text-transform: uppercase; letter-spacing: 1px; }}
+                        .info-value {{ color: #333; margin-top: 8px; word-break: break-word; font-size: 18px; font-weight: 500; }}
+                        .message-box {{ background: white; padding: 25px; margin: 25px 0; border: 2px solid #FCD34D; border-radius: 6px; white-space: pre-wrap; word-wrap: break-word; font-size: 16px; line-height: 1.8; }}
+                        .message-header {{ color: #92400E; margin-top: 25px; font-size: 18px; font-weight: bold; }}
+                        .footer {{ text-align: center; color: #666; font-size: 14px; margin-top: 20px; padding-top: 20px; border-top: 1px solid #E5A954; }}
+                        .timestamp {{ color: #92400E; font-size: 16px; font-weight: 500; }}
+                    </style>
+                </head>
+                <body>
+                    <div class="container">
+                        <div class="header">
+                            <h1>📬 New Contact Form Submission</h1>
+                        </div>
+                        <div class="content">
+                            <div class="info-block">
+                                <div class="info-label">👤 Name</div>
+                                <div class="info-value">{name}</div>
+                            </div>
+                            <div class="info-block">
+                                <div class="info-label">📧 Email</div>
+                                <div class="info-value"><a href="mailto:{email}" style="color: #B45309; text-decoration: none;">{email}</a></div>
+                            </div>
+                            <div class="info-block">
+                                <div class="info-label">⏰ Received</div>
+                                <div class="info-value timestamp">{datetime.now().strftime('%B %d, %Y at %I:%M %p')}</div>
+                            </div>
+                            <h3 style="color: #92400E; margin-top: 25px; font-size: 18px; font-weight: bold;">Message:</h3>
+                            <div class="message-box">{message}</div>
+                            <div class="footer">
+                                <p>This message was submitted through the contact form on equitylawandco.com</p>
+                            </div>
+                        </div>
+                    </div>
+                </body>
+            </html>
+            """
+
+
+_uncached_engine = Engine(dirs=[str(TEMPLATE_ROOT)], autoescape=True)
+
+
+def uncached_render(context):
+    """Load, parse and style the template from disk on every send, as a DEBUG get_template would"""
+    template = EmailTemplate.__new__(EmailTemplate)
+    template.template = _uncached_engine.get_template('pages/emails/contact_admin.html')
+    template.css = get_email_template('contact_admin').css
+    return template.template.render(Context({**context, 'css': template.css}, autoescape=True))
+
+
+def run(label, render, messages):
+    latencies = []
+    for _ in range(messages):
+        started = time.perf_counter()
+        render()
+        latencies.append(time.perf_counter() - started)
+
+    latencies.sort()
+    print(
+        f"{label:<9} {messages} renders  "
+        f"mean {statistics.mean(latencies) * 1e6:8.1f} us  "
+        f"p50 {latencies[len(latencies) // 2] * 1e6:8.1f} us  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e6:8.1f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=5000)
+    args = parser.parse_args()
+
+    context = {
+        'name': 'Jane <Doe>',
+        'email': 'jane@example.com',
+        'message': 'I would like advice on a property dispute.\n' * 5,
+        'received_at': datetime.now(),
+    }
+    render_email('contact_admin', context)
+
+    run("legacy", lambda: legacy_render(context['name'], context['email'], context['message']), args.messages)
+    run("uncached", lambda: uncached_render(context), args.messages)
+    run("compiled", lambda: render_email('contact_admin', context), args.messages)
+
+    legacy_size = len(legacy_render(context['name'], context['email'], context['message']).encode())
+    compiled_size = len(render_email('contact_admin', context).encode())
+    print(f"body size: legacy {legacy_size} bytes, compiled {compiled_size} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark deep-page latency of the appointment list: page-number
+(COUNT + OFFSET) against keyset cursors.
+
+Builds a throwaway SQLite database with --rows appointments, then requests
+the same deep page both ways through AppointmentViewSet.
+
+Usage (from the backend directory):
+    python benchmarks/pagination.py --rows 1000000 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from rest_framework.settings import api_settings  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from pages.models import Appointment  # noqa: E402
+from pages.pagination import AppointmentPagination  # noqa: E402
+from pages.viewsets import AppointmentViewSet  # noqa: E402
+
+
+SLOTS_PER_DAY = 96
+
+
+def populate(rows):
+    now = datetime.now().isoformat(sep=' ')
+    start = date(2000, 1, 1)
+    sql = (
+        'INSERT INTO pages_appointment (id, client_name, client_email, client_phone, appointment_date, '
+        'appointment_time, duration_minutes, notes, status, created_at, updated_at, confirmation_sent) '
+        "VALUES (%s, 'Client', 'client@example.com', '9800000000', %s, %s, 15, '', 'confirmed', %s, %s, 0)"
+    )
+    batch = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for i in range(rows):
+            day, slot = divmod(i, SLOTS_PER_DAY)
+            batch.append((
+                uuid.uuid4().hex, (start + timedelta(days=day)).isoformat(),
+                f'{slot // 4:02d}:{slot % 4 * 15:02d}:00', now, now,
+            ))
+            if len(batch) == 10000:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def keyset_url(offset):
+    """Cursor that continues after the row at `offset - 1`, i.e. the same page as ?page=offset/size+1"""
+    row = Appointment.objects.order_by(*AppointmentPagination.ordering)[offset - 1]
+    paginator = AppointmentPagination()
+    paginator.ordering = AppointmentPagination.ordering
+    paginator.base_url = 'http://localhost/api/appointments/'
+    return paginator.encode_keyset_cursor(row, reverse=False)
+
+
+def run(label, url, repeat):
+    view = AppointmentViewSet.as_view({'get': 'list'})
+    factory = APIRequestFactory(HTTP_HOST='localhost')
+    latencies = []
+    for _ in range(repeat):
+        request = factory.get(url)
+        started = time.perf_counter()
+        response = view(request)
+        response.render()
+        latencies.append(time.perf_counter() - started)
+    assert response.status_code == 200, response.content
+
+    latencies.sort()
+    print(
+        f"{label:<12} mean {statistics.mean(latencies) * 1000:8.2f} ms  "
+        f"p50 {latencies[len(latencies) // 2] * 1000:8.2f} ms  max {latencies[-1] * 1000:8.2f} ms"
+    )
+    return [row['id'] for row in response.data['results']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection.settings_dict['NAME'] = os.path.join(directory, 'bench.sqlite3')
+        call_command('migrate', verbosity=0)
+
+        started = time.perf_counter()
+        populate(args.rows)
+        print(f"inserted {args.rows} appointments in {time.perf_counter() - started:.1f}s")
+
+        page_size = api_settings.PAGE_SIZE
+        for fraction in (0.0, 0.5, 0.99):
+            page = int(args.rows * fraction) // page_size + 1
+            offset = (page - 1) * page_size
+            print(f"page {page} (offset {offset}):")
+            by_number = run("page-number", f'/api/appointments/?page={page}', args.repeat)
+            url = keyset_url(offset) if offset else '/api/appointments/'
+            by_cursor = run("keyset", url, args.repeat)
+            assert by_number == by_cursor, "both modes must return the same rows"
+
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from blogs import search
+from pages.models import Blog
+from pages.response_cache import invalidate_namespace
+
+
+class Command(BaseCommand):
+    help = "Rebuild the blog full-text search index from the blog table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help="Database alias to rebuild")
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not search.supports_full_text(connections[using]):
+            self.stdout.write("This database has no full-text index; searches use substring matching")
+            return
+
+        search.create_index(connections[using])
+        count = search.rebuild_index(Blog.objects.using(using), using=using)
+        # Cached ?q= responses were rendered from the old index
+        invalidate_namespace('blogs')
+        self.stdout.write(f"Indexed {count} blog post(s)")
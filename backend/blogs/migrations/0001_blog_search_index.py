@@ -0,0 +1,83 @@
+import html
+import re
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+
+# Frozen copies of blogs.search and pages.utils.html_to_text as of this migration;
+# later changes to those modules must not change what it does
+SQLITE_TABLE = 'blogs_blog_fts'
+SEARCH_CONFIG = 'english'
+SQLITE_WEIGHTS = (10.0, 4.0, 1.0, 2.0)
+
+
+def html_to_text(html_content):
+    if not html_content:
+        return ''
+    html_content = re.sub(r'(</(?:p|div|li|h[1-6]|blockquote)>|<br\s*/?>)', r'\1 ', html_content, flags=re.I)
+    return re.sub(r'\s+', ' ', html.unescape(strip_tags(html_content))).strip()
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        return
+
+    Blog = apps.get_model('pages', 'Blog')
+    rows = [
+        (pk, title, excerpt, html_to_text(content), author)
+        for pk, title, excerpt, content, author in Blog.objects.using(connection.alias).values_list(
+            'pk', 'title', 'excerpt', 'content', 'author',
+        ).iterator()
+    ]
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} "
+                "USING fts5(title, excerpt, body, author, tokenize='porter unicode61')"
+            )
+            cursor.execute(
+                f"INSERT INTO {SQLITE_TABLE} ({SQLITE_TABLE}, rank) VALUES ('rank', %s)",
+                [f"bm25({', '.join(str(weight) for weight in SQLITE_WEIGHTS)})"],
+            )
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE}')
+            cursor.executemany(
+                f'INSERT INTO {SQLITE_TABLE} (rowid, title, excerpt, body, author) VALUES (%s, %s, %s, %s, %s)',
+                rows,
+            )
+        else:
+            cursor.execute('ALTER TABLE pages_blog ADD COLUMN IF NOT EXISTS search_vector tsvector')
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS pages_blog_search_vector_idx ON pages_blog USING GIN (search_vector)'
+            )
+            cursor.executemany(
+                'UPDATE pages_blog SET search_vector = '
+                "setweight(to_tsvector(%s, %s), 'A') || setweight(to_tsvector(%s, %s), 'B') || "
+                "setweight(to_tsvector(%s, %s), 'C') || setweight(to_tsvector(%s, %s), 'D') "
+                'WHERE id = %s',
+                [
+                    [SEARCH_CONFIG, title, SEARCH_CONFIG, excerpt, SEARCH_CONFIG, body, SEARCH_CONFIG, author, pk]
+                    for pk, title, excerpt, body, author in rows
+                ],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        if schema_editor.connection.vendor == 'sqlite':
+            cursor.execute(f'DROP TABLE IF EXISTS {SQLITE_TABLE}')
+        elif schema_editor.connection.vendor == 'postgresql':
+            cursor.execute('ALTER TABLE pages_blog DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
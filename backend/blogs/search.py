@@ -0,0 +1,217 @@
+"""
+Full-text search for blog posts.
+
+Posts are indexed as plain text (CKEditor markup stripped) with the title,
+excerpt, body and author weighted in that order:
+
+- SQLite keeps an FTS5 virtual table, blogs_blog_fts, whose rowid is the
+  blog id; results are ranked with bm25() and highlighted with snippet().
+- PostgreSQL keeps a weighted tsvector column, pages_blog.search_vector,
+  behind a GIN index; results are ranked with ts_rank_cd() and
+  highlighted with ts_headline().
+
+Signals keep the index in step with saves and deletes. Bulk writes bypass
+signals, so run `manage.py rebuild_blog_search` after them. Other
+databases fall back to substring matching.
+"""
+import html
+import re
+from collections import namedtuple
+
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils.safestring import mark_safe
+
+from pages.models import Blog
+from pages.utils import html_to_text
+
+
+SQLITE_TABLE = 'blogs_blog_fts'
+SEARCH_CONFIG = 'english'
+
+# bm25 weights for the title, excerpt, body and author columns
+SQLITE_WEIGHTS = (10.0, 4.0, 1.0, 2.0)
+
+# Ranked hits considered for one query; deeper results are not useful to readers
+MAX_RESULTS = 200
+
+# Private-use code points mark matches until the snippet has been escaped
+HIGHLIGHT_START = '\ue000'
+HIGHLIGHT_END = '\ue001'
+
+SearchHit = namedtuple('SearchHit', ['id', 'rank', 'highlight'])
+
+
+def supports_full_text(connection):
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def create_index(connection):
+    """Create the vendor's search structures; a no-op on databases without full-text support"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} "
+                "USING fts5(title, excerpt, body, author, tokenize='porter unicode61')"
+            )
+            # Persist the column weights as the table's rank function, so ORDER BY rank
+            # lets FTS5 sort internally and snippets are built only for the returned rows
+            cursor.execute(
+                f"INSERT INTO {SQLITE_TABLE} ({SQLITE_TABLE}, rank) VALUES ('rank', %s)",
+                [f"bm25({', '.join(str(weight) for weight in SQLITE_WEIGHTS)})"],
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute('ALTER TABLE pages_blog ADD COLUMN IF NOT EXISTS search_vector tsvector')
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS pages_blog_search_vector_idx ON pages_blog USING GIN (search_vector)'
+            )
+
+
+def drop_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'DROP TABLE IF EXISTS {SQLITE_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('ALTER TABLE pages_blog DROP COLUMN IF EXISTS search_vector')
+
+
+def document(blog):
+    """The (title, excerpt, body, author) text indexed for a blog"""
+    return blog.title, blog.excerpt, html_to_text(blog.content), blog.author
+
+
+def index_blogs(blogs, using='default', replace=True):
+    """
+    Add or refresh the index entries of `blogs`. Pass replace=False when
+    the entries are known to be absent (a rebuild) to skip the deletes.
+    """
+    connection = connections[using]
+    if not supports_full_text(connection):
+        return
+
+    rows = [(blog.pk, *document(blog)) for blog in blogs]
+    if not rows:
+        return
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            if replace:
+                cursor.executemany(f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [[row[0]] for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {SQLITE_TABLE} (rowid, title, excerpt, body, author) VALUES (%s, %s, %s, %s, %s)',
+                rows,
+            )
+        else:
+            cursor.executemany(
+                'UPDATE pages_blog SET search_vector = '
+                "setweight(to_tsvector(%s, %s), 'A') || setweight(to_tsvector(%s, %s), 'B') || "
+                "setweight(to_tsvector(%s, %s), 'C') || setweight(to_tsvector(%s, %s), 'D') "
+                'WHERE id = %s',
+                [
+                    [SEARCH_CONFIG, title, SEARCH_CONFIG, excerpt, SEARCH_CONFIG, body, SEARCH_CONFIG, author, pk]
+                    for pk, title, excerpt, body, author in rows
+                ],
+            )
+
+
+def remove_blog(blog_id, using='default'):
+    connection = connections[using]
+    # The PostgreSQL vector lives on the blog row and goes away with it
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [blog_id])
+
+
+def rebuild_index(blogs, using='default', batch_size=500):
+    """Re-index every blog in `blogs` from scratch in one transaction; returns the number indexed"""
+    connection = connections[using]
+    count = 0
+    with transaction.atomic(using=using):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {SQLITE_TABLE}')
+
+        batch = []
+        for blog in blogs.only('pk', 'title', 'excerpt', 'content', 'author').iterator(chunk_size=batch_size):
+            batch.append(blog)
+            if len(batch) == batch_size:
+                index_blogs(batch, using, replace=False)
+                count += len(batch)
+                batch = []
+        index_blogs(batch, using, replace=False)
+    return count + len(batch)
+
+
+def fts5_query(query):
+    """
+    Turn free text into a safe FTS5 expression: every word must match,
+    and the last one also matches as a prefix for search-as-you-type.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def render_highlight(snippet, unescape=False):
+    """Escape a snippet and turn the match markers into <mark> tags"""
+    if unescape:
+        snippet = html.unescape(snippet)
+    escaped = html.escape(snippet, quote=False)
+    return mark_safe(escaped.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>'))
+
+
+def search(query, limit=MAX_RESULTS, using='default'):
+    """Return up to `limit` published blogs matching `query` as SearchHits, best match first"""
+    connection = connections[using]
+
+    if connection.vendor == 'sqlite':
+        expression = fts5_query(query)
+        if expression is None:
+            return []
+        sql = (
+            f"SELECT {SQLITE_TABLE}.rowid, -rank, snippet({SQLITE_TABLE}, -1, %s, %s, '…', 32) "
+            f'FROM {SQLITE_TABLE} JOIN pages_blog ON pages_blog.id = {SQLITE_TABLE}.rowid '
+            f'WHERE {SQLITE_TABLE} MATCH %s AND pages_blog.is_published '
+            f'ORDER BY rank LIMIT %s'
+        )
+        params = [HIGHLIGHT_START, HIGHLIGHT_END, expression, limit]
+        unescape = False
+    elif connection.vendor == 'postgresql':
+        if not query.strip():
+            return []
+        sql = (
+            'SELECT hits.id, hits.rank, '
+            "ts_headline(%s, regexp_replace(pages_blog.content, '<[^>]+>', ' ', 'g'), hits.query, %s) "
+            'FROM ('
+            '  SELECT id, ts_rank_cd(search_vector, query) AS rank, query '
+            '  FROM pages_blog, websearch_to_tsquery(%s, %s) query '
+            '  WHERE search_vector @@ query AND is_published '
+            '  ORDER BY rank DESC, id LIMIT %s'
+            ') hits JOIN pages_blog ON pages_blog.id = hits.id '
+            'ORDER BY hits.rank DESC, hits.id'
+        )
+        options = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords=35, MinWords=15'
+        params = [SEARCH_CONFIG, options, SEARCH_CONFIG, query, limit]
+        unescape = True
+    else:
+        return _substring_search(query, limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            SearchHit(blog_id, rank, render_highlight(snippet or '', unescape))
+            for blog_id, rank, snippet in cursor.fetchall()
+        ]
+
+
+def _substring_search(query, limit):
+    blogs = Blog.objects.filter(is_published=True)
+    for word in re.findall(r'\w+', query):
+        blogs = blogs.filter(Q(title__icontains=word) | Q(excerpt__icontains=word) | Q(content__icontains=word))
+    return [
+        SearchHit(blog_id, 0.0, render_highlight(excerpt))
+        for blog_id, excerpt in blogs.order_by('-published_date', 'id').values_list('id', 'excerpt')[:limit]
+    ]
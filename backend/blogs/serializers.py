@@ -1,9 +1,44 @@
 from rest_framework import serializers
+from pages.images import srcset
 from pages.models import Blog
+from pages.serializers import MediaModelSerializer
 
 
-class BlogSerializer(serializers.ModelSerializer):
+class BlogListSerializer(MediaModelSerializer):
+    """Blog card for the list endpoint; leaves out the post body"""
+    deferred_fields = ['content', 'content_html', 'content_text', 'toc']
+    featured_image_srcset = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Blog
+        fields = [
+            'id',
+            'title',
+            'slug',
+            'author',
+            'featured_image',
+            'featured_image_srcset',
+            'featured_image_width',
+            'featured_image_height',
+            'featured_image_placeholder',
+            'excerpt',
+            'category',
+            'word_count',
+            'reading_time_minutes',
+            'published_date',
+            'updated_date',
+            'is_published',
+            'created_at',
+        ]
+        read_only_fields = ['slug', 'published_date', 'updated_date', 'created_at']
+    
+    def get_featured_image_srcset(self, obj):
+        return srcset(obj.featured_image, obj.featured_image_derivatives, self.context.get('request'))
+
+
+class BlogSerializer(MediaModelSerializer):
     """Serializer for Blog model"""
+    featured_image_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = Blog
@@ -13,8 +48,16 @@ class BlogSerializer(serializers.ModelSerializer):
             'slug',
             'author',
             'featured_image',
+            'featured_image_srcset',
+            'featured_image_width',
+            'featured_image_height',
+            'featured_image_placeholder',
             'excerpt',
             'content',
+            'content_html',
+            'toc',
+            'word_count',
+            'reading_time_minutes',
             'category',
             'published_date',
             'updated_date',
@@ -22,3 +65,16 @@ class BlogSerializer(serializers.ModelSerializer):
             'created_at',
         ]
         read_only_fields = ['slug', 'published_date', 'updated_date', 'created_at']
+    
+    def get_featured_image_srcset(self, obj):
+        return srcset(obj.featured_image, obj.featured_image_derivatives, self.context.get('request'))
+
+
+
+class BlogSearchResultSerializer(BlogListSerializer):
+    """Blog card with its full-text search rank and highlighted snippet"""
+    rank = serializers.FloatField(source='search_rank', read_only=True)
+    highlight = serializers.CharField(source='search_highlight', read_only=True)
+    
+    class Meta(BlogListSerializer.Meta):
+        fields = BlogListSerializer.Meta.fields + ['rank', 'highlight']
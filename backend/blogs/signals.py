@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from pages.models import Blog
+from . import search
+
+
+@receiver(post_save, sender=Blog)
+def blog_saved(sender, instance, using, **kwargs):
+    """Keep the full-text index in step with the post"""
+    search.index_blogs([instance], using)
+
+
+@receiver(post_delete, sender=Blog)
+def blog_deleted(sender, instance, using, **kwargs):
+    search.remove_blog(instance.pk, using)
@@ -1,3 +1,248 @@
+import json
+from base64 import urlsafe_b64encode
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from pages.content import process_content
+from pages.models import Blog
 
-# Create your tests here.
+
+class BlogResponseCacheTest(TestCase):
+    """Blog list responses are cached until a post changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.blog = Blog.objects.create(
+            title="Registering a Trademark", author="Equity Law & Co",
+            excerpt="How to register", content="<p>Steps</p>",
+        )
+
+    def test_cached_until_blog_changes(self):
+        self.assertEqual(self.client.get('/api/blogs/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/blogs/')['X-Cache'], 'HIT')
+
+        self.blog.is_published = False
+        self.blog.save()
+
+        response = self.client.get('/api/blogs/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['results'], [])
+
+
+class BlogPaginationTest(TestCase):
+    """Blogs are paged by (-published_date, id) keyset cursors"""
+
+    def setUp(self):
+        cache.clear()
+        # 25 posts sharing a handful of publish dates, so ties are common
+        for i in range(25):
+            blog = Blog.objects.create(
+                title=f"Post {i}", author="Equity Law & Co", excerpt="Excerpt", content="<p>Body</p>",
+            )
+            Blog.objects.filter(pk=blog.pk).update(published_date=f'2026-01-0{i % 3 + 1}')
+
+    def expected_ids(self):
+        return list(Blog.objects.order_by('-published_date', 'id').values_list('id', flat=True))
+
+    def test_cursor_pages_cover_every_post_once(self):
+        seen = []
+        url = '/api/blogs/'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                data = self.client.get(url).json()
+            self.assertNotIn('count', data)
+            # The only aggregate is the ETag fingerprint; pagination itself never counts or offsets
+            self.assertFalse(any('COUNT(*)' in query['sql'] or 'OFFSET' in query['sql'] for query in queries))
+            seen.extend(blog['id'] for blog in data['results'])
+            url = data['next']
+
+        self.assertEqual(seen, self.expected_ids())
+
+    def test_previous_link_returns_the_same_page(self):
+        first = self.client.get('/api/blogs/').json()
+        second = self.client.get(first['next']).json()
+        third = self.client.get(second['next']).json()
+
+        back = self.client.get(third['previous']).json()
+        self.assertEqual([blog['id'] for blog in back['results']], [blog['id'] for blog in second['results']])
+        self.assertIsNotNone(back['next'])
+
+    def test_page_number_mode_still_available(self):
+        data = self.client.get('/api/blogs/?page=3').json()
+        self.assertEqual(data['count'], 25)
+        self.assertEqual([blog['id'] for blog in data['results']], self.expected_ids()[20:])
+
+    def test_invalid_cursor_is_404(self):
+        self.assertEqual(self.client.get('/api/blogs/?cursor=not-a-cursor').status_code, 404)
+
+    def test_wrongly_typed_cursor_is_404(self):
+        for values in (['not-a-date', 1], [20260101, 1], [None, 1], ['2026-01-01', 'x']):
+            cursor = urlsafe_b64encode(json.dumps({'v': values, 'r': 0}).encode()).decode()
+            self.assertEqual(self.client.get(f'/api/blogs/?cursor={cursor}').status_code, 404, values)
+
+
+class BlogSearchTest(TestCase):
+    """?q= searches the stripped text of posts through the full-text index"""
+
+    def setUp(self):
+        cache.clear()
+        self.trademark = Blog.objects.create(
+            title="Trademark Registration in Nepal", author="Equity Law & Co",
+            excerpt="What to file and when",
+            content='<p>The <strong>Department</strong> of Industry handles <a href="/ip">filings</a>.</p>',
+        )
+        self.property = Blog.objects.create(
+            title="Buying Property", author="Equity Law & Co",
+            excerpt="Land transfer basics",
+            content="<p>Check the land ownership certificate before any trademark of sale &amp; transfer.</p>",
+        )
+
+    def search(self, query):
+        response = self.client.get('/api/blogs/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_results_are_ranked_and_highlighted(self):
+        results = self.search('trademark')
+
+        self.assertEqual([blog['slug'] for blog in results], [self.trademark.slug, self.property.slug])
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+        self.assertIn('<mark>trademark</mark>', results[1]['highlight'])
+        self.assertIn('&amp; transfer', results[1]['highlight'])
+
+    def test_markup_is_not_searchable(self):
+        self.assertEqual(self.search('strong'), [])
+        self.assertEqual(self.search('href'), [])
+        self.assertEqual(len(self.search('department')), 1)
+
+    def test_stemming_and_prefix(self):
+        self.assertEqual([blog['slug'] for blog in self.search('registered')], [self.trademark.slug])
+        self.assertEqual([blog['slug'] for blog in self.search('owner')], [self.property.slug])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.property.content = "<p>Inheritance rules</p>"
+        self.property.save()
+        self.assertEqual(len(self.search('inheritance')), 1)
+        self.assertEqual(len(self.search('ownership')), 0)
+
+        self.property.delete()
+        self.assertEqual(self.search('inheritance'), [])
+
+    def test_unpublished_posts_are_hidden(self):
+        self.trademark.is_published = False
+        self.trademark.save()
+        self.assertEqual([blog['slug'] for blog in self.search('trademark')], [self.property.slug])
+
+    def test_query_syntax_is_neutralised(self):
+        self.assertEqual(self.search('"unbalanced AND ('), [])
+        self.assertEqual(self.search('***'), [])
+
+    def test_rebuild_command_restores_bulk_created_posts(self):
+        Blog.objects.bulk_create([
+            Blog(title="Arbitration Clauses", slug="arbitration-clauses", author="A", excerpt="E", content="<p>Seat</p>"),
+        ])
+        self.assertEqual(self.search('arbitration'), [])
+
+        out = StringIO()
+        call_command('rebuild_blog_search', stdout=out)
+        self.assertIn('Indexed 3', out.getvalue())
+        self.assertEqual(len(self.search('arbitration')), 1)
+
+
+class BlogContentPipelineTest(TestCase):
+    """Derived content fields are computed on save and served instead of raw HTML"""
+
+    def setUp(self):
+        cache.clear()
+        self.blog = Blog.objects.create(
+            title="Company Registration", author="Equity Law & Co", excerpt="Steps",
+            content=(
+                '<h2>Before you <em>file</em></h2><p onclick="steal()">Reserve a name &amp; '
+                '<a href="javascript:alert(1)">check</a> it.</p><script>alert(1)</script>'
+                '<h3>Documents</h3><p>' + 'word ' * 400 + '</p><h2>Before you file</h2>'
+            ),
+        )
+
+    def test_fields_are_derived_on_save(self):
+        self.blog.refresh_from_db()
+
+        self.assertNotIn('script', self.blog.content_html)
+        self.assertNotIn('onclick', self.blog.content_html)
+        self.assertNotIn('javascript', self.blog.content_html)
+        self.assertIn('<h2 id="before-you-file">Before you <em>file</em></h2>', self.blog.content_html)
+        self.assertTrue(self.blog.content_text.startswith('Before you file Reserve a name & check it. Documents word'))
+        self.assertEqual(self.blog.word_count, 413)
+        self.assertEqual(self.blog.reading_time_minutes, 3)
+        self.assertEqual(self.blog.toc, [
+            {'level': 2, 'text': 'Before you file', 'id': 'before-you-file'},
+            {'level': 3, 'text': 'Documents', 'id': 'documents'},
+            {'level': 2, 'text': 'Before you file', 'id': 'before-you-file-2'},
+        ])
+
+    def test_nested_and_unclosed_headings_stay_balanced(self):
+        nested = process_content('<h2>A<h3>B</h3>C</h2><p>Body</p>')
+        self.assertEqual(nested.html, '<h2 id="a">A</h2><h3 id="b">B</h3>C<p>Body</p>')
+        self.assertEqual([entry['id'] for entry in nested.toc], ['a', 'b'])
+
+        unclosed = process_content('<h2>One<h2>Two<p>Body')
+        self.assertEqual(unclosed.html, '<h2 id="one">One</h2><h2 id="twobody">Two<p>Body</p></h2>')
+        self.assertEqual([entry['text'] for entry in unclosed.toc], ['One', 'TwoBody'])
+
+    def test_iframes_only_from_allowed_hosts(self):
+        html = process_content(
+            '<iframe src="https://www.youtube.com/embed/abc" allow="camera; microphone" allowfullscreen '
+            'style="position:absolute;top:0"></iframe>'
+            '<iframe src="https://evil.example/phish"></iframe>'
+            '<iframe src="http://www.youtube.com/embed/abc"></iframe>'
+            '<iframe src="https://www.youtube.com.evil.example/embed"></iframe>'
+            '<iframe src="//player.vimeo.com/video/1"></iframe>'
+        ).html
+        self.assertEqual(html, '<iframe src="https://www.youtube.com/embed/abc" allowfullscreen=""></iframe>')
+
+        with self.settings(CONTENT_IFRAME_HOSTS=['player.vimeo.com']):
+            self.assertEqual(process_content('<iframe src="https://www.youtube.com/embed/abc"></iframe>').html, '')
+
+    def test_style_keeps_only_safe_properties(self):
+        html = process_content(
+            '<div style="position: fixed; inset: 0; z-index: 9999; background-color: white">Login</div>'
+            '<p style="text-align: center; COLOR: red; transform: scale(50); width: expression(alert(1))">Hi</p>'
+            '<span style="background-color: u\\72l(https://evil.example/x)">x</span>'
+            '<span style="position:absolute; top:0">y</span>'
+        ).html
+        self.assertEqual(html, (
+            '<div style="background-color: white">Login</div>'
+            '<p style="text-align: center; color: red">Hi</p><span>x</span><span>y</span>'
+        ))
+
+    def test_partial_saves_refresh_derived_fields_only_with_content(self):
+        self.blog.content = '<p>Short</p>'
+        self.blog.save(update_fields=['content'])
+        self.blog.refresh_from_db()
+        self.assertEqual((self.blog.word_count, self.blog.toc), (1, []))
+
+    def test_list_skips_content_and_detail_serves_derived_fields(self):
+        results = self.client.get('/api/blogs/').json()['results']
+        self.assertNotIn('content', results[0])
+        self.assertNotIn('content_html', results[0])
+        self.assertEqual(results[0]['reading_time_minutes'], 3)
+
+        detail = self.client.get(f'/api/blogs/{self.blog.slug}/').json()
+        self.assertEqual(detail['toc'][1]['id'], 'documents')
+        self.assertIn('id="documents"', detail['content_html'])
+
+    def test_backfill_command_processes_outdated_rows(self):
+        Blog.objects.bulk_create([
+            Blog(title=f"Imported {i}", slug=f"imported-{i}", author="A", excerpt="E", content="<h2>Intro</h2><p>One two</p>")
+            for i in range(5)
+        ])
+
+        out = StringIO()
+        call_command('process_blog_content', batch_size=2, stdout=out)
+
+        self.assertIn('Done: 5 blog post(s) processed', out.getvalue())
+        imported = Blog.objects.get(slug='imported-4')
+        self.assertEqual((imported.word_count, imported.toc[0]['id']), (3, 'intro'))
+        self.assertFalse(Blog.objects.filter(content_version=0).exists())
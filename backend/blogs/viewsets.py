@@ -1,23 +1,68 @@
 from rest_framework import viewsets, filters
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from pages.models import Blog
-from blogs.serializers import BlogSerializer
+from pages.conditional import ConditionalGetMixin
+from pages.pagination import BlogPagination
+from pages.response_cache import CachedResponseMixin
+from blogs import search
+from blogs.serializers import BlogListSerializer, BlogSearchResultSerializer, BlogSerializer
 
 
-class BlogViewSet(viewsets.ReadOnlyModelViewSet):
+class BlogSearchMixin:
+    """
+    `?q=` mode for the list endpoint: ranked, highlighted full-text results
+    from blogs.search, paged by number since ranks have no stable keyset.
+    """
+    search_query_param = 'q'
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get(self.search_query_param, '').strip()
+        if not query:
+            return super().list(request, *args, **kwargs)
+
+        hits = search.search(query)
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(hits, request, view=self)
+
+        blogs = Blog.objects.defer(*BlogListSerializer.deferred_fields).in_bulk([hit.id for hit in page])
+        results = []
+        for hit in page:
+            blog = blogs.get(hit.id)
+            if blog is not None:
+                blog.search_rank, blog.search_highlight = hit.rank, hit.highlight
+                results.append(blog)
+
+        serializer = BlogSearchResultSerializer(results, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+
+class BlogViewSet(ConditionalGetMixin, CachedResponseMixin, BlogSearchMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Blog posts.
     Provides list and retrieve endpoints.
-    Supports searching by title/content.
+    Supports searching by title/content, and ranked full-text search with ?q=.
     """
     queryset = Blog.objects.filter(is_published=True).order_by('-published_date')
     serializer_class = BlogSerializer
+    pagination_class = BlogPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'excerpt', 'content', 'author']
     ordering_fields = ['published_date', 'title']
+    cache_namespace = 'blogs'
+    last_modified_field = 'updated_date'
     
     def get_queryset(self):
         """Return only published blogs"""
-        return Blog.objects.filter(is_published=True).order_by('-published_date')
+        queryset = Blog.objects.filter(is_published=True).order_by('-published_date')
+        if self.action == 'list':
+            # Cards never show the body, so don't read it off disk
+            queryset = queryset.defer(*BlogListSerializer.deferred_fields)
+        return queryset
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return BlogListSerializer
+        return BlogSerializer
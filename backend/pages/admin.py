@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import PracticeArea, PracticeAreaImage, ContactMessage, Appointment, AppointmentDay, AvailableHours, Attorney, Blog
+from django.utils import timezone
+from .models import PracticeArea, PracticeAreaImage, ContactMessage, Appointment, AppointmentDay, AvailableHours, Attorney, Blog, ImageJob, OutboundEmail
+from .exports import APPOINTMENT_COLUMNS, CONTACT_MESSAGE_COLUMNS, export_response
+from .schedule import invalidate_schedule
 
 
 admin.site.site_header = "Equity Law & Co Admin"
@@ -7,6 +10,27 @@ admin.site.site_title = "Equity Law & Co Admin Portal"
 admin.site.index_title = "Welcome to Equity Law & Co Administration"
 
 
+class ExportActionsMixin:
+    """ModelAdmin mixin adding "Export selected ... as CSV/XLSX" actions"""
+
+    export_columns = None
+    export_filename = None
+
+    actions = ['export_csv', 'export_xlsx']
+
+    def _export(self, queryset, fmt):
+        stamp = timezone.localdate().isoformat()
+        return export_response(queryset, self.export_columns, fmt, f'{self.export_filename}-{stamp}')
+
+    def export_csv(self, request, queryset):
+        return self._export(queryset, 'csv')
+    export_csv.short_description = "Export selected %(verbose_name_plural)s as CSV"
+
+    def export_xlsx(self, request, queryset):
+        return self._export(queryset, 'xlsx')
+    export_xlsx.short_description = "Export selected %(verbose_name_plural)s as Excel (XLSX)"
+
+
 class PracticeAreaImageInline(admin.TabularInline):
     model = PracticeAreaImage
     extra = 3
@@ -30,6 +54,11 @@ class AppointmentDayAdmin(admin.ModelAdmin):
     inlines = [AvailableHoursInline]
     ordering = ['day_of_week']
     
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Inline window edits change the compiled weekly schedule
+        invalidate_schedule()
+    
     def get_day_display(self, obj):
         return obj.get_day_of_week_display()
     get_day_display.short_description = 'Day'
@@ -69,12 +98,14 @@ class PracticeAreaImageAdmin(admin.ModelAdmin):
     image_preview.short_description = 'Image'
 
 
-class ContactMessageAdmin(admin.ModelAdmin):
+class ContactMessageAdmin(ExportActionsMixin, admin.ModelAdmin):
     list_display = ['name', 'email', 'created_at', 'is_read', 'preview']
     list_filter = ['created_at', 'is_read']
     search_fields = ['name', 'email', 'message']
     readonly_fields = ['name', 'email', 'message', 'created_at']
     fields = ['name', 'email', 'message', 'created_at', 'is_read']
+    export_columns = CONTACT_MESSAGE_COLUMNS
+    export_filename = 'contact-messages'
     
     def preview(self, obj):
         return obj.message[:50] + '...' if len(obj.message) > 50 else obj.message
@@ -92,7 +123,7 @@ admin.site.register(PracticeAreaImage, PracticeAreaImageAdmin)
 admin.site.register(ContactMessage, ContactMessageAdmin)
 
 
-class AppointmentAdmin(admin.ModelAdmin):
+class AppointmentAdmin(ExportActionsMixin, admin.ModelAdmin):
     list_display = ['client_name', 'appointment_date', 'appointment_time', 'status', 'practice_area', 'confirmation_status']
     list_filter = ['status', 'appointment_date', 'practice_area', 'created_at']
     search_fields = ['client_name', 'client_email', 'client_phone']
@@ -103,6 +134,8 @@ class AppointmentAdmin(admin.ModelAdmin):
         'duration_minutes', 'notes', 'status', 'confirmation_sent',
         'created_at', 'updated_at'
     ]
+    export_columns = APPOINTMENT_COLUMNS
+    export_filename = 'appointments'
     
     def confirmation_status(self, obj):
         return '✓ Sent' if obj.confirmation_sent else '✗ Not sent'
@@ -110,6 +143,34 @@ class AppointmentAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Appointment, AppointmentAdmin)
+
+
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'to_email', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['to_email', 'subject']
+    readonly_fields = ['to_email', 'subject', 'html_content', 'attempts', 'last_error', 'appointment', 'created_at', 'sent_at']
+    fields = ['to_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'last_error', 'appointment', 'created_at', 'sent_at', 'html_content']
+    
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
+
+
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ['model_label', 'object_id', 'field_name', 'source_name', 'status', 'attempts', 'next_attempt_at']
+    list_filter = ['status', 'model_label', 'created_at']
+    search_fields = ['source_name']
+    readonly_fields = ['model_label', 'object_id', 'field_name', 'source_name', 'staged', 'attempts', 'last_error', 'created_at', 'finished_at']
+    fields = ['model_label', 'object_id', 'field_name', 'source_name', 'staged', 'status', 'attempts', 'next_attempt_at', 'last_error', 'created_at', 'finished_at']
+    
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(ImageJob, ImageJobAdmin)
 admin.site.register(AppointmentDay, AppointmentDayAdmin)
 admin.site.register(Attorney)
 
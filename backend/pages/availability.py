@@ -0,0 +1,185 @@
+"""
+Availability engine for appointment booking.
+
+Reads a day's available-hours windows from the cached weekly schedule and
+its occupancy bitmap (pages.occupancy) once, then keeps the candidate slots
+whose units are all free with one mask test each, instead of querying the
+database or scanning appointments for every candidate slot.
+
+Date ranges skip the per-slot loop: the free units of every day are packed
+into one integer, DAY_BYTES per day, and the slots of all days are found
+with a few whole-range shifts and ANDs (see range_slot_masks).
+"""
+from datetime import datetime, time, timedelta
+
+from .occupancy import BITMAP_BYTES, UNIT_MINUTES, UNITS_PER_DAY, occupancy_by_date, span_mask, unit_span
+from .schedule import get_weekly_schedule
+
+
+# Candidate slots start every 30 minutes from the beginning of each window
+SLOT_STEP_MINUTES = 30
+
+# Stride of a day in the packed range bitmaps; the spare high bits stay clear,
+# so a run of free units never carries over into the next day
+DAY_BYTES = BITMAP_BYTES + 1
+FREE_DAY = (1 << UNITS_PER_DAY) - 1
+
+
+def get_day_windows(date):
+    """Return the (start_time, end_time) windows configured for the weekday of `date`"""
+    return get_weekly_schedule().windows(date.weekday())
+
+
+def get_weekly_windows():
+    """Return {weekday: ((start_time, end_time), ...)} for every active day"""
+    return get_weekly_schedule().weekly_windows()
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def compute_free_slots(windows, occupied, duration_minutes=60):
+    """
+    Sweep the candidate slots of each window and keep those that fit inside
+    the window and whose units are all clear in the `occupied` bitmask.
+    """
+    free_slots = []
+
+    for window_start, window_end in windows:
+        end = _minutes(window_end)
+        for start in range(_minutes(window_start), end, SLOT_STEP_MINUTES):
+            if start + duration_minutes > end:
+                break
+            if not occupied & span_mask(unit_span(start, duration_minutes)):
+                free_slots.append(time(start // 60, start % 60))
+
+    return free_slots
+
+
+def candidate_masks(windows, duration_minutes):
+    """
+    The candidate slots of compute_free_slots as {(minute offset, length in
+    units): mask of the units they start in}. A slot starting at unit n of a
+    group begins at n * UNIT_MINUTES + offset and is free when the `length`
+    units from n are.
+    """
+    groups = {}
+    for window_start, window_end in windows:
+        end = _minutes(window_end)
+        for start in range(_minutes(window_start), end - duration_minutes + 1, SLOT_STEP_MINUTES):
+            units = unit_span(start, duration_minutes)
+            key = (start % UNIT_MINUTES, len(units))
+            groups[key] = groups.get(key, 0) | 1 << units.start
+    return groups
+
+
+def _pack(masks):
+    return int.from_bytes(b''.join(mask.to_bytes(DAY_BYTES, 'little') for mask in masks), 'little')
+
+
+def _unpack(packed, days):
+    data = packed.to_bytes(days * DAY_BYTES, 'little')
+    return [int.from_bytes(data[n:n + DAY_BYTES], 'little') for n in range(0, len(data), DAY_BYTES)]
+
+
+def _runs(free, length):
+    """Bits of `free` that start `length` consecutive set bits"""
+    runs, width = free, 1
+    while width < length:
+        # Each pass doubles the run length covered, so this takes log2(length) passes
+        step = min(width, length - width)
+        runs &= runs >> step
+        width += step
+    return runs
+
+
+def _set_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def range_slot_masks(start_date, end_date, duration_minutes=60):
+    """
+    Free slots of every date between `start_date` and `end_date` (inclusive)
+    as (dates, {(minute offset, length): [mask per date]}), grouped as in
+    candidate_masks. Gives the same slots as compute_free_slots day by day.
+
+    The free units of the whole range (open days only; past dates have no
+    candidates) are packed into one integer, so finding the units that
+    start `length` free units is log2(length) shifts and ANDs over the range
+    rather than a mask test per candidate slot. One occupancy query.
+    """
+    today = datetime.now().date()
+    dates = [start_date + timedelta(days=n) for n in range((end_date - start_date).days + 1)]
+    weekly_windows = get_weekly_windows()
+    if not weekly_windows or not dates:
+        return dates, {}
+
+    by_weekday = {
+        weekday: candidate_masks(windows, duration_minutes) for weekday, windows in weekly_windows.items()
+    }
+    occupied_by_date = occupancy_by_date(max(start_date, today), end_date)
+    free = _pack(FREE_DAY & ~occupied_by_date.get(day, 0) for day in dates)
+
+    slot_masks = {}
+    for key in set().union(*by_weekday.values()):
+        candidates = _pack(
+            by_weekday.get(day.weekday(), {}).get(key, 0) if day >= today else 0 for day in dates
+        )
+        if candidates:
+            slot_masks[key] = _unpack(_runs(free, key[1]) & candidates, len(dates))
+    return dates, slot_masks
+
+
+def get_available_slots(date, duration_minutes=60):
+    """
+    Get available appointment start times for `date`.
+
+    Windows come from the cached weekly schedule, so the only query is the
+    one for the day's occupancy row, regardless of how many windows,
+    candidate slots or appointments the day has.
+    """
+    if date < datetime.now().date():
+        return []
+
+    windows = get_day_windows(date)
+    if not windows:
+        return []
+
+    occupied = occupancy_by_date(date, date).get(date, 0)
+    return compute_free_slots(windows, occupied, duration_minutes)
+
+
+def get_available_slots_range(start_date, end_date, duration_minutes=60):
+    """
+    Get available appointment start times for every date between `start_date`
+    and `end_date` (inclusive), as an ordered {date: [time, ...]} mapping.
+
+    Loads the occupancy bitmaps of the range with a single query, reads the
+    windows from the cached weekly schedule and finds the slots of all days
+    at once with range_slot_masks.
+    """
+    dates, slot_masks = range_slot_masks(start_date, end_date, duration_minutes)
+    slots_by_date = {}
+    for n, check_date in enumerate(dates):
+        starts = [
+            unit * UNIT_MINUTES + offset
+            for (offset, _), masks in slot_masks.items()
+            for unit in _set_bits(masks[n])
+        ]
+        slots_by_date[check_date] = [time(start // 60, start % 60) for start in sorted(starts)]
+    return slots_by_date
+
+
+def get_available_slot_counts(start_date, end_date, duration_minutes=60):
+    """Return {date: number of available slots} for dates in the range that have any"""
+    dates, slot_masks = range_slot_masks(start_date, end_date, duration_minutes)
+    counts = {}
+    for n, check_date in enumerate(dates):
+        count = sum(masks[n].bit_count() for masks in slot_masks.values())
+        if count:
+            counts[check_date] = count
+    return counts
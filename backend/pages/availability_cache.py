@@ -0,0 +1,93 @@
+"""
+Cache of the availability answers behind available_slots and available_dates.
+
+An entry is keyed by the query (kind, date range, duration), today's date
+and the weekly schedule version, so a schedule edit retires every entry at
+once and nothing computed yesterday is served today; entries also expire at
+midnight. Each ISO week has a version token, replaced whenever
+refresh_occupancy changes the bitmap of one of its dates. An entry stores
+the tokens of the weeks it covers and is ignored once any of them changes,
+so a booking only invalidates the answers that include its week, and a
+year-long range needs 53 tokens rather than one per date.
+"""
+import uuid
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .schedule import get_schedule_version
+
+
+CACHE_PREFIX = 'pages:availability'
+
+
+def _week_key(day):
+    year, week, _ = day.isocalendar()
+    return f'{CACHE_PREFIX}:week:{year}-{week:02d}'
+
+
+def _week_keys(start_date, end_date):
+    """Token keys of the ISO weeks overlapping start_date..end_date, in order"""
+    monday = start_date - timedelta(days=start_date.weekday())
+    return [_week_key(monday + timedelta(weeks=n)) for n in range((end_date - monday).days // 7 + 1)]
+
+
+def cache_timeout(now=None):
+    """API_RESPONSE_CACHE_TIMEOUT, cut short at the next midnight"""
+    now = now or datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    # Django treats a timeout of 0 as "don't cache"; keep at least a second
+    return max(1, min(settings.API_RESPONSE_CACHE_TIMEOUT, int((midnight - now).total_seconds())))
+
+
+def cached_availability(kind, start_date, end_date, duration_minutes, compute):
+    """
+    Return compute() for the (start_date, end_date, duration_minutes) query,
+    from the cache when no date it covers has changed since it was stored.
+    """
+    now = datetime.now()
+    today = now.date()
+    timeout = cache_timeout(now)
+    key = (f'{CACHE_PREFIX}:{kind}:{today.isoformat()}:{get_schedule_version()}:'
+           f'{start_date.isoformat()}:{end_date.isoformat()}:{duration_minutes}')
+
+    # Past dates have no slots, so only today onwards can change the answer
+    first = max(start_date, today)
+    week_keys = _week_keys(first, end_date) if first <= end_date else []
+    found = cache.get_many([key, *week_keys])
+
+    missing = {week_key: uuid.uuid4().hex for week_key in week_keys if week_key not in found}
+    if missing:
+        cache.set_many(missing, timeout)
+        found.update(missing)
+    versions = tuple(found[week_key] for week_key in week_keys)
+
+    cached = found.get(key)
+    if cached is not None and cached[0] == versions:
+        return cached[1]
+
+    # Versions are read before computing: a change committed meanwhile replaces them and retires this entry
+    value = compute()
+    cache.set(key, (versions, value), timeout)
+    return value
+
+
+def invalidate_dates(dates):
+    """
+    Retire every cached answer that covers the week of one of `dates`.
+
+    Like the weekly schedule, the tokens are replaced immediately and again
+    after the surrounding transaction commits, so no entry computed from
+    uncommitted rows survives.
+    """
+    week_keys = {_week_key(day) for day in dates}
+    if not week_keys:
+        return
+
+    def bump():
+        cache.set_many({week_key: uuid.uuid4().hex for week_key in week_keys}, cache_timeout())
+
+    bump()
+    transaction.on_commit(bump)
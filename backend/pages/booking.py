@@ -0,0 +1,67 @@
+"""
+Transactional appointment booking.
+
+Every active appointment reserves the fixed-size time units it occupies in
+SlotReservation, whose (date, unit) pair is unique. Reserving is a single
+bulk insert against that unique index, so two overlapping bookings can never
+both commit, whatever their start times and durations. The same transaction
+refreshes the dates' occupancy bitmaps (pages.occupancy).
+"""
+from django.db import IntegrityError, transaction
+
+from .models import SlotReservation
+from .occupancy import ACTIVE_STATUSES, refresh_occupancy, reservation_units
+
+
+# Saving any of these fields can change which units an appointment holds
+RESERVATION_FIELDS = {'appointment_date', 'appointment_time', 'duration_minutes', 'status'}
+
+
+class SlotUnavailable(Exception):
+    """Raised when the requested time overlaps an existing booking"""
+
+
+def find_conflicts(appointment):
+    """Reservations held by other appointments that overlap `appointment`"""
+    units = reservation_units(appointment.appointment_time, appointment.duration_minutes)
+    return SlotReservation.objects.filter(
+        date=appointment.appointment_date,
+        unit__gte=units.start,
+        unit__lt=units.stop,
+    ).exclude(appointment_id=appointment.pk)
+
+
+def sync_reservations(appointment):
+    """
+    Make the appointment's reservations match its date, time, duration and
+    status. Raises SlotUnavailable if an active appointment would overlap
+    another one.
+    """
+    try:
+        with transaction.atomic():
+            held = SlotReservation.objects.filter(appointment=appointment)
+            dates = set(held.values_list('date', flat=True))
+            held.delete()
+            if appointment.status in ACTIVE_STATUSES:
+                SlotReservation.objects.bulk_create([
+                    SlotReservation(appointment=appointment, date=appointment.appointment_date, unit=unit)
+                    for unit in reservation_units(appointment.appointment_time, appointment.duration_minutes)
+                ])
+                dates.add(appointment.appointment_date)
+            refresh_occupancy(dates)
+    except IntegrityError as e:
+        raise SlotUnavailable(str(e)) from e
+
+
+def book_appointment(serializer):
+    """
+    Save a validated AppointmentSerializer, new or updating an appointment,
+    and reserve its time units in one transaction. Returns the appointment
+    or raises SlotUnavailable, in which case nothing is written.
+    """
+    try:
+        with transaction.atomic():
+            # post_save reserves the time units inside this transaction
+            return serializer.save()
+    except IntegrityError as e:
+        raise SlotUnavailable(str(e)) from e
@@ -0,0 +1,268 @@
+"""
+Pooled HTTP client for the Brevo transactional email API.
+
+A single BrevoClient per process keeps a requests.Session with a bounded
+connection pool, so consecutive messages reuse keep-alive connections to
+api.brevo.com instead of paying a new TCP+TLS handshake each time. Every
+call has connect and read timeouts, 429/5xx responses and connection
+failures are retried honoring Retry-After, and latency and error counters
+are kept per client. A read timeout is never retried: Brevo may already have
+accepted the message, and a second POST would send it twice.
+"""
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Brevo accepts at most 2000 recipients per request; every message version
+# sent here has exactly one recipient
+MAX_MESSAGE_VERSIONS = 2000
+
+# Upper bound on the JSON body of a single batch request
+MAX_BATCH_BYTES = 4 * 1024 * 1024
+
+
+class BrevoStats:
+    """Thread-safe call, retry, error and latency counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.retries = 0
+            self.errors = 0
+            self.status_counts = {}
+            self.total_latency = 0.0
+            self.max_latency = 0.0
+
+    def record(self, latency, status_code=None, retried=False):
+        """Record one HTTP attempt; `status_code` is None when no response was received"""
+        with self._lock:
+            self.calls += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            if retried:
+                self.retries += 1
+            if status_code is None or status_code >= 400:
+                self.errors += 1
+            key = status_code if status_code is not None else 'exception'
+            self.status_counts[key] = self.status_counts.get(key, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'retries': self.retries,
+                'errors': self.errors,
+                'status_counts': dict(self.status_counts),
+                'avg_latency': self.total_latency / self.calls if self.calls else 0.0,
+                'max_latency': self.max_latency,
+            }
+
+
+def parse_retry_after(value):
+    """Return the delay in seconds requested by a Retry-After header, or None"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class BrevoClient:
+    """Reusable Brevo API client backed by a pooled keep-alive session"""
+
+    def __init__(self, api_key, url, pool_size=10, connect_timeout=3.05, read_timeout=15,
+                 max_retries=3, backoff_seconds=0.5, max_retry_after=30):
+        self.api_key = api_key
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_retry_after = max_retry_after
+        self.stats = BrevoStats()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            "accept": "application/json",
+            "api-key": api_key or '',
+            "content-type": "application/json",
+        })
+
+    def close(self):
+        self.session.close()
+
+    def retry_delay(self, attempt, response=None):
+        """Delay before the next attempt, preferring the server's Retry-After"""
+        if response is not None:
+            delay = parse_retry_after(response.headers.get('Retry-After'))
+            if delay is not None:
+                return min(delay, self.max_retry_after)
+        return min(self.backoff_seconds * 2 ** attempt, self.max_retry_after)
+
+    def post(self, payload):
+        """
+        POST a payload to the Brevo endpoint, retrying 429/5xx responses and
+        connection errors. Returns (status_code, response_text).
+
+        Other exceptions (read timeouts included) are raised after a single
+        attempt, since the request may have been delivered.
+        """
+        attempt = 0
+        while True:
+            can_retry = attempt < self.max_retries
+            started = time.perf_counter()
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                # ConnectTimeout is a ConnectionError; ReadTimeout is not
+                retry = can_retry and isinstance(e, requests.ConnectionError)
+                self.stats.record(time.perf_counter() - started, retried=retry)
+                if not retry:
+                    raise
+                time.sleep(self.retry_delay(attempt))
+                attempt += 1
+                continue
+
+            retry = can_retry and response.status_code in RETRY_STATUSES
+            self.stats.record(time.perf_counter() - started, response.status_code, retried=retry)
+            if not retry:
+                return response.status_code, response.text
+
+            time.sleep(self.retry_delay(attempt, response))
+            attempt += 1
+
+    def build_payload(self, to_email, subject, html_content):
+        return {
+            "sender": {"email": settings.DEFAULT_FROM_EMAIL_ADDRESS, "name": settings.DEFAULT_FROM_EMAIL_NAME},
+            "to": [{"email": to_email}],
+            "subject": subject,
+            "htmlContent": html_content,
+        }
+
+    def send_email(self, to_email, subject, html_content):
+        return self.post(self.build_payload(to_email, subject, html_content))
+
+    def build_batch_payload(self, messages):
+        """
+        Build one request carrying every message as a Brevo messageVersion.
+        The first message also fills the required top-level subject and
+        htmlContent.
+        """
+        first = messages[0]
+        return {
+            "sender": {"email": settings.DEFAULT_FROM_EMAIL_ADDRESS, "name": settings.DEFAULT_FROM_EMAIL_NAME},
+            "subject": first['subject'],
+            "htmlContent": first['html_content'],
+            "messageVersions": [
+                {
+                    "to": [{"email": message['to_email']}],
+                    "subject": message['subject'],
+                    "htmlContent": message['html_content'],
+                }
+                for message in messages
+            ],
+        }
+
+    def split_batches(self, messages, max_versions=MAX_MESSAGE_VERSIONS, max_bytes=MAX_BATCH_BYTES):
+        """Split messages into chunks that respect the version count and payload size limits"""
+        chunk, chunk_bytes = [], 0
+        for message in messages:
+            size = len(json.dumps(message['html_content'])) + len(json.dumps(message['subject'])) + 128
+            if chunk and (len(chunk) >= max_versions or chunk_bytes + size > max_bytes):
+                yield chunk
+                chunk, chunk_bytes = [], 0
+            chunk.append(message)
+            chunk_bytes += size
+        if chunk:
+            yield chunk
+
+    def send_batch(self, messages, max_versions=MAX_MESSAGE_VERSIONS, max_bytes=MAX_BATCH_BYTES):
+        """
+        Send many personalised messages with as few requests as possible.
+
+        `messages` is a list of dicts with to_email, subject and html_content.
+        Oversized batches are split automatically. Returns one result dict per
+        message, in order, with to_email, status_code, message_id and detail.
+        """
+        results = []
+        for chunk in self.split_batches(messages, max_versions, max_bytes):
+            try:
+                status_code, detail = self.post(self.build_batch_payload(chunk))
+            except requests.RequestException as e:
+                status_code, detail = 0, f"{type(e).__name__}: {e}"
+
+            message_ids = []
+            if 200 <= status_code < 300:
+                try:
+                    message_ids = json.loads(detail).get('messageIds', [])
+                except (ValueError, AttributeError):
+                    pass
+
+            for index, message in enumerate(chunk):
+                results.append({
+                    'to_email': message['to_email'],
+                    'status_code': status_code,
+                    'message_id': message_ids[index] if index < len(message_ids) else None,
+                    'detail': detail,
+                })
+        return results
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_brevo_client():
+    """Return the process-wide BrevoClient configured from settings"""
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = BrevoClient(
+                    api_key=settings.BREVO_API_KEY,
+                    url=settings.BREVO_API_URL,
+                    pool_size=settings.BREVO_POOL_SIZE,
+                    connect_timeout=settings.BREVO_CONNECT_TIMEOUT,
+                    read_timeout=settings.BREVO_READ_TIMEOUT,
+                    max_retries=settings.BREVO_MAX_RETRIES,
+                )
+    return _client
+
+
+@receiver(setting_changed)
+def reset_brevo_client(setting, **kwargs):
+    """Rebuild the client when Brevo settings change (e.g. in tests)"""
+    global _client
+
+    if setting.startswith('BREVO_') or setting.startswith('DEFAULT_FROM_EMAIL'):
+        with _client_lock:
+            if _client is not None:
+                _client.close()
+            _client = None
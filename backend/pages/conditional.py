@@ -0,0 +1,88 @@
+"""
+Conditional GET support for the public content endpoints.
+
+Collections are fingerprinted with a single aggregate query (latest
+modification timestamp plus row count) before anything is serialized. A
+request whose If-None-Match or If-Modified-Since still matches gets a 304
+without touching the serializer; other responses carry ETag and
+Last-Modified so the next revalidation can be conditional.
+
+The same validators go on the response: read before the body, they can
+only be older than it, so a write landing in between costs the client a
+full response on its next revalidation rather than a 304 for stale
+content. Responses replayed from the response cache answer with the
+validators stored alongside them, which were read the same way.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date, parse_http_date_safe
+
+
+CONDITIONAL_HEADERS = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    Add ETag / Last-Modified validators to `list` and `retrieve`.
+
+    Viewsets set `last_modified_field` to the model's auto_now timestamp.
+    The ETag also covers the full path and renderer format, so each page,
+    search and format validates separately.
+    """
+    last_modified_field = 'updated_at'
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(request, self.get_collection_validators, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(request, self.get_object_validators, super().retrieve, *args, **kwargs)
+
+    def get_collection_validators(self):
+        """Return (etag, last_modified) for the filtered collection"""
+        fingerprint = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+            last_modified=Max(self.last_modified_field), count=Count('pk'),
+        )
+        last_modified = fingerprint['last_modified']
+        return self._validators(last_modified, fingerprint['count']), last_modified
+
+    def get_object_validators(self):
+        """Return (etag, last_modified) for the requested object, or (None, None) if it does not exist"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        last_modified = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).values_list(self.last_modified_field, flat=True).first()
+        if last_modified is None:
+            return None, None
+        return self._validators(last_modified, 1), last_modified
+
+    def _validators(self, last_modified, count):
+        stamp = last_modified.isoformat() if last_modified else ''
+        return make_etag(self.request.get_full_path(), self.request.accepted_renderer.format, stamp, count)
+
+    def _conditional(self, request, get_validators, handler, *args, **kwargs):
+        cached = self.cached_response(request) if hasattr(self, 'cached_response') else None
+        if cached is not None:
+            etag, last_modified = cached.get('ETag'), parse_http_date_safe(cached.get('Last-Modified', ''))
+        else:
+            etag, last_modified = get_validators()
+            last_modified = last_modified and int(last_modified.timestamp())
+
+        if etag is not None and any(header in request.META for header in CONDITIONAL_HEADERS):
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return not_modified
+        if cached is not None:
+            return cached
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and etag is not None:
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
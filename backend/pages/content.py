@@ -0,0 +1,225 @@
+"""
+Blog content pipeline.
+
+Runs when a Blog is saved and stores everything the API and frontend would
+otherwise re-derive from the raw CKEditor HTML on every request:
+
+- sanitized HTML (allow-listed tags, attributes and style properties, safe
+  URLs only, iframes only from CONTENT_IFRAME_HOSTS, and an id on every h2-h4
+  so the table of contents can link to it),
+- plain text, word count and reading time,
+- the heading table of contents.
+
+Bump PIPELINE_VERSION whenever the output changes; `manage.py
+process_blog_content` reprocesses rows saved by an older version.
+"""
+import math
+import re
+from collections import namedtuple
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.utils.text import slugify
+
+
+PIPELINE_VERSION = 3
+
+WORDS_PER_MINUTE = 200
+
+# Derived Blog columns written by apply_to_blog
+DERIVED_FIELDS = ['content_html', 'content_text', 'word_count', 'reading_time_minutes', 'toc', 'content_version']
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'div', 'em', 'figcaption', 'figure', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'hr', 'i', 'iframe', 'img', 'li', 'ol', 'p', 'pre', 's', 'span', 'strong', 'sub',
+    'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+}
+VOID_TAGS = {'br', 'hr', 'img'}
+# Dropped together with everything inside them
+DROPPED_TAGS = {'script', 'style', 'noscript', 'object', 'embed', 'template'}
+
+ALLOWED_ATTRIBUTES = {
+    '*': {'class', 'id', 'style', 'title'},
+    'a': {'href', 'target', 'rel', 'download'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'iframe': {'src', 'width', 'height', 'frameborder', 'allowfullscreen'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'ol': {'start', 'type'},
+}
+# Positioning (position, top, z-index, transform, ...) is left out so a post can't overlay the page
+ALLOWED_STYLES = {
+    'background-color', 'border', 'border-collapse', 'border-color', 'border-style', 'border-width', 'color',
+    'float', 'font-family', 'font-size', 'font-style', 'font-weight', 'height', 'list-style-type', 'margin',
+    'margin-bottom', 'margin-left', 'margin-right', 'margin-top', 'max-width', 'padding', 'padding-bottom',
+    'padding-left', 'padding-right', 'padding-top', 'text-align', 'text-decoration', 'vertical-align', 'width',
+}
+URL_ATTRIBUTES = {'href', 'src'}
+SAFE_URL = re.compile(r'^(?:https?:|mailto:|tel:|/|#|[^:/?#]*(?:[/?#]|$))', re.I)
+
+TOC_LEVELS = {'h2': 2, 'h3': 3, 'h4': 4}
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+BLOCK_TAGS = {'p', 'div', 'li', 'blockquote', 'pre', 'figcaption', 'td', 'th', 'br', 'hr', 'tr'} | set(TOC_LEVELS)
+
+ProcessedContent = namedtuple('ProcessedContent', ['html', 'text', 'word_count', 'reading_time_minutes', 'toc'])
+
+
+def _clean_style(value):
+    """Keep only the allow-listed declarations of a style attribute"""
+    declarations = []
+    for declaration in value.split(';'):
+        name, _, prop = declaration.partition(':')
+        name, prop = name.strip().lower(), prop.strip()
+        if name in ALLOWED_STYLES and prop and not re.search(r'expression|url\s*\(|javascript:|\\', prop, re.I):
+            declarations.append(f'{name}: {prop}')
+    return '; '.join(declarations)
+
+
+def _embeddable(src):
+    """Whether an iframe src is an https URL on one of CONTENT_IFRAME_HOSTS"""
+    url = urlsplit(src.strip())
+    return url.scheme == 'https' and (url.hostname or '') in settings.CONTENT_IFRAME_HOSTS
+
+
+class _ContentParser(HTMLParser):
+    """Single pass that sanitizes the markup and collects text and headings"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html = []
+        self.text = []
+        self.toc = []
+        self.open_tags = []
+        self.dropping = 0
+        self.heading = None
+        self.used_ids = set()
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+
+        allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(tag, set())
+        clean = []
+        for name, value in attrs:
+            if name not in allowed or name.startswith('on'):
+                continue
+            value = value or ''
+            if name in URL_ATTRIBUTES and not SAFE_URL.match(value.strip()):
+                continue
+            if name == 'style':
+                # CKEditor's embed wrapper positions the iframe absolutely; it renders at its own size instead
+                value = '' if tag == 'iframe' else _clean_style(value)
+                if not value:
+                    continue
+            clean.append((name, value))
+
+        if tag == 'iframe' and not _embeddable(dict(clean).get('src', '')):
+            return
+
+        if tag in HEADING_TAGS and self.heading is not None:
+            # Headings don't nest: like a browser, close the pending one before starting another
+            self.handle_endtag(self.heading['tag'])
+
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+
+        if tag in TOC_LEVELS:
+            # The id is filled in at the end tag, once the heading text is known
+            self.heading = {
+                'tag': tag, 'level': TOC_LEVELS[tag], 'text': [], 'attrs': clean, 'index': len(self.html),
+            }
+            self.html.append('')
+        else:
+            self.html.append(self._render_start(tag, clean))
+
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        if self.dropping or tag not in self.open_tags:
+            return
+
+        # Close anything left open inside this element so the output stays well formed
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            if open_tag in TOC_LEVELS and self.heading is not None:
+                self._finish_heading(open_tag)
+            self.html.append(f'</{open_tag}>')
+            if open_tag == tag:
+                break
+
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        self.html.append(escape(data, quote=False))
+        self.text.append(data)
+        if self.heading is not None:
+            self.heading['text'].append(data)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.handle_endtag(self.open_tags[-1])
+
+    def _finish_heading(self, tag):
+        heading, self.heading = self.heading, None
+        text = re.sub(r'\s+', ' ', ''.join(heading['text'])).strip()
+        attrs = [(name, value) for name, value in heading['attrs'] if name != 'id']
+        explicit_id = dict(heading['attrs']).get('id')
+
+        anchor = self._unique_id(explicit_id or slugify(text) or 'section')
+        self.html[heading['index']] = self._render_start(tag, [('id', anchor)] + attrs)
+        if text:
+            self.toc.append({'level': heading['level'], 'text': text, 'id': anchor})
+
+    def _unique_id(self, base):
+        anchor, counter = base, 1
+        while anchor in self.used_ids:
+            counter += 1
+            anchor = f'{base}-{counter}'
+        self.used_ids.add(anchor)
+        return anchor
+
+    @staticmethod
+    def _render_start(tag, attrs):
+        rendered = ''.join(f' {name}="{escape(value)}"' for name, value in attrs)
+        return f'<{tag}{rendered}>'
+
+
+def process_content(html_content):
+    """Run the pipeline over raw editor HTML and return a ProcessedContent"""
+    parser = _ContentParser()
+    parser.feed(html_content or '')
+    parser.close()
+
+    text = re.sub(r'\s+', ' ', ''.join(parser.text)).strip()
+    word_count = len(text.split())
+    reading_time = math.ceil(word_count / WORDS_PER_MINUTE) if word_count else 0
+    return ProcessedContent(''.join(parser.html), text, word_count, reading_time, parser.toc)
+
+
+def apply_to_blog(blog):
+    """Fill the blog's derived content columns from its current content"""
+    processed = process_content(blog.content)
+    blog.content_html = processed.html
+    blog.content_text = processed.text
+    blog.word_count = processed.word_count
+    blog.reading_time_minutes = processed.reading_time_minutes
+    blog.toc = processed.toc
+    blog.content_version = PIPELINE_VERSION
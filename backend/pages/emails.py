@@ -0,0 +1,73 @@
+"""
+Precompiled email templates.
+
+Email bodies live in pages/templates/pages/emails/. They are compiled once
+per process by a dedicated template engine with a cached loader (whatever
+the DEBUG setting), and each template's stylesheet is assembled from its
+CSS files, minified and embedded in the base layout once. A send only
+renders the per-message context, with Django's auto-escaping applied to
+every value.
+"""
+import re
+import threading
+from pathlib import Path
+
+from django.template import Context, Engine
+from django.utils.safestring import mark_safe
+
+
+TEMPLATE_ROOT = Path(__file__).resolve().parent / 'templates'
+EMAIL_DIR = TEMPLATE_ROOT / 'pages' / 'emails'
+
+# Stylesheets for each email, applied in order so later files override earlier ones
+EMAIL_STYLES = {
+    'contact_admin': ['base', 'contact', 'contact_admin'],
+    'contact_confirmation': ['base', 'contact', 'contact_confirmation'],
+    'appointment_confirmation': ['base', 'appointment', 'appointment_confirmation'],
+    'appointment_admin': ['base', 'appointment'],
+}
+
+_engine = Engine(
+    dirs=[str(TEMPLATE_ROOT)],
+    loaders=[('django.template.loaders.cached.Loader', ['django.template.loaders.filesystem.Loader'])],
+    autoescape=True,
+)
+_templates = {}
+_lock = threading.Lock()
+
+
+def minify_css(css):
+    """Strip comments and collapse whitespace around CSS punctuation"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};:,])\s*', r'\1', css).strip()
+
+
+class EmailTemplate:
+    """A compiled email template together with its minified stylesheet"""
+
+    def __init__(self, name):
+        self.name = name
+        self.template = _engine.get_template(f'pages/emails/{name}.html')
+        self.css = mark_safe(minify_css('\n'.join(
+            (EMAIL_DIR / f'{stylesheet}.css').read_text() for stylesheet in EMAIL_STYLES[name]
+        )))
+
+    def render(self, context):
+        return self.template.render(Context({**context, 'css': self.css}, autoescape=True))
+
+
+def get_email_template(name):
+    """Return the process-wide compiled EmailTemplate for `name`"""
+    template = _templates.get(name)
+    if template is None:
+        with _lock:
+            template = _templates.get(name)
+            if template is None:
+                template = _templates[name] = EmailTemplate(name)
+    return template
+
+
+def render_email(name, context):
+    """Render the email template `name` with the given per-message context"""
+    return get_email_template(name).render(context)
@@ -0,0 +1,318 @@
+"""
+Streaming CSV and XLSX exports of appointments and contact messages.
+
+Rows are read with values_list().iterator(), so no model instances are
+built and only one chunk is held at a time, and written straight into a
+StreamingHttpResponse. XLSX files are produced without a spreadsheet
+library: the worksheet is deflated into a zip archive as rows arrive
+(zipfile streams to non-seekable outputs), with strings stored inline so
+no shared-strings table has to be kept in memory.
+
+Used by the admin export actions and, through StaffExportMixin, the
+staff-only /api/appointments/export/ and /api/contact/export/ endpoints.
+"""
+import csv
+import re
+import zipfile
+from datetime import date, datetime, time
+from xml.sax.saxutils import escape
+
+from django.core.exceptions import ValidationError
+from django.db.models import DateTimeField
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# (header, values_list lookup)
+APPOINTMENT_COLUMNS = [
+    ('ID', 'id'),
+    ('Client', 'client_name'),
+    ('Email', 'client_email'),
+    ('Phone', 'client_phone'),
+    ('Practice area', 'practice_area__name'),
+    ('Date', 'appointment_date'),
+    ('Time', 'appointment_time'),
+    ('Duration (min)', 'duration_minutes'),
+    ('Status', 'status'),
+    ('Confirmation sent', 'confirmation_sent'),
+    ('Notes', 'notes'),
+    ('Booked at', 'created_at'),
+]
+
+CONTACT_MESSAGE_COLUMNS = [
+    ('ID', 'id'),
+    ('Name', 'name'),
+    ('Email', 'email'),
+    ('Phone', 'phone'),
+    ('Message', 'message'),
+    ('Read', 'is_read'),
+    ('Received at', 'created_at'),
+]
+
+CHUNK_SIZE = 2000
+
+# Bytes collected before a piece of the file is handed to the response
+FLUSH_BYTES = 64 * 1024
+
+# Cells starting with these are run as formulas by spreadsheet apps; contact messages come from the public
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Control characters XML 1.0 does not allow
+INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def rows(queryset, columns, chunk_size=CHUNK_SIZE):
+    """Yield one tuple per row of `queryset`, with choice values shown by label and datetimes in local time"""
+    lookups = [lookup for _, lookup in columns]
+    labels = []
+    for lookup in lookups:
+        field = None if '__' in lookup else queryset.model._meta.get_field(lookup)
+        labels.append(dict(field.flatchoices) if field is not None and field.choices else None)
+
+    for row in queryset.values_list(*lookups).iterator(chunk_size=chunk_size):
+        yield tuple(
+            _localize(choices.get(value, value) if choices else value) for value, choices in zip(row, labels)
+        )
+
+
+def _localize(value):
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.make_naive(value)
+    return value
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'Yes' if value else 'No'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    if isinstance(value, time):
+        return value.isoformat(timespec='minutes')
+    return str(value)
+
+
+class _Echo:
+    """csv.writer target that hands back the formatted line"""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(header, records):
+    """Yield the CSV file in pieces of about FLUSH_BYTES"""
+    writer = csv.writer(_Echo())
+    # The BOM makes Excel read the file as UTF-8
+    buffer = ['\ufeff', writer.writerow(header)]
+    size = 0
+    for record in records:
+        line = writer.writerow([
+            "'" + text if text.startswith(FORMULA_PREFIXES) else text
+            for text in map(_text, record)
+        ])
+        buffer.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    yield ''.join(buffer)
+
+
+class _Pipe:
+    """Write-only, non-seekable sink that zipfile streams the archive into"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks, self.size = [], 0
+        return data
+
+
+XLSX_NAMESPACE = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Cell styles: 0 general, 1 date, 2 date and time, 3 time, 4 bold header
+    'xl/styles.xml': (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><styleSheet xmlns="{XLSX_NAMESPACE}">'
+        '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm"/></numFmts>'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="5">'
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="20" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+        '</cellXfs><cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+
+def _workbook(sheet_name):
+    return (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><workbook xmlns="{XLSX_NAMESPACE}" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    )
+
+
+def _cell(value, style=0):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    # Dates and times are day serials, formatted by the cell style
+    if isinstance(value, datetime):
+        delta = value.replace(tzinfo=None) - EXCEL_EPOCH
+        return f'<c s="2"><v>{delta.days + delta.seconds / 86400:.10f}</v></c>'
+    if isinstance(value, date):
+        return f'<c s="1"><v>{(value - EXCEL_EPOCH.date()).days}</v></c>'
+    if isinstance(value, time):
+        seconds = value.hour * 3600 + value.minute * 60 + value.second
+        return f'<c s="3"><v>{seconds / 86400:.10f}</v></c>'
+    text = escape(INVALID_XML.sub('', str(value)))
+    style = f' s="{style}"' if style else ''
+    return f'<c t="inlineStr"{style}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(values, style=0):
+    return ('<row>' + ''.join(_cell(value, style) for value in values) + '</row>').encode('utf-8')
+
+
+def xlsx_chunks(header, records, sheet_name='Export'):
+    """Yield an XLSX workbook with one sheet in pieces of about FLUSH_BYTES"""
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', _workbook(sheet_name))
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                        f'<worksheet xmlns="{XLSX_NAMESPACE}"><sheetData>'.encode('utf-8'))
+            sheet.write(_row(header, style=4))
+            for record in records:
+                sheet.write(_row(record))
+                if pipe.size >= FLUSH_BYTES:
+                    yield pipe.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield pipe.drain()
+
+
+def export_response(queryset, columns, fmt, filename):
+    """Stream `queryset` as a CSV or XLSX download named `filename`.<fmt>"""
+    header = [title for title, _ in columns]
+    records = rows(queryset, columns)
+    if fmt == 'xlsx':
+        chunks = xlsx_chunks(header, records, sheet_name=filename)
+    else:
+        chunks = csv_chunks(header, records)
+    response = StreamingHttpResponse(chunks, content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+
+class StaffExportMixin:
+    """
+    Viewset mixin adding a staff-only GET <list>/export/ endpoint.
+
+    Query params: filetype (csv or xlsx, default csv), date_from and
+    date_to (YYYY-MM-DD, inclusive, on `export_date_field`), plus one per
+    entry of `export_filters` (query param -> lookup).
+    """
+    export_columns = None
+    export_filename = None
+    export_date_field = None
+    export_filters = {}
+    export_ordering = ()
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        params = request.query_params
+        fmt = params.get('filetype', 'csv')
+        if fmt not in FORMATS:
+            return Response(
+                {"error": f"filetype must be one of: {', '.join(FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.get_queryset().order_by(*self.export_ordering)
+        field = queryset.model._meta.get_field(self.export_date_field)
+        # DateTimeFields are filtered on their local date
+        date_lookup = f'{field.name}__date' if isinstance(field, DateTimeField) else field.name
+        filters = {}
+        try:
+            for param, operator in (('date_from', 'gte'), ('date_to', 'lte')):
+                if params.get(param):
+                    filters[f'{date_lookup}__{operator}'] = datetime.strptime(params[param], '%Y-%m-%d').date()
+            for param, lookup in self.export_filters.items():
+                value = params.get(param)
+                if value:
+                    filters[lookup] = {'true': True, 'false': False}.get(value.lower(), value)
+            # Bad values (is_read=maybe) raise here rather than halfway through the download
+            queryset = queryset.filter(**filters)
+        except (ValueError, ValidationError) as e:
+            return Response({"error": f"Invalid filter: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        stamp = timezone.localdate().isoformat()
+        return export_response(queryset, self.export_columns, fmt, f'{self.export_filename}-{stamp}')
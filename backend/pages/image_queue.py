@@ -0,0 +1,260 @@
+"""
+Off-request image processing queue.
+
+Saving a model with a fresh upload writes the file only to the local
+"image_staging" storage and keeps a pointer to it: the image field holds the
+staged name, its <field>_state is 'pending' and an ImageJob row is queued.
+The process_images management command claims due jobs and, with a bounded
+thread pool, strips EXIF from the original, uploads it to the field's own
+storage, renders the derivatives and marks the field 'ready'. Until then
+serializers serve the staged original (pages.images.file_url).
+
+Files assigned by name, which are already in storage, are queued without
+staging so only their derivatives are rendered off-request.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import images
+from .models import ImageJob
+
+
+def stage_uploads(instance):
+    """
+    pre_save hook: send fresh uploads of `instance` to the staging storage
+    instead of the field's storage, so the request never waits on S3.
+    """
+    staged = []
+    for field_name in images.image_fields(type(instance)):
+        file = getattr(instance, field_name)
+        if not file or file._committed:
+            continue
+        # Cheap to read from the header, and lets clients reserve space before the worker runs
+        file.file.seek(0)
+        width, height = images.header_size(file.file)
+
+        field = instance._meta.get_field(field_name)
+        name = field.generate_filename(instance, file.name)
+        file.name = images.staging_storage().save(name, file.file, max_length=field.max_length)
+        # Committed files are left alone by FileField.pre_save
+        file._committed = True
+        setattr(instance, images.state_field(field_name), 'pending')
+        setattr(instance, f'{field_name}_width', width)
+        setattr(instance, f'{field_name}_height', height)
+        setattr(instance, f'{field_name}_placeholder', '')
+        staged.append(field_name)
+    instance._staged_image_fields = staged
+
+
+def enqueue_changed(instance):
+    """post_save hook: queue a job for every image field of `instance` whose derivatives are out of date"""
+    staged = getattr(instance, '_staged_image_fields', ())
+    instance._staged_image_fields = ()
+    label = instance._meta.label
+
+    for field_name in images.image_fields(type(instance)):
+        if field_name not in staged and not images.needs_processing(instance, field_name):
+            continue
+        source_name = getattr(instance, field_name).name or ''
+        job = {'model_label': label, 'object_id': str(instance.pk), 'field_name': field_name, 'source_name': source_name}
+        # Unrelated saves of a row whose image is still queued must not queue it again
+        if field_name not in staged and ImageJob.objects.filter(status__in=['pending', 'processing'], **job).exists():
+            continue
+        ImageJob.objects.create(staged=field_name in staged, **job)
+
+
+def enqueue_stored(instances, field_name):
+    """
+    Queue jobs for bulk-written `instances` (no save signals) whose image in
+    `field_name` is already in storage but needs processing. One query skips
+    files that are queued already.
+    """
+    jobs = {
+        (str(instance.pk), getattr(instance, field_name).name): instance
+        for instance in instances
+        if getattr(instance, field_name) and images.needs_processing(instance, field_name)
+    }
+    if not jobs:
+        return []
+    label = next(iter(jobs.values()))._meta.label
+    queued = set(ImageJob.objects.filter(
+        status__in=['pending', 'processing'], model_label=label, field_name=field_name,
+        object_id__in=[object_id for object_id, _ in jobs],
+    ).values_list('object_id', 'source_name'))
+    return ImageJob.objects.bulk_create([
+        ImageJob(model_label=label, object_id=object_id, field_name=field_name, source_name=source_name)
+        for object_id, source_name in jobs if (object_id, source_name) not in queued
+    ])
+
+
+def queue_depth():
+    """Return the number of jobs per status, plus how many are due now"""
+    counts = dict(ImageJob.objects.values_list('status').annotate(count=Count('id')).order_by())
+    depth = {status: counts.get(status, 0) for status, _ in ImageJob.STATUS_CHOICES}
+    depth['due'] = _due_jobs(timezone.now()).count()
+    return depth
+
+
+def backoff_delay(attempts):
+    return timedelta(seconds=settings.IMAGE_QUEUE_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0))
+
+
+def _due_jobs(now):
+    # Jobs left in 'processing' past their lease belong to a worker that died
+    return ImageJob.objects.filter(Q(status='pending') | Q(status='processing'), next_attempt_at__lte=now)
+
+
+def claim_due(limit):
+    """Claim up to `limit` due jobs for this worker with conditional UPDATEs, leasing each one"""
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=settings.IMAGE_QUEUE_LEASE_SECONDS)
+    candidates = _due_jobs(now).order_by('next_attempt_at').values_list('pk', 'status', 'next_attempt_at')[:limit]
+
+    claimed = []
+    for pk, current_status, next_attempt_at in candidates:
+        updated = ImageJob.objects.filter(
+            pk=pk, status=current_status, next_attempt_at=next_attempt_at,
+        ).update(status='processing', next_attempt_at=lease_until)
+        if updated:
+            claimed.append(pk)
+    return list(ImageJob.objects.filter(pk__in=claimed).order_by('next_attempt_at', 'created_at'))
+
+
+def finish(job, status, detail=''):
+    job.attempts += 1
+    job.status = status
+    job.last_error = detail
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'attempts', 'last_error', 'finished_at'])
+
+
+def record_failure(job, detail):
+    """Schedule a retry, or give up and mark the image failed once the attempts run out"""
+    if job.attempts + 1 < settings.IMAGE_QUEUE_MAX_ATTEMPTS:
+        job.attempts += 1
+        job.status = 'pending'
+        job.next_attempt_at = timezone.now() + backoff_delay(job.attempts)
+        job.last_error = detail
+        job.save(update_fields=['status', 'attempts', 'next_attempt_at', 'last_error'])
+        return
+
+    finish(job, 'failed', detail)
+    model = apps.get_model(job.model_label)
+    model._default_manager.filter(pk=job.object_id, **{job.field_name: job.source_name}).update(
+        **{images.state_field(job.field_name): 'failed'}
+    )
+
+
+def _job_file(instance, job):
+    """The image file `job` was queued for, or None once the row is deleted or has a newer upload"""
+    file = getattr(instance, job.field_name, None)
+    if file is None or (file.name or '') != job.source_name:
+        return None
+    return file
+
+
+def _discard(job, instance):
+    """Delete what a superseded job wrote to storage: its uploaded original and derivatives"""
+    file = getattr(instance, job.field_name)
+    images.delete_derivatives(file.storage, getattr(instance, images.derivatives_field(job.field_name)))
+    if job.staged and file.name:
+        file.storage.delete(file.name)
+
+
+def process_job(job):
+    """
+    Upload, clean and render the image a claimed job points at, and record
+    the result.
+
+    The job is already leased by claim_due, so the reads, Pillow work and
+    storage uploads run outside any transaction: a row lock held across
+    them would keep SQLite's database-wide write lock (IMMEDIATE
+    transactions) for the whole upload. Only the final write locks the row,
+    and it applies the result only if the row still points at the job's
+    file.
+    """
+    model = apps.get_model(job.model_label)
+    superseded = False
+    try:
+        instance = model._default_manager.filter(pk=job.object_id).first()
+        file = _job_file(instance, job)
+        if file is None:
+            # Deleted, or replaced by a newer upload with its own job
+            if job.staged:
+                images.staging_storage().delete(job.source_name)
+            finish(job, 'done', "Superseded")
+            return job
+
+        data = None
+        if job.staged:
+            with images.staging_storage().open(job.source_name, 'rb') as staged:
+                data = staged.read()
+            try:
+                data = images.clean_original(data)
+            except Exception:
+                # Not decodable; stored as uploaded and flagged by the derivative step below
+                pass
+            field = model._meta.get_field(job.field_name)
+            file.name = file.storage.save(job.source_name, ContentFile(data), max_length=field.max_length)
+
+        ok = images.refresh_derivatives(instance, job.field_name, data)
+        error = getattr(instance, images.derivatives_field(job.field_name)).get('error', '')
+
+        with transaction.atomic():
+            current = model._default_manager.select_for_update().filter(pk=job.object_id).first()
+            if _job_file(current, job) is None:
+                superseded = True
+            else:
+                written = [job.field_name, *images.metadata_fields(job.field_name)]
+                for name in written:
+                    setattr(current, name, getattr(instance, name))
+                setattr(current, images.state_field(job.field_name), 'ready' if ok else 'failed')
+                # A regular save, so the usual signals refresh timestamps and drop cached responses
+                update_fields = [*written, images.state_field(job.field_name)]
+                update_fields += [f.name for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)]
+                current.save(update_fields=update_fields)
+    except Exception as e:
+        record_failure(job, f"{type(e).__name__}: {e}")
+        return job
+
+    if job.staged:
+        images.staging_storage().delete(job.source_name)
+    if superseded:
+        _discard(job, instance)
+        finish(job, 'done', "Superseded")
+    else:
+        finish(job, 'done' if ok else 'failed', error)
+    return job
+
+
+def _process_in_thread(job):
+    try:
+        return process_job(job)
+    finally:
+        connection.close()
+
+
+def drain(workers=None, batch_size=20):
+    """
+    Process every job that is currently due using a pool of `workers`
+    threads. Returns the processed ImageJob instances.
+    """
+    workers = workers or settings.IMAGE_QUEUE_WORKERS
+    processed = []
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = claim_due(batch_size)
+            if not batch:
+                break
+            processed.extend(executor.map(_process_in_thread, batch))
+            close_old_connections()
+
+    return processed
@@ -0,0 +1,277 @@
+"""
+Responsive image derivatives.
+
+Every uploaded image is rendered at the configured widths (never upscaled)
+in each modern format plus a fallback (JPEG, or PNG when the image has
+transparency) and saved next to the original through the field's storage:
+
+    attorneys/jane.jpg -> attorneys/derivatives/jane-320w.webp, jane-320w.jpg, ...
+
+The storage names are recorded in a JSONField named after the image field
+(`photo` -> `photo_derivatives`) together with the source they were made
+from, so a changed upload is detected by comparing names and serializers
+can build srcsets without touching storage:
+
+    {"source": "attorneys/jane.jpg",
+     "formats": {"webp": {"320": "attorneys/derivatives/jane-320w.webp", ...}, "jpeg": {...}}}
+
+Uploads that cannot be rendered keep an empty "formats" and the reason in
+"error"; `manage.py generate_image_derivatives --force` retries them.
+
+The same pass stores the upright intrinsic size (`photo_width`,
+`photo_height`) and a tiny blurred WebP as a data URI (`photo_placeholder`)
+that the frontend paints while the real image loads.
+
+New uploads are rendered off-request by the image queue (pages.image_queue);
+this module only does the image work.
+"""
+import base64
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from PIL import ExifTags, Image, ImageOps
+
+
+# (model label, image field) pairs that get derivatives
+IMAGE_FIELDS = [
+    ('pages.Attorney', 'photo'),
+    ('pages.Blog', 'featured_image'),
+    ('pages.PracticeArea', 'featured_image'),
+    ('pages.PracticeAreaImage', 'image'),
+]
+
+SAVE_OPTIONS = {
+    'webp': {'quality': 80, 'method': 4},
+    'avif': {'quality': 60},
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+    'png': {'optimize': True},
+}
+EXTENSIONS = {'jpeg': 'jpg'}
+
+# Longest side of the placeholder preview; ~100-300 bytes once encoded
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+
+# EXIF orientations that turn the image a quarter turn, swapping width and height
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+STAGING_STORAGE = 'image_staging'
+
+# Formats whose originals are re-encoded to drop EXIF; anything else (animated GIFs) is stored as uploaded
+CLEANED_FORMATS = {'JPEG': {'quality': 'keep'}, 'PNG': {'optimize': True}, 'WEBP': {'quality': 90}}
+
+
+def derivatives_field(field_name):
+    return f'{field_name}_derivatives'
+
+
+def state_field(field_name):
+    return f'{field_name}_state'
+
+
+def metadata_fields(field_name):
+    """Columns refreshed together whenever the image is (re)processed"""
+    return [
+        derivatives_field(field_name), f'{field_name}_width', f'{field_name}_height', f'{field_name}_placeholder',
+    ]
+
+
+def staging_storage():
+    return storages[STAGING_STORAGE]
+
+
+def image_fields(model):
+    """Names of the image fields of `model` that get derivatives"""
+    return [field for label, field in IMAGE_FIELDS if label == model._meta.label]
+
+
+def needs_processing(instance, field_name):
+    """True when the derivatives on record were not made from the current file, or predate the placeholders"""
+    file = getattr(instance, field_name)
+    derivatives = getattr(instance, derivatives_field(field_name)) or {}
+    if derivatives.get('source') != (file.name or None):
+        return True
+    return bool(file) and 'error' not in derivatives and getattr(instance, f'{field_name}_width') is None
+
+
+def derivative_name(source_name, width, fmt):
+    directory, filename = posixpath.split(source_name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'derivatives', f'{stem}-{width}w.{EXTENSIONS.get(fmt, fmt)}')
+
+
+def target_widths(original_width):
+    """Configured widths that don't upscale; images narrower than all of them keep their own width"""
+    widths = [width for width in settings.IMAGE_DERIVATIVE_WIDTHS if width < original_width]
+    if len(widths) < len(settings.IMAGE_DERIVATIVE_WIDTHS):
+        widths.append(original_width)
+    return widths
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def header_size(file):
+    """Upright (width, height) of an image file from its header, without decoding the pixels"""
+    position = file.tell()
+    try:
+        image = Image.open(file)
+        width, height = image.size
+        if image.getexif().get(ExifTags.Base.Orientation) in ROTATED_ORIENTATIONS:
+            width, height = height, width
+        return width, height
+    except Exception:
+        # Not an image; the worker records why
+        return None, None
+    finally:
+        file.seek(position)
+
+
+def placeholder(image):
+    """A tiny WebP preview of an upright Pillow image as a data URI"""
+    preview = image.convert('RGBA' if has_alpha(image) else 'RGB')
+    preview.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = BytesIO()
+    preview.save(buffer, format='WEBP', quality=PLACEHOLDER_QUALITY)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def render_derivatives(image):
+    """Yield (width, format, bytes) for every derivative of an upright Pillow image"""
+    transparent = has_alpha(image)
+    image = image.convert('RGBA' if transparent else 'RGB')
+    formats = [*settings.IMAGE_DERIVATIVE_FORMATS, 'png' if transparent else 'jpeg']
+
+    for width in target_widths(image.width):
+        height = max(round(image.height * width / image.width), 1)
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            buffer = BytesIO()
+            # No exif= is passed, so derivatives carry no EXIF (location, camera) metadata
+            resized.save(buffer, format=fmt.upper(), **SAVE_OPTIONS.get(fmt, {}))
+            yield width, fmt, buffer.getvalue()
+
+
+def open_image(data):
+    image = Image.open(BytesIO(data))
+    image.load()
+    return image
+
+
+def clean_original(data):
+    """
+    Return the upload's bytes without EXIF metadata (GPS position, camera
+    serials), rotated upright when the orientation tag asked for it.
+    """
+    image = open_image(data)
+    options = CLEANED_FORMATS.get(image.format)
+    if options is None or not image.getexif():
+        return data
+
+    upright = ImageOps.exif_transpose(image)
+    if upright is not image and options.get('quality') == 'keep':
+        # 'keep' reuses the JPEG tables, which only works on untransformed images
+        options = {'quality': 90}
+    buffer = BytesIO()
+    # No exif= is passed, so the tags are dropped; the colour profile is kept
+    upright.save(buffer, format=image.format, icc_profile=image.info.get('icc_profile'), **options)
+    return buffer.getvalue()
+
+
+def store_derivatives(rendered, source_name, storage):
+    """Save (width, format, bytes) renders through `storage`; returns the derivatives map"""
+    formats = {}
+    for width, fmt, data in rendered:
+        name = storage.save(derivative_name(source_name, width, fmt), ContentFile(data))
+        formats.setdefault(fmt, {})[str(width)] = name
+    return {'source': source_name, 'formats': formats}
+
+
+def stored_names(derivatives):
+    return {name for names in (derivatives or {}).get('formats', {}).values() for name in names.values()}
+
+
+def delete_derivatives(storage, derivatives, keep=()):
+    # Storages that overwrite (S3 by default) may hand back the same names for the new set
+    for name in stored_names(derivatives) - set(keep):
+        storage.delete(name)
+
+
+def refresh_derivatives(instance, field_name, data=None):
+    """
+    Bring the derivatives of one image field in line with its current file,
+    on the instance only. Pass the file's bytes as `data` when they are at
+    hand. Returns False when the image could not be decoded; the srcset is
+    then left empty and clients fall back to the original. Storage errors
+    propagate so the caller can retry.
+    """
+    file = getattr(instance, field_name)
+    column = derivatives_field(field_name)
+    previous = getattr(instance, column) or {}
+
+    derivatives, size, preview = {}, (None, None), ''
+    if file:
+        if data is None:
+            with file.open('rb') as source:
+                data = source.read()
+        try:
+            image = ImageOps.exif_transpose(open_image(data))
+            rendered = list(render_derivatives(image))
+            size, preview = image.size, placeholder(image)
+        except Exception as error:
+            # Pillow raises all sorts of errors for truncated, hostile or non-image files
+            derivatives = {'source': file.name, 'formats': {}, 'error': f"{type(error).__name__}: {error}"}
+        else:
+            derivatives = store_derivatives(rendered, file.name, file.storage)
+
+    delete_derivatives(file.storage, previous, keep=stored_names(derivatives))
+    for name, value in zip(metadata_fields(field_name), (derivatives, *size, preview)):
+        setattr(instance, name, value)
+    return 'error' not in derivatives
+
+
+def process_image(instance, field_name):
+    """Refresh the derivatives of one image field and save them on the row"""
+    processed = refresh_derivatives(instance, field_name)
+    # update() leaves save signals (and the image queue) out of it
+    type(instance)._default_manager.filter(pk=instance.pk).update(
+        **{name: getattr(instance, name) for name in metadata_fields(field_name)}
+    )
+    return processed
+
+
+def image_models():
+    return [(apps.get_model(label), field_name) for label, field_name in IMAGE_FIELDS]
+
+
+def file_url(file, state='ready'):
+    """URL of the original; uploads still waiting for the worker are served from staging"""
+    if not file:
+        return None
+    if state == 'pending':
+        return staging_storage().url(file.name)
+    return file.url
+
+
+def srcset(file, derivatives, request=None):
+    """
+    Map each format to {width: absolute URL} for a serializer, or None when
+    the derivatives are missing or stale.
+    """
+    if not file or not derivatives.get('formats') or derivatives.get('source') != file.name:
+        return None
+
+    def url(name):
+        url = file.storage.url(name)
+        return request.build_absolute_uri(url) if request else url
+
+    return {
+        fmt: {width: url(name) for width, name in sorted(names.items(), key=lambda item: int(item[0]))}
+        for fmt, names in derivatives['formats'].items()
+    }
@@ -0,0 +1,27 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from pages import transfer
+
+
+class Command(BaseCommand):
+    help = "Stream practice areas, gallery images, attorneys and blogs as JSON Lines for import_content"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default='-',
+                            help="File to write, or - for stdout")
+        parser.add_argument('--models', nargs='+', choices=list(transfer.SPECS_BY_NAME), metavar='MODEL',
+                            help=f"Only export these models: {', '.join(transfer.SPECS_BY_NAME)}")
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help="Rows fetched from the database at a time")
+
+    def handle(self, *args, **options):
+        records = transfer.export_records(options['models'], chunk_size=options['chunk_size'])
+        if options['output'] == '-':
+            count = transfer.write_jsonl(records, self.stdout)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                count = transfer.write_jsonl(records, stream)
+        # Keep stdout clean for piping
+        sys.stderr.write(f"Exported {count} record(s)\n")
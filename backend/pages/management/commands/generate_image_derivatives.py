@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from pages import images
+from pages.response_cache import invalidate_namespace
+
+
+NAMESPACES = {'Attorney': 'attorneys', 'Blog': 'blogs', 'PracticeArea': 'practice-areas', 'PracticeAreaImage': 'practice-areas'}
+
+
+class Command(BaseCommand):
+    help = "Render responsive derivatives and placeholders for uploaded images that don't have up-to-date ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help="Re-render every image, e.g. after changing IMAGE_DERIVATIVE_WIDTHS")
+
+    def handle(self, *args, **options):
+        changed = set()
+        for model, field_name in images.image_models():
+            # Pending uploads are still in staging and belong to the image queue
+            rows = model._default_manager.exclude(**{images.state_field(field_name): 'pending'})
+            processed = failed = 0
+            for instance in rows.only('pk', field_name, *images.metadata_fields(field_name)).iterator(chunk_size=100):
+                forced = options['force'] and getattr(instance, field_name)
+                if not forced and not images.needs_processing(instance, field_name):
+                    continue
+                try:
+                    ok = images.process_image(instance, field_name)
+                except Exception as e:
+                    self.stderr.write(f"{model.__name__} #{instance.pk}: {type(e).__name__}: {e}")
+                    ok = False
+                if ok:
+                    processed += 1
+                else:
+                    failed += 1
+            if processed or failed:
+                changed.add(NAMESPACES[model.__name__])
+            self.stdout.write(f"{model.__name__}.{field_name}: {processed} processed, {failed} failed")
+
+        for namespace in changed:
+            invalidate_namespace(namespace)
@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pages import transfer
+
+
+class Command(BaseCommand):
+    help = ("Create or update content from an export_content JSON Lines file, matching rows by slug. "
+            "Batches commit one at a time; images are queued for process_images.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSON Lines file, or - for stdin")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Records written per bulk query and transaction")
+
+    def handle(self, *args, **options):
+        importer = transfer.Importer(batch_size=options['batch_size'])
+        try:
+            if options['path'] == '-':
+                importer.run(transfer.read_jsonl(sys.stdin))
+            else:
+                with open(options['path'], encoding='utf-8') as stream:
+                    importer.run(transfer.read_jsonl(stream))
+        except transfer.ImportFailed as e:
+            raise CommandError(f"{e}. Earlier batches were imported.") from e
+
+        for spec in transfer.SPECS:
+            name = spec.label.split('.')[1]
+            if importer.created[name] or importer.updated[name]:
+                self.stdout.write(f"{name}: {importer.created[name]} created, {importer.updated[name]} updated")
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pages import content
+from pages.models import Blog
+from pages.response_cache import invalidate_namespace
+
+
+class Command(BaseCommand):
+    help = "Fill the derived content fields of blogs saved before the current content pipeline version"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help="Blogs processed and written per transaction")
+        parser.add_argument('--all', action='store_true',
+                            help="Reprocess every blog, not only outdated ones")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        blogs = Blog.objects.all()
+        if not options['all']:
+            blogs = blogs.filter(content_version__lt=content.PIPELINE_VERSION)
+
+        # Walk the primary key instead of slicing, so rows updated by earlier batches don't shift the window
+        processed = 0
+        last_pk = 0
+        while True:
+            batch = list(blogs.filter(pk__gt=last_pk).order_by('pk').only('pk', 'content')[:batch_size])
+            if not batch:
+                break
+            for blog in batch:
+                content.apply_to_blog(blog)
+            with transaction.atomic():
+                Blog.objects.bulk_update(batch, content.DERIVED_FIELDS)
+            processed += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"Processed {processed} blog post(s)")
+
+        if processed:
+            # bulk_update skips signals, so drop cached responses here
+            invalidate_namespace('blogs')
+        self.stdout.write(f"Done: {processed} blog post(s) processed")
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pages.image_queue import drain, queue_depth
+
+
+class Command(BaseCommand):
+    help = "Move staged image uploads to storage and render their derivatives using a bounded worker pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.IMAGE_QUEUE_WORKERS,
+                            help="Number of concurrent processing threads")
+        parser.add_argument('--batch-size', type=int, default=20,
+                            help="Jobs claimed per round")
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help="Seconds to sleep when the queue is empty")
+        parser.add_argument('--once', action='store_true',
+                            help="Process the jobs that are due now and exit")
+        parser.add_argument('--stats', action='store_true',
+                            help="Print the queue depth and exit")
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.print_depth()
+            return
+
+        while True:
+            processed = drain(workers=options['workers'], batch_size=options['batch_size'])
+            if processed:
+                done = sum(1 for job in processed if job.status == 'done')
+                self.stdout.write(f"Processed {len(processed)} image job(s): {done} done, {len(processed) - done} deferred or failed")
+            if options['once']:
+                self.print_depth()
+                return
+            if not processed:
+                time.sleep(options['poll_interval'])
+
+    def print_depth(self):
+        depth = queue_depth()
+        self.stdout.write(", ".join(f"{status}: {count}" for status, count in depth.items()))
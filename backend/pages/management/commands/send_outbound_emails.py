@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pages.outbox import drain, queue_depth
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbound emails through Brevo using a bounded worker pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.EMAIL_OUTBOX_WORKERS,
+                            help="Number of concurrent delivery threads")
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help="Messages claimed per round")
+        parser.add_argument('--messages-per-request', type=int, default=settings.EMAIL_OUTBOX_MESSAGES_PER_REQUEST,
+                            help="Messages sent together in one Brevo batch request (1 disables batching)")
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help="Seconds to sleep when the queue is empty")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the messages that are due now and exit")
+        parser.add_argument('--stats', action='store_true',
+                            help="Print the queue depth and exit")
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.print_depth()
+            return
+
+        while True:
+            processed = drain(
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                messages_per_request=options['messages_per_request'],
+            )
+            if processed:
+                sent = sum(1 for email in processed if email.status == 'sent')
+                self.stdout.write(f"Processed {len(processed)} message(s): {sent} sent, {len(processed) - sent} deferred or failed")
+            if options['once']:
+                self.print_depth()
+                return
+            if not processed:
+                time.sleep(options['poll_interval'])
+
+    def print_depth(self):
+        depth = queue_depth()
+        self.stdout.write(", ".join(f"{status}: {count}" for status, count in depth.items()))
@@ -6,15 +6,22 @@ from django.utils.text import slugify
 
 def populate_slugs(apps, schema_editor):
     PracticeArea = apps.get_model('pages', 'PracticeArea')
-    for area in PracticeArea.objects.all():
+    areas = list(PracticeArea.objects.only('pk', 'name', 'slug').order_by('pk'))
+    # Every slug is still blank here, so they are all allocated in memory:
+    # the first area of a name gets the plain slug, later ones base-1, base-2, ...
+    # Each base remembers its next suffix, so a name shared by k areas costs O(k)
+    taken = set()
+    next_suffix = {}
+    for area in areas:
         base_slug = slugify(area.name)
         slug = base_slug
-        counter = 1
-        while PracticeArea.objects.filter(slug=slug).exclude(pk=area.pk).exists():
+        while slug in taken:
+            counter = next_suffix.get(base_slug, 1)
+            next_suffix[base_slug] = counter + 1
             slug = f"{base_slug}-{counter}"
-            counter += 1
+        taken.add(slug)
         area.slug = slug
-        area.save()
+    PracticeArea.objects.bulk_update(areas, ['slug'], batch_size=500)
 
 
 class Migration(migrations.Migration):
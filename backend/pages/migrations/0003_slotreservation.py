@@ -0,0 +1,46 @@
+# Generated by Django 6.0.2 on 2026-10-18 08:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+UNIT_MINUTES = 15
+UNITS_PER_DAY = 24 * 60 // UNIT_MINUTES
+
+
+def reserve_existing_appointments(apps, schema_editor):
+    Appointment = apps.get_model('pages', 'Appointment')
+    SlotReservation = apps.get_model('pages', 'SlotReservation')
+    reservations = []
+    for appointment in Appointment.objects.filter(status__in=['pending', 'confirmed']).iterator():
+        start = appointment.appointment_time.hour * 60 + appointment.appointment_time.minute
+        end = min(start + appointment.duration_minutes, UNITS_PER_DAY * UNIT_MINUTES)
+        for unit in range(start // UNIT_MINUTES, -(-end // UNIT_MINUTES)):
+            reservations.append(SlotReservation(appointment=appointment, date=appointment.appointment_date, unit=unit))
+    # Existing overlapping bookings keep whichever reservation was inserted first
+    SlotReservation.objects.bulk_create(reservations, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0002_auto_20260210_0426'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('unit', models.PositiveSmallIntegerField(help_text='Index of the time unit within the day')),
+                ('appointment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_reservations', to='pages.appointment')),
+            ],
+            options={
+                'verbose_name_plural': 'Slot Reservations',
+                'ordering': ['date', 'unit'],
+                'unique_together': {('date', 'unit')},
+            },
+        ),
+        migrations.RunPython(reserve_existing_appointments, migrations.RunPython.noop),
+    ]
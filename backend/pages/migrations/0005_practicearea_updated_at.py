@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0004_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='practicearea',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Also touched when a gallery image changes'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0005_practicearea_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['-appointment_date', '-appointment_time', 'id'], name='pages_appoi_appoint_43f51b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['is_published', '-published_date', 'id'], name='pages_blog_is_publ_8f1886_idx'),
+        ),
+    ]
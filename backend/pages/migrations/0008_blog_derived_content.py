@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0007_blog_fingerprint_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False, help_text='Sanitized content with heading anchors'),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='content_text',
+            field=models.TextField(blank=True, editable=False, help_text='Content as plain text'),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='reading_time_minutes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Table of contents: level, text and anchor id of each heading'),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='content_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Content pipeline version that produced the derived fields'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0008_blog_derived_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attorney',
+            name='photo_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of photo, see pages.images'),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='featured_image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of featured_image, see pages.images'),
+        ),
+        migrations.AddField(
+            model_name='practicearea',
+            name='featured_image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of featured_image, see pages.images'),
+        ),
+        migrations.AddField(
+            model_name='practiceareaimage',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of image, see pages.images'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0009_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attorney',
+            name='photo_state',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', editable=False, help_text='Pending while the upload waits in staging for the image worker', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='featured_image_state',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', editable=False, help_text='Pending while the upload waits in staging for the image worker', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='practicearea',
+            name='featured_image_state',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', editable=False, help_text='Pending while the upload waits in staging for the image worker', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='practiceareaimage',
+            name='image_state',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', editable=False, help_text='Pending while the upload waits in staging for the image worker', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='ImageJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(help_text='e.g. pages.Attorney', max_length=100)),
+                ('object_id', models.CharField(max_length=64)),
+                ('field_name', models.CharField(max_length=100)),
+                ('source_name', models.CharField(help_text='File the job was queued for; the job is skipped if the field has moved on', max_length=255)),
+                ('staged', models.BooleanField(default=False, help_text='Whether the file still lives in the staging storage')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When a worker may pick this job up next')),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Image Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='pages_image_status_a894ca_idx')],
+            },
+        ),
+    ]
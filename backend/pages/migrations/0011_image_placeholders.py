@@ -0,0 +1,73 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0010_image_processing_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attorney',
+            name='photo_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Intrinsic width of the upright image', null=True),
+        ),
+        migrations.AddField(
+            model_name='attorney',
+            name='photo_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Intrinsic height of the upright image', null=True),
+        ),
+        migrations.AddField(
+            model_name='attorney',
+            name='photo_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny blurred preview as a data URI, painted while the image loads'),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='featured_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Intrinsic width of the upright image', null=True),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='featured_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Intrinsic height of the upright image', null=True),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='featured_image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny blurred preview as a data URI, painted while the image loads'),
+        ),
+        migrations.AddField(
+            model_name='practicearea',
+            name='featured_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Intrinsic width of the upright image', null=True),
+        ),
+        migrations.AddField(
+            model_name='practicearea',
+            name='featured_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Intrinsic height of the upright image', null=True),
+        ),
+        migrations.AddField(
+            model_name='practicearea',
+            name='featured_image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny blurred preview as a data URI, painted while the image loads'),
+        ),
+        migrations.AddField(
+            model_name='practiceareaimage',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Intrinsic width of the upright image', null=True),
+        ),
+        migrations.AddField(
+            model_name='practiceareaimage',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Intrinsic height of the upright image', null=True),
+        ),
+        migrations.AddField(
+            model_name='practiceareaimage',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny blurred preview as a data URI, painted while the image loads'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0011_image_placeholders'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['status', 'appointment_date', 'appointment_time', 'duration_minutes'], name='pages_appoi_status_bbb85b_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+UNIT_MINUTES = 15
+UNITS_PER_DAY = 24 * 60 // UNIT_MINUTES
+BITMAP_BYTES = -(-UNITS_PER_DAY // 8)
+
+
+def fill_occupancy(apps, schema_editor):
+    Appointment = apps.get_model('pages', 'Appointment')
+    DayOccupancy = apps.get_model('pages', 'DayOccupancy')
+    masks = {}
+    appointments = Appointment.objects.filter(status__in=['pending', 'confirmed']).values_list(
+        'appointment_date', 'appointment_time', 'duration_minutes'
+    )
+    for appointment_date, appointment_time, duration in appointments.iterator():
+        start = appointment_time.hour * 60 + appointment_time.minute
+        end = min(start + duration, UNITS_PER_DAY * UNIT_MINUTES)
+        units = range(start // UNIT_MINUTES, -(-end // UNIT_MINUTES))
+        masks[appointment_date] = masks.get(appointment_date, 0) | ((1 << len(units)) - 1) << units.start
+    DayOccupancy.objects.bulk_create(
+        [DayOccupancy(date=day, units=mask.to_bytes(BITMAP_BYTES, 'little')) for day, mask in masks.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0012_appointment_availability_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DayOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('units', models.BinaryField(default=b'', help_text='Little-endian bitmap, bit n set when unit n is booked')),
+            ],
+            options={
+                'verbose_name_plural': 'Day Occupancies',
+            },
+        ),
+        migrations.RunPython(fill_occupancy, migrations.RunPython.noop),
+    ]
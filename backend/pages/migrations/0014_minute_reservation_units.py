@@ -0,0 +1,48 @@
+from django.db import migrations
+
+
+def rebuild_units(unit_minutes):
+    """Recompute SlotReservation rows and DayOccupancy bitmaps with `unit_minutes` units"""
+    units_per_day = 24 * 60 // unit_minutes
+    bitmap_bytes = -(-units_per_day // 8)
+
+    def rebuild(apps, schema_editor):
+        Appointment = apps.get_model('pages', 'Appointment')
+        SlotReservation = apps.get_model('pages', 'SlotReservation')
+        DayOccupancy = apps.get_model('pages', 'DayOccupancy')
+
+        reservations = []
+        masks = {}
+        appointments = Appointment.objects.filter(status__in=['pending', 'confirmed']).values_list(
+            'pk', 'appointment_date', 'appointment_time', 'duration_minutes'
+        )
+        for pk, appointment_date, appointment_time, duration in appointments.iterator():
+            start = appointment_time.hour * 60 + appointment_time.minute
+            spill = 1 if appointment_time.second or appointment_time.microsecond else 0
+            end = min(start + duration + spill, units_per_day * unit_minutes)
+            units = range(start // unit_minutes, -(-end // unit_minutes))
+            reservations += [SlotReservation(appointment_id=pk, date=appointment_date, unit=unit) for unit in units]
+            masks[appointment_date] = masks.get(appointment_date, 0) | ((1 << len(units)) - 1) << units.start
+
+        SlotReservation.objects.all().delete()
+        # Bookings that only collided because of rounding keep both reservations at a finer unit
+        SlotReservation.objects.bulk_create(reservations, batch_size=500, ignore_conflicts=True)
+        DayOccupancy.objects.all().delete()
+        DayOccupancy.objects.bulk_create(
+            [DayOccupancy(date=day, units=mask.to_bytes(bitmap_bytes, 'little')) for day, mask in masks.items()],
+            batch_size=500,
+        )
+
+    return rebuild
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0013_dayoccupancy'),
+    ]
+
+    operations = [
+        # Reservation units shrink from 15 minutes to one
+        migrations.RunPython(rebuild_units(1), rebuild_units(15)),
+    ]
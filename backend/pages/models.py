@@ -1,11 +1,22 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
 from django_ckeditor_5.fields import CKEditor5Field
 from datetime import datetime, timedelta
 import uuid
 from django.utils.text import slugify
 
+from pages import content as content_pipeline
+from pages.slugs import save_with_unique_slug
+
 # Create your models here.
 
+IMAGE_STATE_CHOICES = [
+    ('pending', 'Pending'),
+    ('ready', 'Ready'),
+    ('failed', 'Failed'),
+]
+
 class Appointment(models.Model):
     """Appointment booking model"""
     STATUS_CHOICES = [
@@ -32,10 +43,56 @@ class Appointment(models.Model):
     def __str__(self):
         return f"Appointment - {self.client_name} ({self.appointment_date} {self.appointment_time})"
     
+    def save(self, *args, **kwargs):
+        # post_save syncs the slot reservations; a conflict must roll back the row write along with them
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    def clean(self):
+        from .booking import find_conflicts
+        
+        if self.appointment_date and self.appointment_time and self.duration_minutes:
+            if find_conflicts(self).exists():
+                raise ValidationError("This time slot or a portion of it is already booked.")
+    
     class Meta:
         ordering = ['-appointment_date', '-appointment_time']
         unique_together = ['appointment_date', 'appointment_time']
         verbose_name_plural = "Appointments"
+        indexes = [
+            # Keyset pagination order, see pages.pagination.AppointmentPagination
+            models.Index(fields=['-appointment_date', '-appointment_time', 'id']),
+            # Covers the occupancy recompute (status, date range -> time, duration) without reading rows,
+            # see pages.occupancy.booked_appointments
+            models.Index(fields=['status', 'appointment_date', 'appointment_time', 'duration_minutes']),
+        ]
+
+
+class SlotReservation(models.Model):
+    """Time unit occupied by an active appointment, unique per date and unit"""
+    appointment = models.ForeignKey(Appointment, on_delete=models.CASCADE, related_name='slot_reservations')
+    date = models.DateField()
+    unit = models.PositiveSmallIntegerField(help_text="Index of the time unit within the day")
+    
+    def __str__(self):
+        return f"{self.date} unit {self.unit}"
+    
+    class Meta:
+        ordering = ['date', 'unit']
+        unique_together = ['date', 'unit']
+        verbose_name_plural = "Slot Reservations"
+
+
+class DayOccupancy(models.Model):
+    """Bitmap of the reservation units held by active appointments on one date, see pages.occupancy"""
+    date = models.DateField(unique=True)
+    units = models.BinaryField(default=b'', help_text="Little-endian bitmap, bit n set when unit n is booked")
+    
+    def __str__(self):
+        return f"{self.date} occupancy"
+    
+    class Meta:
+        verbose_name_plural = "Day Occupancies"
 
 
 class AppointmentDay(models.Model):
@@ -81,24 +138,26 @@ class PracticeArea(models.Model):
     slug = models.SlugField(max_length=255, unique=True, blank=True, help_text="URL-friendly identifier")
     description = CKEditor5Field()
     featured_image = models.ImageField(upload_to='practice_areas/', null=True, blank=True, help_text="Main image displayed at the top of the page")
+    featured_image_derivatives = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of featured_image, see pages.images")
+    featured_image_state = models.CharField(max_length=10, choices=IMAGE_STATE_CHOICES, default='ready', editable=False, help_text="Pending while the upload waits in staging for the image worker")
+    featured_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Intrinsic width of the upright image")
+    featured_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Intrinsic height of the upright image")
+    featured_image_placeholder = models.TextField(blank=True, editable=False, help_text="Tiny blurred preview as a data URI, painted while the image loads")
+    updated_at = models.DateTimeField(auto_now=True, help_text="Also touched when a gallery image changes")
 
     def __str__(self):
         return self.name
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.name)
-            slug = base_slug
-            
-            # Handle duplicates by adding a number suffix
-            counter = 1
-            while PracticeArea.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            
-            self.slug = slug
-        
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            # Duplicates get a number suffix
+            save_with_unique_slug(self, self.slug_base(), super().save, *args, **kwargs)
+    
+    def slug_base(self):
+        """Slug generated from name"""
+        return slugify(self.name)
     
     class Meta:
         verbose_name_plural = "Practice Areas"
@@ -107,6 +166,11 @@ class PracticeArea(models.Model):
 class PracticeAreaImage(models.Model):
     practice_area = models.ForeignKey(PracticeArea, on_delete=models.CASCADE, related_name='gallery_images')
     image = models.ImageField(upload_to='practice_areas/gallery/')
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of image, see pages.images")
+    image_state = models.CharField(max_length=10, choices=IMAGE_STATE_CHOICES, default='ready', editable=False, help_text="Pending while the upload waits in staging for the image worker")
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Intrinsic width of the upright image")
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Intrinsic height of the upright image")
+    image_placeholder = models.TextField(blank=True, editable=False, help_text="Tiny blurred preview as a data URI, painted while the image loads")
     title = models.CharField(max_length=255, blank=True, help_text="Optional title for the image")
     description = models.CharField(max_length=500, blank=True, help_text="Optional description for the image")
     order = models.PositiveIntegerField(default=0, help_text="Order of images in gallery (lower numbers appear first)")
@@ -136,6 +200,69 @@ class ContactMessage(models.Model):
         ordering = ['-created_at']
 
 
+class OutboundEmail(models.Model):
+    """Queued outbound email, delivered by the send_outbound_emails worker"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    html_content = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="When a worker may pick this message up next")
+    last_error = models.TextField(blank=True)
+    appointment = models.ForeignKey(Appointment, on_delete=models.SET_NULL, null=True, blank=True, related_name='emails', help_text="Marked as confirmation sent once this email is delivered")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
+    
+    class Meta:
+        verbose_name_plural = "Outbound Emails"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+
+class ImageJob(models.Model):
+    """Queued image upload, processed by the process_images worker"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    model_label = models.CharField(max_length=100, help_text="e.g. pages.Attorney")
+    object_id = models.CharField(max_length=64)
+    field_name = models.CharField(max_length=100)
+    source_name = models.CharField(max_length=255, help_text="File the job was queued for; the job is skipped if the field has moved on")
+    staged = models.BooleanField(default=False, help_text="Whether the file still lives in the staging storage")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="When a worker may pick this job up next")
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.model_label}.{self.field_name} #{self.object_id}: {self.source_name} ({self.status})"
+    
+    class Meta:
+        verbose_name_plural = "Image Jobs"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+
 class Attorney(models.Model):
     """Attorney/Team Member model"""
     full_name = models.CharField(max_length=255)
@@ -146,6 +273,11 @@ class Attorney(models.Model):
     email = models.EmailField(blank=True)
     phone = models.CharField(max_length=20, blank=True)
     photo = models.ImageField(upload_to='attorneys/', help_text="Professional photo of the attorney")
+    photo_derivatives = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of photo, see pages.images")
+    photo_state = models.CharField(max_length=10, choices=IMAGE_STATE_CHOICES, default='ready', editable=False, help_text="Pending while the upload waits in staging for the image worker")
+    photo_width = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Intrinsic width of the upright image")
+    photo_height = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Intrinsic height of the upright image")
+    photo_placeholder = models.TextField(blank=True, editable=False, help_text="Tiny blurred preview as a data URI, painted while the image loads")
     order = models.PositiveIntegerField(default=0, help_text="Order of appearance on the team page (lower numbers appear first)")
     is_active = models.BooleanField(default=True, help_text="Whether to display this attorney on the website")
     specializations = models.CharField(max_length=500, blank=True, help_text="Comma-separated list of practice areas")
@@ -156,21 +288,16 @@ class Attorney(models.Model):
         return f"{self.full_name} - {self.job_title}"
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            # Generate slug from full_name
-            base_slug = self.full_name.lower().replace(' ', '-').replace('.', '').replace("'", '')
-            base_slug = ''.join(c for c in base_slug if c.isalnum() or c == '-')
-            slug = base_slug
-            
-            # Handle duplicates by adding a number suffix
-            counter = 1
-            while Attorney.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            
-            self.slug = slug
-        
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            # Duplicates get a number suffix
+            save_with_unique_slug(self, self.slug_base(), super().save, *args, **kwargs)
+    
+    def slug_base(self):
+        """Slug generated from full_name"""
+        base_slug = self.full_name.lower().replace(' ', '-').replace('.', '').replace("'", '')
+        return ''.join(c for c in base_slug if c.isalnum() or c == '-')
     
     class Meta:
         verbose_name_plural = "Attorneys"
@@ -183,6 +310,11 @@ class Blog(models.Model):
     slug = models.SlugField(max_length=255, unique=True, help_text="URL-friendly identifier")
     author = models.CharField(max_length=255, help_text="Name of the blog author")
     featured_image = models.ImageField(upload_to='blogs/', null=True, blank=True, help_text="Featured image for the blog post")
+    featured_image_derivatives = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of featured_image, see pages.images")
+    featured_image_state = models.CharField(max_length=10, choices=IMAGE_STATE_CHOICES, default='ready', editable=False, help_text="Pending while the upload waits in staging for the image worker")
+    featured_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Intrinsic width of the upright image")
+    featured_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Intrinsic height of the upright image")
+    featured_image_placeholder = models.TextField(blank=True, editable=False, help_text="Tiny blurred preview as a data URI, painted while the image loads")
     excerpt = models.TextField(max_length=500, help_text="Short summary of the blog post")
     content = CKEditor5Field(help_text="Main content of the blog post")
     category = models.CharField(max_length=100, blank=True, help_text="Blog category/topic")
@@ -190,24 +322,34 @@ class Blog(models.Model):
     updated_date = models.DateTimeField(auto_now=True)
     is_published = models.BooleanField(default=True, help_text="Whether this blog is visible on the website")
     created_at = models.DateTimeField(auto_now_add=True)
+
+    # Derived from content on save by pages.content
+    content_html = models.TextField(blank=True, editable=False, help_text="Sanitized content with heading anchors")
+    content_text = models.TextField(blank=True, editable=False, help_text="Content as plain text")
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time_minutes = models.PositiveIntegerField(default=0, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False, help_text="Table of contents: level, text and anchor id of each heading")
+    content_version = models.PositiveSmallIntegerField(default=0, editable=False, help_text="Content pipeline version that produced the derived fields")
     
     def __str__(self):
         return self.title
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            
-            # Handle duplicates by adding a number suffix
-            counter = 1
-            while Blog.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            
-            self.slug = slug
-        
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            content_pipeline.apply_to_blog(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(content_pipeline.DERIVED_FIELDS)
+
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            # Duplicates get a number suffix
+            save_with_unique_slug(self, self.slug_base(), super().save, *args, **kwargs)
+    
+    def slug_base(self):
+        """Slug generated from title"""
+        return slugify(self.title)
     
     class Meta:
         verbose_name_plural = "Blogs"
@@ -216,4 +358,8 @@ class Blog(models.Model):
             models.Index(fields=['-published_date']),
             models.Index(fields=['slug']),
             models.Index(fields=['is_published']),
+            # Published posts in keyset pagination order, see pages.pagination.BlogPagination
+            models.Index(fields=['is_published', '-published_date', 'id']),
+            # Covers the conditional-GET fingerprint (max updated_date, count) without reading post bodies
+            models.Index(fields=['is_published', 'updated_date']),
         ]
\ No newline at end of file
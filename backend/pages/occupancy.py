@@ -0,0 +1,98 @@
+"""
+Materialized daily occupancy.
+
+The day is split into UNIT_MINUTES units. DayOccupancy keeps one row per
+date with a bitmap of the units held by active appointments (bit n is unit
+n), so availability is a mask test per candidate slot rather than a scan of
+the day's appointments.
+
+A date's bitmap is recomputed from its active appointments inside the
+transaction that changed them (booking.sync_reservations on save, the
+Appointment post_delete signal), with the row locked so concurrent bookings
+on the same date don't overwrite each other. Writes that skip signals,
+such as QuerySet.update(), leave it stale: run `manage.py rebuild_occupancy`.
+Every bitmap change also retires the cached availability answers covering
+that date (pages.availability_cache).
+"""
+from .availability_cache import invalidate_dates
+from .models import Appointment, DayOccupancy
+
+
+# Size of a reservation unit; appointments occupy every unit they intersect.
+# Times and durations are whole minutes, so a coarser unit would make
+# back-to-back off-grid bookings (14:00 for 40 minutes, then 14:40) collide
+UNIT_MINUTES = 1
+UNITS_PER_DAY = 24 * 60 // UNIT_MINUTES
+BITMAP_BYTES = -(-UNITS_PER_DAY // 8)
+
+# Appointments in these states occupy their time slot
+ACTIVE_STATUSES = ['pending', 'confirmed']
+
+
+def unit_span(start_minute, duration_minutes):
+    """Range of the unit indexes covered by [start, start + duration) minutes into the day"""
+    end = min(start_minute + duration_minutes, UNITS_PER_DAY * UNIT_MINUTES)
+    return range(start_minute // UNIT_MINUTES, -(-end // UNIT_MINUTES))
+
+
+def reservation_units(appointment_time, duration_minutes):
+    """Return the range of unit indexes covered by [start, start + duration) within the day"""
+    # A start with seconds ends part-way into one more minute
+    spill = 1 if appointment_time.second or appointment_time.microsecond else 0
+    return unit_span(appointment_time.hour * 60 + appointment_time.minute, duration_minutes + spill)
+
+
+def span_mask(units):
+    """Bitmask of a contiguous range of units"""
+    return ((1 << len(units)) - 1) << units.start if units else 0
+
+
+def to_bytes(mask):
+    return mask.to_bytes(BITMAP_BYTES, 'little')
+
+
+def from_bytes(data):
+    return int.from_bytes(bytes(data), 'little')
+
+
+def booked_appointments(start_date, end_date):
+    """
+    (date, time, duration) of the pending and confirmed appointments between
+    two dates (inclusive), unordered. Answered from the Appointment
+    status/date index alone.
+    """
+    return Appointment.objects.filter(
+        status__in=ACTIVE_STATUSES,
+        appointment_date__range=(start_date, end_date),
+    ).order_by().values_list('appointment_date', 'appointment_time', 'duration_minutes')
+
+
+def compute_masks(start_date, end_date):
+    """Occupancy bitmasks computed from the appointments themselves, as {date: mask} for dates with any"""
+    masks = {}
+    for appointment_date, appointment_time, duration in booked_appointments(start_date, end_date).iterator():
+        masks[appointment_date] = masks.get(appointment_date, 0) | span_mask(reservation_units(appointment_time, duration))
+    return masks
+
+
+def occupancy_by_date(start_date, end_date):
+    """Stored bitmasks between two dates (inclusive) as {date: mask}; dates without a row are free"""
+    rows = DayOccupancy.objects.filter(date__range=(start_date, end_date)).values_list('date', 'units')
+    return {day: from_bytes(units) for day, units in rows}
+
+
+def refresh_occupancy(dates):
+    """
+    Recompute the stored bitmaps of `dates`. Call it inside the transaction
+    that changed the appointments.
+    """
+    changed = []
+    # A fixed lock order keeps two transactions touching the same dates from deadlocking
+    for day in sorted(set(dates)):
+        row, _ = DayOccupancy.objects.select_for_update().get_or_create(date=day)
+        units = to_bytes(compute_masks(day, day).get(day, 0))
+        if bytes(row.units) != units:
+            row.units = units
+            row.save(update_fields=['units'])
+            changed.append(day)
+    invalidate_dates(changed)
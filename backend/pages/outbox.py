@@ -0,0 +1,179 @@
+"""
+Durable outbound email queue.
+
+Request handlers only insert OutboundEmail rows. The send_outbound_emails
+management command claims due rows and delivers them through Brevo with a
+bounded thread pool, grouping messages into batch requests and retrying
+transient failures with exponential backoff.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Appointment, OutboundEmail
+
+
+def enqueue_email(to_email, subject, html_content, appointment=None):
+    """Queue an email for delivery by the outbox worker"""
+    return OutboundEmail.objects.create(
+        to_email=to_email,
+        subject=subject,
+        html_content=html_content,
+        appointment=appointment,
+    )
+
+
+def enqueue_emails(messages):
+    """
+    Queue several emails with a single insert. `messages` is a list of dicts
+    with to_email, subject, html_content and optionally appointment.
+    """
+    return OutboundEmail.objects.bulk_create([OutboundEmail(**message) for message in messages])
+
+
+def queue_depth():
+    """Return the number of queued messages per status, plus how many are due now"""
+    counts = dict(
+        OutboundEmail.objects.values_list('status').annotate(count=Count('id')).order_by()
+    )
+    depth = {status: counts.get(status, 0) for status, _ in OutboundEmail.STATUS_CHOICES}
+    depth['due'] = _due_messages(timezone.now()).count()
+    return depth
+
+
+def backoff_delay(attempts):
+    """Delay before retry number `attempts`, doubling each time up to the configured cap"""
+    delay = settings.EMAIL_OUTBOX_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_MAX_BACKOFF_SECONDS))
+
+
+def _due_messages(now):
+    # Messages left in 'sending' past their lease belong to a worker that died
+    return OutboundEmail.objects.filter(
+        Q(status='pending') | Q(status='sending'),
+        next_attempt_at__lte=now,
+    )
+
+
+def claim_due(limit):
+    """
+    Claim up to `limit` due messages for this worker.
+
+    Each row is claimed with a conditional UPDATE, so concurrent workers never
+    deliver the same message twice. Claimed rows are leased for
+    EMAIL_OUTBOX_LEASE_SECONDS before another worker may retry them.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+    candidates = _due_messages(now).order_by('next_attempt_at').values_list('pk', 'status', 'next_attempt_at')[:limit]
+
+    claimed = []
+    for pk, current_status, next_attempt_at in candidates:
+        updated = OutboundEmail.objects.filter(
+            pk=pk, status=current_status, next_attempt_at=next_attempt_at,
+        ).update(status='sending', next_attempt_at=lease_until)
+        if updated:
+            claimed.append(pk)
+    return list(OutboundEmail.objects.filter(pk__in=claimed).order_by('next_attempt_at', 'created_at'))
+
+
+# Client errors that can succeed later: request timeout and rate limiting
+TRANSIENT_CLIENT_ERRORS = {408, 429}
+
+
+def is_permanent_failure(status_code):
+    """
+    Whether a failed attempt should not be retried. Other 4xx responses (bad
+    address, invalid key, rejected payload) will fail the same way every
+    time; transport errors (status 0), 408, 429 and 5xx are retried.
+    """
+    return 400 <= status_code < 500 and status_code not in TRANSIENT_CLIENT_ERRORS
+
+
+def record_result(email, status_code, detail):
+    """Store the outcome of a delivery attempt and schedule a retry if needed"""
+    now = timezone.now()
+    email.attempts += 1
+
+    if 200 <= status_code < 300:
+        email.status = 'sent'
+        email.sent_at = now
+        email.last_error = ''
+    elif is_permanent_failure(status_code) or email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = 'failed'
+        email.last_error = detail
+    else:
+        email.status = 'pending'
+        email.next_attempt_at = now + backoff_delay(email.attempts)
+        email.last_error = detail
+
+    email.save(update_fields=['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+
+    if email.status == 'sent' and email.appointment_id:
+        Appointment.objects.filter(pk=email.appointment_id).update(confirmation_sent=True)
+
+
+def deliver(email):
+    """Send one claimed message and record the result"""
+    from .utils import send_brevo_email
+
+    try:
+        status_code, detail = send_brevo_email(email.to_email, email.subject, email.html_content)
+    except Exception as e:
+        status_code, detail = 0, f"{type(e).__name__}: {e}"
+    record_result(email, status_code, detail)
+    return email
+
+
+def deliver_batch(emails):
+    """Send several claimed messages in one Brevo request and record each recipient's result"""
+    from .utils import send_brevo_batch
+
+    messages = [
+        {'to_email': email.to_email, 'subject': email.subject, 'html_content': email.html_content}
+        for email in emails
+    ]
+    try:
+        results = send_brevo_batch(messages)
+    except Exception as e:
+        results = [{'status_code': 0, 'detail': f"{type(e).__name__}: {e}"}] * len(emails)
+
+    for email, result in zip(emails, results):
+        record_result(email, result['status_code'], result['detail'])
+    return emails
+
+
+def _deliver_in_thread(emails):
+    try:
+        if len(emails) == 1:
+            return [deliver(emails[0])]
+        return deliver_batch(emails)
+    finally:
+        connection.close()
+
+
+def drain(workers=None, batch_size=50, messages_per_request=None):
+    """
+    Deliver every message that is currently due using a pool of `workers`
+    threads. Up to `messages_per_request` messages share one Brevo request.
+    Returns the delivered OutboundEmail instances.
+    """
+    workers = workers or settings.EMAIL_OUTBOX_WORKERS
+    messages_per_request = messages_per_request or settings.EMAIL_OUTBOX_MESSAGES_PER_REQUEST
+    processed = []
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = claim_due(batch_size)
+            if not batch:
+                break
+            groups = [batch[i:i + messages_per_request] for i in range(0, len(batch), messages_per_request)]
+            for delivered in executor.map(_deliver_in_thread, groups):
+                processed.extend(delivered)
+            close_old_connections()
+
+    return processed
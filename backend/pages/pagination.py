@@ -0,0 +1,191 @@
+"""
+Keyset (cursor) pagination.
+
+Each page is fetched with a WHERE clause on the last row seen rather than an
+OFFSET, and without a COUNT(*), so deep pages cost the same as the first one
+as long as an index matches the ordering. The primary key is appended as a
+tie-breaker so the ordering is total.
+
+Requests that pass `?page=` are served by the global PageNumberPagination,
+so existing clients keep their count/next/previous page links. So are
+orderings that cannot be keyed: relations, and nullable fields, whose NULLs
+no comparison filter can step over.
+"""
+import json
+from base64 import b64decode, b64encode
+from datetime import date, datetime, time
+from functools import reduce
+from operator import or_
+from uuid import UUID
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _encode_value(value):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def keyset_filter(ordering, values, reverse=False):
+    """
+    Build the lexicographic "after this row" condition for `ordering`:
+    (a after x) OR (a = x AND b after y) OR ...
+
+    The leading field is also range-bounded on its own so the database can
+    seek into a matching index.
+    """
+    clauses = []
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+        clauses.append(Q(**equal, **{f'{name}__{lookup}': value}))
+        equal[name] = value
+
+    first = ordering[0]
+    bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') != reverse else 'gte'}": values[0]})
+    return bound & reduce(or_, clauses)
+
+
+def keyset_fields(model, ordering):
+    """Model fields of `ordering`, or None if any of them cannot be part of a keyset"""
+    fields = []
+    for name in ordering:
+        name = name.lstrip('-')
+        try:
+            field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if field.is_relation or field.null:
+            return None
+        fields.append(field)
+    return fields
+
+
+def reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination on a composite key.
+
+    Unlike DRF's CursorPagination, the cursor stores the values of every
+    ordering field, so rows that share a leading value (blogs published
+    the same day) are paged without an offset.
+    """
+    page_number_query_param = 'page'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        try:
+            ordering = self.get_ordering(request, queryset, view)
+        except AssertionError:
+            # Orderings across relations cannot be keyed; page through them by number instead
+            ordering = None
+
+        if ordering is not None:
+            pk_name = queryset.model._meta.pk.name
+            if not {pk_name, 'pk'} & {field.lstrip('-') for field in ordering}:
+                ordering += (pk_name,)
+            self.fields = keyset_fields(queryset.model, ordering)
+
+        if ordering is None or self.fields is None or self.page_number_query_param in request.query_params:
+            self.page_number_pagination = PageNumberPagination()
+            return self.page_number_pagination.paginate_queryset(queryset, request, view)
+        self.page_number_pagination = None
+
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = ordering
+
+        values, reverse = self.decode_keyset_cursor(request)
+        queryset = queryset.order_by(*(reverse_ordering(self.ordering) if reverse else self.ordering))
+        if values is not None:
+            try:
+                queryset = queryset.filter(keyset_filter(self.ordering, values, reverse))
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+
+        self.page = rows
+        return rows
+
+    def decode_keyset_cursor(self, request):
+        """Return (values, reverse) from the cursor query parameter, or (None, False) for the first page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii'), altchars=b'-_', validate=True))
+            values, reverse = cursor['v'], bool(cursor['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # A tampered cursor can hold anything JSON allows; every value must convert to its field's type
+        try:
+            values = [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(value is None for value in values):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_keyset_cursor(self, row, reverse):
+        values = [_encode_value(getattr(row, field.lstrip('-'))) for field in self.ordering]
+        encoded = b64encode(json.dumps({'v': values, 'r': int(reverse)}).encode(), altchars=b'-_').decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_keyset_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_keyset_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if self.page_number_pagination is not None:
+            return self.page_number_pagination.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.page_number_pagination is not None:
+            return self.page_number_pagination.get_html_context()
+        return super().get_html_context()
+
+    def to_html(self):
+        if self.page_number_pagination is not None:
+            return self.page_number_pagination.to_html()
+        return super().to_html()
+
+
+class BlogPagination(KeysetPagination):
+    ordering = ('-published_date', 'id')
+
+
+class AppointmentPagination(KeysetPagination):
+    ordering = ('-appointment_date', '-appointment_time', 'id')
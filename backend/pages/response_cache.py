@@ -0,0 +1,105 @@
+"""
+Server-side cache of rendered responses for the public content endpoints.
+
+List and retrieve responses are stored as rendered JSON bytes, keyed by the
+request path and query string. Each collection has a version token in the
+cache; signals on the underlying models replace the token, so every entry
+for that collection is bypassed at once and left to expire.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+
+CACHE_PREFIX = 'pages:response'
+
+# Only machine-readable output is shared; the browsable API renders per-user forms
+CACHEABLE_FORMATS = {'json'}
+
+# Stored with the body so cache hits keep their validators
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+def _version_key(namespace):
+    return f'{CACHE_PREFIX}:{namespace}:version'
+
+
+def get_namespace_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), uuid.uuid4().hex, timeout=None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def invalidate_namespace(namespace):
+    """
+    Drop every cached response of a collection.
+
+    Like the weekly schedule, the version is bumped immediately and again
+    after the surrounding transaction commits, so no entry rendered from
+    uncommitted rows survives.
+    """
+    def bump():
+        cache.set(_version_key(namespace), uuid.uuid4().hex, timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def response_cache_key(namespace, request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'{CACHE_PREFIX}:{namespace}:{get_namespace_version(namespace)}:{request.accepted_renderer.format}:{path}'
+
+
+class CachedResponseMixin:
+    """
+    Serve `list` and `retrieve` from the response cache.
+
+    Viewsets set `cache_namespace` to the collection name that their model
+    signals invalidate. Only successful JSON responses are stored.
+    """
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(request, super().retrieve, *args, **kwargs)
+
+    def cached_response(self, request):
+        """The stored response for this request, or None"""
+        if request.accepted_renderer.format not in CACHEABLE_FORMATS:
+            return None
+        cached = cache.get(response_cache_key(self.cache_namespace, request))
+        if cached is None:
+            return None
+        content, headers = cached
+        response = HttpResponse(content, headers=headers)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def _cached(self, request, handler, *args, **kwargs):
+        if request.accepted_renderer.format not in CACHEABLE_FORMATS:
+            return handler(request, *args, **kwargs)
+
+        response = self.cached_response(request)
+        if response is not None:
+            return response
+
+        self._response_cache_key = response_cache_key(self.cache_namespace, request)
+        return handler(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, '_response_cache_key', None)
+        if key and response.status_code == 200:
+            response.render()
+            headers = {header: response[header] for header in CACHED_HEADERS if response.has_header(header)}
+            cache.set(key, (response.content, headers), settings.API_RESPONSE_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+        return response
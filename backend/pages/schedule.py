@@ -0,0 +1,117 @@
+"""
+Process-wide cache of the compiled weekly appointment schedule.
+
+AppointmentDay and AvailableHours rarely change, so they are compiled once
+into a WeeklySchedule and reused by booking and availability code. The cache
+is versioned through Django's cache framework: signals store a new version
+token whenever a schedule row changes, and every process rebuilds its copy
+lazily when it sees a token it has not compiled yet.
+"""
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+from .models import AppointmentDay, AvailableHours
+
+
+SCHEDULE_VERSION_KEY = 'pages:schedule:version'
+
+_lock = threading.Lock()
+_compiled = None
+
+
+class WeeklySchedule:
+    """
+    Immutable snapshot of the weekly schedule.
+
+    `days` maps each configured weekday (0 = Monday) to an
+    (is_active, windows) pair, where windows is a sorted tuple of
+    (start_time, end_time) pairs.
+    """
+
+    def __init__(self, version, days):
+        self.version = version
+        self.days = days
+
+    def has_day(self, weekday):
+        """Whether an AppointmentDay exists for this weekday"""
+        return weekday in self.days
+
+    def is_active(self, weekday):
+        return self.days.get(weekday, (False, ()))[0]
+
+    def windows(self, weekday):
+        """Bookable windows for the weekday, empty if the day is missing or inactive"""
+        is_active, windows = self.days.get(weekday, (False, ()))
+        return windows if is_active else ()
+
+    def weekly_windows(self):
+        """Return {weekday: windows} for every active weekday that has windows"""
+        return {
+            weekday: windows
+            for weekday, (is_active, windows) in self.days.items()
+            if is_active and windows
+        }
+
+
+def _current_version():
+    version = cache.get(SCHEDULE_VERSION_KEY)
+    if version is None:
+        cache.add(SCHEDULE_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(SCHEDULE_VERSION_KEY)
+    return version
+
+
+def compile_schedule(version=None):
+    """Build a WeeklySchedule from the database"""
+    appointment_days = AppointmentDay.objects.prefetch_related(
+        Prefetch('available_hours', queryset=AvailableHours.objects.order_by('start_time', 'end_time'))
+    )
+
+    days = {}
+    for appointment_day in appointment_days:
+        windows = tuple(sorted(
+            (window.start_time, window.end_time)
+            for window in appointment_day.available_hours.all()
+        ))
+        days[appointment_day.day_of_week] = (appointment_day.is_active, windows)
+    return WeeklySchedule(version, days)
+
+
+def get_weekly_schedule():
+    """Return the cached WeeklySchedule, rebuilding it if its version is stale"""
+    global _compiled
+
+    version = _current_version()
+    compiled = _compiled
+    if compiled is not None and compiled.version == version:
+        return compiled
+
+    with _lock:
+        if _compiled is None or _compiled.version != version:
+            _compiled = compile_schedule(version)
+        return _compiled
+
+
+def get_schedule_version():
+    return _current_version()
+
+
+def invalidate_schedule():
+    """
+    Drop the compiled schedule everywhere.
+
+    The version is bumped immediately and again after the surrounding
+    transaction commits, so no process can keep a copy compiled from
+    uncommitted rows.
+    """
+    def bump():
+        global _compiled
+        cache.set(SCHEDULE_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        _compiled = None
+
+    bump()
+    transaction.on_commit(bump)
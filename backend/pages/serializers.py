@@ -1,38 +1,97 @@
+from django.db import models
 from rest_framework import serializers
 from .models import PracticeArea, PracticeAreaImage, ContactMessage, Appointment, AppointmentDay, AvailableHours, Attorney
+from .images import file_url, srcset, state_field
+from .utils import html_to_summary
 
 
-class PracticeAreaImageSerializer(serializers.ModelSerializer):
+class QueuedImageField(serializers.ImageField):
+    """ImageField that links uploads still waiting for the image worker to their staged copy"""
+    
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = file_url(value, getattr(value.instance, state_field(value.field.name), 'ready'))
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class MediaModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer whose image fields are aware of the image queue"""
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: QueuedImageField,
+    }
+
+
+def absolute_image_url(serializer, file, state):
+    url = file_url(file, state)
+    request = serializer.context.get('request')
+    if url and request:
+        return request.build_absolute_uri(url)
+    return url
+
+
+class PracticeAreaImageSerializer(MediaModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = PracticeAreaImage
-        fields = ['id', 'image', 'image_url', 'title', 'description', 'order']
+        fields = ['id', 'image', 'image_url', 'image_srcset', 'image_width', 'image_height', 'image_placeholder', 'title', 'description', 'order']
     
     def get_image_url(self, obj):
-        if obj.image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
-        return None
+        return absolute_image_url(self, obj.image, obj.image_state)
+    
+    def get_image_srcset(self, obj):
+        return srcset(obj.image, obj.image_derivatives, self.context.get('request'))
 
 
-class PracticeAreaSerializer(serializers.ModelSerializer):
+class PracticeAreaSerializer(MediaModelSerializer):
     featured_image_url = serializers.SerializerMethodField()
+    featured_image_srcset = serializers.SerializerMethodField()
     gallery_images = PracticeAreaImageSerializer(many=True, read_only=True)
     
     class Meta:
         model = PracticeArea
-        fields = ['id', 'name', 'slug', 'description', 'featured_image', 'featured_image_url', 'gallery_images']
+        fields = [
+            'id', 'name', 'slug', 'description', 'featured_image', 'featured_image_url', 'featured_image_srcset',
+            'featured_image_width', 'featured_image_height', 'featured_image_placeholder', 'gallery_images',
+        ]
     
     def get_featured_image_url(self, obj):
-        if obj.featured_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.featured_image.url)
-            return obj.featured_image.url
-        return None
+        return absolute_image_url(self, obj.featured_image, obj.featured_image_state)
+    
+    def get_featured_image_srcset(self, obj):
+        return srcset(obj.featured_image, obj.featured_image_derivatives, self.context.get('request'))
+
+
+class PracticeAreaListSerializer(MediaModelSerializer):
+    """Lightweight representation for list pages: no gallery and a plain-text summary instead of the HTML description"""
+    featured_image_url = serializers.SerializerMethodField()
+    featured_image_srcset = serializers.SerializerMethodField()
+    summary = serializers.SerializerMethodField()
+    gallery_count = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = PracticeArea
+        fields = [
+            'id', 'name', 'slug', 'featured_image', 'featured_image_url', 'featured_image_srcset',
+            'featured_image_width', 'featured_image_height', 'featured_image_placeholder', 'summary', 'gallery_count',
+        ]
+    
+    def get_featured_image_url(self, obj):
+        return absolute_image_url(self, obj.featured_image, obj.featured_image_state)
+    
+    def get_featured_image_srcset(self, obj):
+        return srcset(obj.featured_image, obj.featured_image_derivatives, self.context.get('request'))
+    
+    def get_summary(self, obj):
+        return html_to_summary(obj.description)
+    
+    def get_gallery_count(self, obj):
+        # len() keeps this on the prefetched images instead of issuing a COUNT query
+        return len(obj.gallery_images.all())
 
 
 class ContactMessageSerializer(serializers.ModelSerializer):
@@ -71,22 +130,21 @@ class AppointmentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'confirmation_sent']
 
 
-class AttorneySerializer(serializers.ModelSerializer):
+class AttorneySerializer(MediaModelSerializer):
     photo_url = serializers.SerializerMethodField()
+    photo_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = Attorney
         fields = [
             'id', 'full_name', 'slug', 'job_title', 'short_bio', 'professional_background',
-            'email', 'phone', 'photo', 'photo_url', 'order', 
+            'email', 'phone', 'photo', 'photo_url', 'photo_srcset', 'photo_width', 'photo_height', 'photo_placeholder', 'order', 
             'is_active', 'specializations', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'slug', 'created_at', 'updated_at']
     
     def get_photo_url(self, obj):
-        if obj.photo:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.photo.url)
-            return obj.photo.url
-        return None
\ No newline at end of file
+        return absolute_image_url(self, obj.photo, obj.photo_state)
+    
+    def get_photo_srcset(self, obj):
+        return srcset(obj.photo, obj.photo_derivatives, self.context.get('request'))
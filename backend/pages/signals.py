@@ -0,0 +1,80 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import image_queue
+from .booking import RESERVATION_FIELDS, sync_reservations
+from .occupancy import refresh_occupancy
+from .models import Appointment, AppointmentDay, AvailableHours, Attorney, Blog, PracticeArea, PracticeAreaImage
+from .response_cache import invalidate_namespace
+from .schedule import invalidate_schedule
+
+
+@receiver([post_save, post_delete], sender=AppointmentDay)
+@receiver([post_save, post_delete], sender=AvailableHours)
+def schedule_changed(sender, **kwargs):
+    """Invalidate the cached weekly schedule when a day or window changes"""
+    invalidate_schedule()
+
+
+@receiver([post_save, post_delete], sender=PracticeArea)
+@receiver([post_save, post_delete], sender=PracticeAreaImage)
+def practice_area_changed(sender, **kwargs):
+    """Gallery images are part of the practice area payload"""
+    invalidate_namespace('practice-areas')
+
+
+@receiver([post_save, post_delete], sender=PracticeAreaImage)
+def gallery_image_changed(sender, instance, raw=False, **kwargs):
+    """Touch the parent area so its updated_at (and ETag) reflects gallery edits"""
+    if raw:
+        return
+    PracticeArea.objects.filter(pk=instance.practice_area_id).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=Attorney)
+@receiver(pre_save, sender=Blog)
+@receiver(pre_save, sender=PracticeArea)
+@receiver(pre_save, sender=PracticeAreaImage)
+def image_saving(sender, instance, raw=False, **kwargs):
+    """Park fresh uploads in staging; the image worker moves them to storage"""
+    if raw:
+        return
+    image_queue.stage_uploads(instance)
+
+
+@receiver(post_save, sender=Attorney)
+@receiver(post_save, sender=Blog)
+@receiver(post_save, sender=PracticeArea)
+@receiver(post_save, sender=PracticeAreaImage)
+def image_saved(sender, instance, raw=False, **kwargs):
+    """Queue new or replaced images for the image worker"""
+    if raw:
+        return
+    image_queue.enqueue_changed(instance)
+
+
+@receiver([post_save, post_delete], sender=Attorney)
+def attorney_changed(sender, **kwargs):
+    invalidate_namespace('attorneys')
+
+
+@receiver([post_save, post_delete], sender=Blog)
+def blog_changed(sender, **kwargs):
+    invalidate_namespace('blogs')
+
+
+@receiver(post_save, sender=Appointment)
+def appointment_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep slot reservations in step with the appointment's time and status"""
+    if raw:
+        return
+    if update_fields is not None and not RESERVATION_FIELDS.intersection(update_fields):
+        return
+    sync_reservations(instance)
+
+
+@receiver(post_delete, sender=Appointment)
+def appointment_deleted(sender, instance, **kwargs):
+    """Free the deleted appointment's units in the occupancy bitmap; its reservations cascade"""
+    refresh_occupancy([instance.appointment_date])
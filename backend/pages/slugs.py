@@ -0,0 +1,164 @@
+"""
+Unique slug allocation.
+
+Slugs are made unique by appending -1, -2, ... to a base. Instead of probing
+one candidate per query, every slug already taken for a base (the base
+itself and base-N) is fetched in a single query and the first free suffix
+is picked in memory. Bulk allocation does the same for many objects with
+one query per chunk of distinct bases.
+
+Two requests may still pick the same slug at the same time; the unique
+index catches it and save_with_unique_slug retries with a fresh lookup.
+"""
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import Q
+
+
+# Room kept at the end of a long base for the -N suffix
+SUFFIX_ROOM = 8
+
+# Distinct bases looked up per query in bulk mode
+LOOKUP_CHUNK = 200
+
+SAVE_ATTEMPTS = 3
+
+
+def fit_base(base, max_length):
+    """Trim `base` to the column length"""
+    if max_length and len(base) > max_length:
+        base = base[:max_length].rstrip('-')
+    return base
+
+
+def clamp_base(base, max_length):
+    """Trim `base` so base-N still fits the column; only applied when a suffix is needed"""
+    if max_length and len(base) > max_length - SUFFIX_ROOM:
+        base = base[:max_length - SUFFIX_ROOM].rstrip('-')
+    return base
+
+
+def lookup_bases(base, max_length):
+    """The bases whose taken suffixes decide the slug of `base`: itself and its clamped stem"""
+    return {base, clamp_base(base, max_length)}
+
+
+def taken_suffixes(slugs, bases):
+    """
+    Map each base to the suffixes already in use among `slugs`: 0 for the
+    bare base, N for base-N.
+    """
+    taken = {base: set() for base in bases}
+    for slug in slugs:
+        if slug in taken:
+            taken[slug].add(0)
+        base, _, suffix = slug.rpartition('-')
+        if suffix.isdigit() and base in taken:
+            taken[base].add(int(suffix))
+    return taken
+
+
+def existing_slugs(queryset, bases, field='slug'):
+    """Every value of `field` in `queryset` equal to one of `bases` or of the form base-N"""
+    bases = list(bases)
+    for start in range(0, len(bases), LOOKUP_CHUNK):
+        chunk = bases[start:start + LOOKUP_CHUNK]
+        condition = reduce(or_, (Q(**{f'{field}__startswith': f'{base}-'}) for base in chunk), Q(**{f'{field}__in': chunk}))
+        yield from queryset.filter(condition).values_list(field, flat=True).iterator()
+
+
+class SlugAllocator:
+    """
+    Hands out free slugs per base from a snapshot of the taken suffixes. A
+    base is used as is while free; otherwise its stem, clamped to leave room
+    for the suffix, gets the next free -N.
+    """
+
+    def __init__(self, taken, max_length=None):
+        self.taken = taken
+        self.max_length = max_length
+        self.next_suffix = {}
+
+    def allocate(self, base):
+        if 0 not in self.taken.get(base, ()):
+            return self.reserve(base)
+        stem = clamp_base(base, self.max_length)
+        used = self.taken.setdefault(stem, set())
+        suffix = self.next_suffix.get(stem, 1)
+        while suffix in used:
+            suffix += 1
+        self.next_suffix[stem] = suffix + 1
+        return self.reserve(f'{stem}-{suffix}')
+
+    def reserve(self, slug):
+        """Mark `slug` as taken, including as base-N of a base in this batch"""
+        self.taken.setdefault(slug, set()).add(0)
+        base, _, suffix = slug.rpartition('-')
+        if suffix.isdigit() and base in self.taken:
+            self.taken[base].add(int(suffix))
+        return slug
+
+
+def unique_slug(instance, base, field='slug'):
+    """A slug for `instance` built from `base` that no other row uses; one query"""
+    model = type(instance)
+    max_length = model._meta.get_field(field).max_length
+    base = fit_base(base, max_length)
+    bases = lookup_bases(base, max_length)
+    queryset = model._default_manager.exclude(pk=instance.pk) if instance.pk is not None else model._default_manager.all()
+    taken = taken_suffixes(existing_slugs(queryset, bases, field), bases)
+    return SlugAllocator(taken, max_length).allocate(base)
+
+
+def save_with_unique_slug(instance, base, save, *args, field='slug', **kwargs):
+    """
+    Allocate a slug for `instance` and save it with `save(*args, **kwargs)`
+    (the model's super().save), retrying if a concurrent save took the slug first.
+    """
+    using = kwargs.get('using') or router.db_for_write(type(instance), instance=instance)
+    for attempt in range(SAVE_ATTEMPTS):
+        setattr(instance, field, unique_slug(instance, base, field))
+        try:
+            # A savepoint, so a collision doesn't break the caller's transaction
+            with transaction.atomic(using=using):
+                return save(*args, **kwargs)
+        except IntegrityError:
+            slug = getattr(instance, field)
+            clashed = type(instance)._default_manager.filter(**{field: slug}).exclude(pk=instance.pk).exists()
+            if not clashed or attempt == SAVE_ATTEMPTS - 1:
+                raise
+
+
+def assign_unique_slugs(objects, base_for, field='slug'):
+    """
+    Give every object in `objects` without a slug a unique one, in memory,
+    for bulk_create/bulk_update. `base_for(obj)` returns the base. Slugs
+    already set on objects in the batch are reserved first.
+    """
+    objects = list(objects)
+    if not objects:
+        return objects
+    model = type(objects[0])
+    max_length = model._meta.get_field(field).max_length
+
+    bases = {}
+    for obj in objects:
+        if not getattr(obj, field):
+            bases[id(obj)] = fit_base(base_for(obj), max_length)
+    if not bases:
+        return objects
+
+    distinct = set().union(*(lookup_bases(base, max_length) for base in bases.values()))
+    pks = [obj.pk for obj in objects if obj.pk is not None]
+    queryset = model._default_manager.exclude(pk__in=pks)
+    slugs = list(existing_slugs(queryset, distinct, field))
+    slugs += [getattr(obj, field) for obj in objects if getattr(obj, field)]
+    allocator = SlugAllocator(taken_suffixes(slugs, distinct), max_length)
+
+    for obj in objects:
+        if id(obj) in bases:
+            setattr(obj, field, allocator.allocate(bases[id(obj)]))
+    return objects
@@ -1,8 +1,83 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.template.loaders.filesystem import Loader as FilesystemLoader
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from django.utils.text import slugify
 from datetime import datetime, timedelta, date, time
-from pages.models import Appointment, BusinessHours, Holiday, PracticeArea
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from PIL import Image
+import tempfile
+import threading
+import time as pytime
+from pages.models import (
+    Appointment, AppointmentDay, Attorney, AvailableHours, Blog, ContactMessage, ImageJob, OutboundEmail,
+    PracticeArea, PracticeAreaImage,
+)
+from pages.availability import (
+    compute_free_slots, get_available_slot_counts, get_available_slots, get_available_slots_range,
+    get_day_windows,
+)
+from pages.availability_cache import cache_timeout
+from pages.brevo import BrevoClient, parse_retry_after
+from pages.booking import SlotUnavailable, book_appointment, reservation_units
+from pages.occupancy import booked_appointments, occupancy_by_date, span_mask
+from pages.schedule import get_weekly_schedule
+from pages.emails import get_email_template, render_email
+from pages.outbox import backoff_delay, drain, enqueue_email, queue_depth, record_result
+from pages import image_queue, images, slugs
+from pages.slugs import assign_unique_slugs
+from blogs import search as blog_search
+from pages.serializers import AppointmentSerializer, AttorneySerializer
+from pages.utils import send_appointment_confirmation_email, send_contact_email_async
+import base64
+import csv
 import json
+import os
+import random
+import uuid
+import zipfile
+from xml.etree import ElementTree
+import requests
+
+
+def next_weekday(weekday, after=None):
+    """Return the first date strictly after `after` (default today) falling on `weekday`"""
+    after = after or date.today()
+    days = (weekday - after.weekday()) % 7 or 7
+    return after + timedelta(days=days)
+
+
+def create_weekday_schedule(windows=((time(9, 0), time(17, 0)),)):
+    """Open Monday-Friday with the given windows, close the weekend"""
+    for day in range(7):
+        appointment_day = AppointmentDay.objects.create(day_of_week=day, is_active=day < 5)
+        if day < 5:
+            for start_time, end_time in windows:
+                AvailableHours.objects.create(day=appointment_day, start_time=start_time, end_time=end_time)
+
+
+class BookingMixin:
+    """Appointment factory for test cases that set `self.monday`"""
+
+    def book(self, appointment_time, duration_minutes=60, status='pending', appointment_date=None):
+        return Appointment.objects.create(
+            client_name="Client",
+            client_email="client@example.com",
+            client_phone="+1-555-0100",
+            appointment_date=appointment_date or self.monday,
+            appointment_time=appointment_time,
+            duration_minutes=duration_minutes,
+            status=status,
+        )
 
 
 class AppointmentModelTest(TestCase):
@@ -42,38 +117,18 @@ class AppointmentModelTest(TestCase):
         self.assertIn("Appointment - Jane Doe", str(appointment))
 
 
-class BusinessHoursModelTest(TestCase):
-    """Test the BusinessHours model"""
+class AppointmentDayModelTest(TestCase):
+    """Test the AppointmentDay and AvailableHours models"""
 
     def setUp(self):
-        for day in range(5):
-            BusinessHours.objects.create(
-                day_of_week=day,
-                is_open=True,
-                start_time=time(9, 0),
-                end_time=time(17, 0)
-            )
-
-    def test_create_business_hours(self):
-        """Test creating business hours"""
-        bh = BusinessHours.objects.get(day_of_week=0)
-        self.assertEqual(bh.day_of_week, 0)
-        self.assertTrue(bh.is_open)
-        self.assertEqual(bh.start_time, time(9, 0))
+        create_weekday_schedule()
 
-
-class HolidayModelTest(TestCase):
-    """Test the Holiday model"""
-
-    def test_create_holiday(self):
-        """Test creating a holiday"""
-        holiday = Holiday.objects.create(
-            date=date(2025, 12, 25),
-            name="Christmas",
-            description="Christmas Day"
-        )
-        self.assertEqual(holiday.name, "Christmas")
-        self.assertEqual(holiday.date, date(2025, 12, 25))
+    def test_create_appointment_day(self):
+        """Test creating appointment days with available hours"""
+        day = AppointmentDay.objects.get(day_of_week=0)
+        self.assertEqual(day.day_of_week, 0)
+        self.assertTrue(day.is_active)
+        self.assertEqual(day.available_hours.get().start_time, time(9, 0))
 
 
 class AppointmentAPITest(TestCase):
@@ -88,21 +143,8 @@ class AppointmentAPITest(TestCase):
             description="Contract law services"
         )
 
-        # Create business hours for Monday-Friday
-        for day in range(5):
-            BusinessHours.objects.create(
-                day_of_week=day,
-                is_open=True,
-                start_time=time(9, 0),
-                end_time=time(17, 0)
-            )
-
-        # Create weekend closed hours
-        for day in range(5, 7):
-            BusinessHours.objects.create(
-                day_of_week=day,
-                is_open=False
-            )
+        # Open Monday-Friday 9:00-17:00, closed on the weekend
+        create_weekday_schedule()
 
     def test_get_available_dates(self):
         """Test getting available dates"""
@@ -118,9 +160,10 @@ class AppointmentAPITest(TestCase):
         response = self.client.get(f'/api/appointments/available_slots/?date={future_date}')
         self.assertEqual(response.status_code, 200)
 
-    def test_book_appointment_success(self):
+    @mock.patch('pages.viewsets.send_appointment_confirmation_email')
+    def test_book_appointment_success(self, send_email):
         """Test successfully booking an appointment"""
-        future_date = (date.today() + timedelta(days=5)).strftime('%Y-%m-%d')
+        future_date = next_weekday(0).strftime('%Y-%m-%d')
         
         data = {
             "client_name": "John Doe",
@@ -157,3 +200,1574 @@ class AppointmentAPITest(TestCase):
         )
         
         self.assertEqual(response.status_code, 400)
+
+
+class AvailabilityEngineTest(BookingMixin, TestCase):
+    """Test the interval-based availability engine"""
+
+    def setUp(self):
+        create_weekday_schedule(windows=(
+            (time(9, 0), time(12, 0)),
+            (time(13, 0), time(17, 0)),
+        ))
+        self.monday = next_weekday(0)
+
+    def test_slots_skip_booked_intervals(self):
+        """Slots overlapping pending or confirmed appointments are excluded"""
+        self.book(time(10, 0), 60)
+        self.book(time(14, 30), 30, status='confirmed')
+        self.book(time(15, 0), 60, status='cancelled')
+
+        slots = get_available_slots(self.monday, 60)
+
+        self.assertEqual(slots, [
+            time(9, 0), time(11, 0),
+            time(13, 0), time(13, 30), time(15, 0), time(15, 30), time(16, 0),
+        ])
+
+    def test_long_interval_blocks_later_slots(self):
+        """An early long interval still blocks slots after shorter ones end"""
+        occupied = (span_mask(reservation_units(time(9, 0), 150))
+                    | span_mask(reservation_units(time(9, 30), 30)))
+
+        slots = compute_free_slots(get_day_windows(self.monday), occupied, 30)
+
+        self.assertEqual(slots[:2], [time(11, 30), time(13, 0)])
+
+    def test_off_grid_times_do_not_collide(self):
+        """Windows and appointments off the quarter hour keep the slots that don't overlap"""
+        windows = ((time(9, 10), time(12, 0)),)
+        occupied = span_mask(reservation_units(time(10, 10), 20))
+
+        self.assertIn(time(9, 10), compute_free_slots(windows, occupied, 60))
+        self.assertEqual(compute_free_slots(windows, occupied, 30)[:2], [time(9, 10), time(9, 40)])
+
+    def test_closed_and_past_days_have_no_slots(self):
+        self.assertEqual(get_available_slots(next_weekday(5), 60), [])
+        self.assertEqual(get_available_slots(date.today() - timedelta(days=1), 60), [])
+
+    def test_query_count_is_constant(self):
+        """Query count does not depend on windows, slots or appointments"""
+        get_weekly_schedule()
+        with self.assertNumQueries(1):
+            get_available_slots(self.monday, 30)
+
+        for hour in (9, 10, 13, 14, 15):
+            self.book(time(hour, 0), 30)
+        AvailableHours.objects.create(
+            day=AppointmentDay.objects.get(day_of_week=0),
+            start_time=time(17, 0),
+            end_time=time(20, 0),
+        )
+        get_weekly_schedule()
+
+        with self.assertNumQueries(1):
+            get_available_slots(self.monday, 30)
+
+    def test_range_matches_single_day_results(self):
+        """Range availability equals per-day availability for every date"""
+        self.book(time(10, 0), 60)
+        self.book(time(13, 30), 90, appointment_date=self.monday + timedelta(days=1))
+        start_date = date.today()
+        end_date = start_date + timedelta(days=21)
+
+        slots_by_date = get_available_slots_range(start_date, end_date, 60)
+
+        self.assertEqual(len(slots_by_date), 22)
+        for check_date, slots in slots_by_date.items():
+            self.assertEqual(slots, get_available_slots(check_date, 60))
+
+    def test_range_kernel_matches_scalar_sweep(self):
+        """The packed range computation agrees with compute_free_slots for off-grid windows and durations"""
+        AvailableHours.objects.create(
+            day=AppointmentDay.objects.get(day_of_week=2), start_time=time(17, 10), end_time=time(19, 5),
+        )
+        AvailableHours.objects.create(
+            day=AppointmentDay.objects.get(day_of_week=4), start_time=time(23, 20), end_time=time(23, 59),
+        )
+        get_weekly_schedule()
+        rng = random.Random(7)
+        for _ in range(60):
+            try:
+                self.book(
+                    time(rng.randrange(8, 20), rng.choice((0, 5, 15, 30, 50))), rng.choice((15, 30, 45, 60, 120)),
+                    appointment_date=self.monday + timedelta(days=rng.randrange(21)),
+                )
+            except SlotUnavailable:
+                pass
+        start_date = date.today() - timedelta(days=2)
+        end_date = self.monday + timedelta(days=21)
+        occupied_by_date = occupancy_by_date(start_date, end_date)
+
+        for duration in (15, 20, 30, 45, 60, 90, 480):
+            slots_by_date = get_available_slots_range(start_date, end_date, duration)
+            counts = get_available_slot_counts(start_date, end_date, duration)
+            for check_date, slots in slots_by_date.items():
+                windows = get_day_windows(check_date) if check_date >= date.today() else ()
+                expected = compute_free_slots(windows, occupied_by_date.get(check_date, 0), duration)
+                self.assertEqual(slots, expected, (check_date, duration))
+                self.assertEqual(counts.get(check_date, 0), len(expected))
+
+    def test_available_dates_query_count_is_constant(self):
+        """available_dates uses a fixed number of queries for any horizon"""
+        self.book(time(10, 0), 60)
+        get_weekly_schedule()
+
+        with self.assertNumQueries(1):
+            short = self.client.get('/api/appointments/available_dates/?days_ahead=7')
+        with self.assertNumQueries(1):
+            long = self.client.get('/api/appointments/available_dates/?days_ahead=90')
+
+        self.assertEqual(long.status_code, 200)
+        data = json.loads(long.content)
+        self.assertEqual(data['total'], len(data['available_dates']))
+        self.assertEqual(data['available_dates'][:len(json.loads(short.content)['available_dates'])],
+                         json.loads(short.content)['available_dates'])
+        monday = next(d for d in data['available_dates'] if d['date'] == self.monday.isoformat())
+        self.assertEqual(monday['slots_count'], len(get_available_slots(self.monday, 60)))
+
+
+class WeeklyScheduleCacheTest(TestCase):
+    """Test the cached weekly schedule and its invalidation"""
+
+    def setUp(self):
+        create_weekday_schedule()
+        self.monday_day = AppointmentDay.objects.get(day_of_week=0)
+
+    def test_cached_schedule_needs_no_queries(self):
+        schedule = get_weekly_schedule()
+
+        with self.assertNumQueries(0):
+            cached = get_weekly_schedule()
+
+        self.assertIs(cached, schedule)
+        self.assertEqual(cached.windows(0), ((time(9, 0), time(17, 0)),))
+        self.assertTrue(cached.has_day(6))
+        self.assertEqual(cached.windows(6), ())
+
+    def test_window_changes_invalidate_schedule(self):
+        get_weekly_schedule()
+
+        window = AvailableHours.objects.create(day=self.monday_day, start_time=time(7, 0), end_time=time(8, 0))
+        self.assertEqual(get_weekly_schedule().windows(0)[0], (time(7, 0), time(8, 0)))
+
+        window.delete()
+        self.assertEqual(get_weekly_schedule().windows(0), ((time(9, 0), time(17, 0)),))
+
+    def test_day_changes_invalidate_schedule(self):
+        get_weekly_schedule()
+
+        self.monday_day.is_active = False
+        self.monday_day.save()
+        self.assertFalse(get_weekly_schedule().is_active(0))
+
+        self.monday_day.delete()
+        self.assertFalse(get_weekly_schedule().has_day(0))
+
+    @mock.patch('pages.viewsets.send_appointment_confirmation_email')
+    def test_booking_reads_schedule_from_cache(self, send_email):
+        """Booking only queries appointments once the schedule is cached"""
+        get_weekly_schedule()
+        data = {
+            "client_name": "John Doe",
+            "client_email": "john@example.com",
+            "client_phone": "+1-555-0123",
+            "appointment_date": next_weekday(0).isoformat(),
+            "appointment_time": "10:00",
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/appointments/', json.dumps(data), content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        for query in queries.captured_queries:
+            self.assertNotIn('pages_appointmentday', query['sql'])
+            self.assertNotIn('pages_availablehours', query['sql'])
+
+
+class SlotReservationTest(BookingMixin, TestCase):
+    """Test database-level slot reservation for bookings"""
+
+    def setUp(self):
+        create_weekday_schedule()
+        self.monday = next_weekday(0)
+
+    def test_booking_reserves_units(self):
+        appointment = self.book(time(10, 0), 45)
+        self.assertEqual(
+            list(appointment.slot_reservations.values_list('unit', flat=True)),
+            list(reservation_units(time(10, 0), 45)),
+        )
+
+    def test_overlap_with_different_start_is_rejected(self):
+        self.book(time(10, 0), 60)
+
+        with self.assertRaises(SlotUnavailable):
+            self.book(time(10, 30), 30)
+
+        self.assertEqual(Appointment.objects.count(), 1)
+        self.book(time(11, 0), 60)
+
+    def test_back_to_back_off_grid_bookings(self):
+        self.book(time(14, 0), 40)
+        self.book(time(14, 40), 30)
+
+        with self.assertRaises(SlotUnavailable):
+            self.book(time(15, 5), 10)
+        self.assertEqual(Appointment.objects.count(), 2)
+
+    def test_cancel_releases_and_reschedule_moves_reservations(self):
+        appointment = self.book(time(10, 0), 60)
+
+        appointment.status = 'cancelled'
+        appointment.save()
+        self.assertFalse(appointment.slot_reservations.exists())
+        self.book(time(10, 30), 30)
+
+        appointment.status = 'pending'
+        with self.assertRaises(SlotUnavailable):
+            appointment.save()
+
+    def test_conflicting_booking_request_is_rejected(self):
+        self.book(time(10, 0), 60)
+
+        response = self.client.post('/api/appointments/', {
+            "client_name": "Client", "client_email": "client@example.com", "client_phone": "+1-555-0100",
+            "appointment_date": self.monday.isoformat(), "appointment_time": "10:30", "duration_minutes": 30,
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_conflicting_reschedule_keeps_the_original_time(self):
+        self.book(time(10, 0), 60)
+        moved = self.book(time(11, 0), 60)
+        occupied = occupancy_by_date(self.monday, self.monday)[self.monday]
+
+        response = self.client.patch(
+            f'/api/appointments/{moved.pk}/', {"appointment_time": "10:30"}, content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        moved.refresh_from_db()
+        self.assertEqual(moved.appointment_time, time(11, 0))
+        self.assertEqual(
+            list(moved.slot_reservations.values_list('unit', flat=True)), list(reservation_units(time(11, 0), 60)),
+        )
+        self.assertEqual(occupancy_by_date(self.monday, self.monday)[self.monday], occupied)
+
+        response = self.client.patch(
+            f'/api/appointments/{moved.pk}/', {"appointment_time": "12:00"}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        moved.refresh_from_db()
+        self.assertEqual(moved.appointment_time, time(12, 0))
+
+    def test_clean_reports_conflicts(self):
+        self.book(time(10, 0), 60)
+        clash = Appointment(appointment_date=self.monday, appointment_time=time(10, 45), duration_minutes=30)
+
+        with self.assertRaises(ValidationError):
+            clash.clean()
+
+
+class ConcurrentBookingTest(TransactionTestCase):
+    """Fire parallel overlapping bookings and check none double-book"""
+
+    THREADS = 16
+
+    def setUp(self):
+        create_weekday_schedule()
+        self.monday = next_weekday(0)
+
+    def attempt(self, barrier, appointment_time, duration_minutes, results):
+        data = {
+            "client_name": "Client",
+            "client_email": "client@example.com",
+            "client_phone": "+1-555-0100",
+            "appointment_date": self.monday.isoformat(),
+            "appointment_time": appointment_time.strftime('%H:%M'),
+            "duration_minutes": duration_minutes,
+        }
+        barrier.wait()
+        try:
+            for _ in range(50):
+                try:
+                    serializer = AppointmentSerializer(data=data)
+                    if not serializer.is_valid():
+                        results.append('invalid')
+                    else:
+                        book_appointment(serializer)
+                        results.append('booked')
+                    return
+                except SlotUnavailable:
+                    results.append('rejected')
+                    return
+                except OperationalError:
+                    # SQLite reports a locked database instead of waiting
+                    pytime.sleep(0.01)
+            results.append('locked')
+        finally:
+            connection.close()
+
+    def test_parallel_bookings_never_overlap(self):
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+        threads = [
+            threading.Thread(
+                target=self.attempt,
+                args=(barrier, time(9 + i // 4, 15 * (i % 4)), 30 + 15 * (i % 5), results),
+            )
+            for i in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), self.THREADS)
+        self.assertGreater(results.count('booked'), 0)
+        self.assertGreater(results.count('rejected'), 0)
+
+        booked = list(Appointment.objects.filter(appointment_date=self.monday))
+        self.assertEqual(len(booked), results.count('booked'))
+        for i, first in enumerate(booked):
+            first_start = datetime.combine(self.monday, first.appointment_time)
+            first_end = first_start + timedelta(minutes=first.duration_minutes)
+            for second in booked[i + 1:]:
+                second_start = datetime.combine(self.monday, second.appointment_time)
+                second_end = second_start + timedelta(minutes=second.duration_minutes)
+                self.assertFalse(first_start < second_end and second_start < first_end,
+                                 f"{first} overlaps {second}")
+
+
+class BrevoStub:
+    """
+    Local HTTP/1.1 server standing in for the Brevo API.
+
+    `responses` is a queue of status codes or (status_code, headers) pairs;
+    once it is empty every request gets a 201.
+    """
+
+    def __init__(self, responses=None, delay=0):
+        self.requests = []
+        self.client_ports = []
+        self.responses = list(responses or [])
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                stub.requests.append(body)
+                stub.client_ports.append(self.client_address[1])
+                response = stub.responses.pop(0) if stub.responses else 201
+                status_code, headers = response if isinstance(response, tuple) else (response, {})
+                if delay:
+                    pytime.sleep(delay)
+                if 'messageVersions' in body:
+                    ids = [f"<stub-{len(stub.requests)}-{i}@brevo>" for i in range(len(body['messageVersions']))]
+                    payload = json.dumps({"messageIds": ids}).encode()
+                else:
+                    payload = b'{"messageId": "<stub@brevo>"}'
+                self.send_response(status_code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up waiting (timeout tests)
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v3/smtp/email"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class BrevoClientTest(TestCase):
+    """Test the pooled Brevo client against a local stub"""
+
+    def make_client(self, url, **kwargs):
+        client = BrevoClient(api_key='test-key', url=url, backoff_seconds=0, **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_reuses_keep_alive_connection(self):
+        with BrevoStub() as stub:
+            client = self.make_client(stub.url)
+            for _ in range(5):
+                self.assertEqual(client.send_email("jane@example.com", "Subject", "<p>Hi</p>")[0], 201)
+
+        self.assertEqual(len(set(stub.client_ports)), 1)
+        self.assertEqual(stub.requests[0]['to'], [{"email": "jane@example.com"}])
+        self.assertEqual(client.stats.snapshot()['calls'], 5)
+
+    def test_retries_429_and_5xx_honoring_retry_after(self):
+        with BrevoStub(responses=[(429, {'Retry-After': '0'}), 503]) as stub:
+            client = self.make_client(stub.url)
+            with mock.patch('pages.brevo.time.sleep') as sleep:
+                status_code, _ = client.send_email("jane@example.com", "Subject", "<p>Hi</p>")
+
+        self.assertEqual(status_code, 201)
+        self.assertEqual(len(stub.requests), 3)
+        self.assertEqual(sleep.call_args_list[0], mock.call(0.0))
+        stats = client.stats.snapshot()
+        self.assertEqual((stats['calls'], stats['retries'], stats['errors']), (3, 2, 2))
+        self.assertEqual(stats['status_counts'], {429: 1, 503: 1, 201: 1})
+
+    def test_gives_up_after_max_retries(self):
+        with BrevoStub(responses=[500, 500, 500]) as stub:
+            client = self.make_client(stub.url, max_retries=1)
+            status_code, _ = client.send_email("jane@example.com", "Subject", "<p>Hi</p>")
+
+        self.assertEqual(status_code, 500)
+        self.assertEqual(len(stub.requests), 2)
+
+    def test_read_timeout_is_not_retried(self):
+        with BrevoStub(delay=0.5) as stub:
+            client = self.make_client(stub.url, read_timeout=0.05)
+            with self.assertRaises(requests.ReadTimeout):
+                client.send_email("jane@example.com", "Subject", "<p>Hi</p>")
+
+        # The message may have been accepted; a retry could deliver it twice
+        self.assertEqual(len(stub.requests), 1)
+        stats = client.stats.snapshot()
+        self.assertEqual((stats['calls'], stats['retries'], stats['status_counts']), (1, 0, {'exception': 1}))
+
+    def test_connection_errors_are_retried(self):
+        with BrevoStub() as stub:
+            url = stub.url
+        # The stub is shut down, so nothing listens on its port any more
+        client = self.make_client(url, max_retries=2)
+        with self.assertRaises(requests.ConnectionError):
+            client.send_email("jane@example.com", "Subject", "<p>Hi</p>")
+
+        stats = client.stats.snapshot()
+        self.assertEqual((stats['calls'], stats['retries']), (3, 2))
+
+    def test_batch_uses_message_versions_and_splits(self):
+        messages = [
+            {'to_email': f"client{i}@example.com", 'subject': f"Hello {i}", 'html_content': f"<p>{i}</p>"}
+            for i in range(5)
+        ]
+        with BrevoStub(responses=[201, 500]) as stub:
+            client = self.make_client(stub.url, max_retries=0)
+            results = client.send_batch(messages, max_versions=2)
+
+        self.assertEqual([len(payload['messageVersions']) for payload in stub.requests], [2, 2, 1])
+        self.assertEqual(stub.requests[0]['messageVersions'][1],
+                         {'to': [{'email': 'client1@example.com'}], 'subject': 'Hello 1', 'htmlContent': '<p>1</p>'})
+        self.assertEqual([result['to_email'] for result in results], [m['to_email'] for m in messages])
+        self.assertEqual([result['status_code'] for result in results], [201, 201, 500, 500, 201])
+        self.assertEqual(results[1]['message_id'], '<stub-1-1@brevo>')
+        self.assertIsNone(results[2]['message_id'])
+
+    def test_batch_splits_by_payload_size(self):
+        messages = [{'to_email': "a@example.com", 'subject': "S", 'html_content': "x" * 1000}] * 3
+        client = BrevoClient(api_key='test-key', url='http://127.0.0.1:9/')
+        self.addCleanup(client.close)
+
+        self.assertEqual([len(chunk) for chunk in client.split_batches(messages, max_bytes=2500)], [2, 1])
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('2'), 2.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+
+
+class OutboundEmailQueueTest(TransactionTestCase):
+    """Test the database-backed outbound email queue against a Brevo stub"""
+
+    def test_contact_email_only_inserts_rows(self):
+        with mock.patch('pages.utils.send_brevo_email') as send:
+            send_contact_email_async("Jane", "jane@example.com", "Hello")
+
+        send.assert_not_called()
+        self.assertEqual(
+            sorted(OutboundEmail.objects.values_list('to_email', 'status')),
+            [('equitylawandco@gmail.com', 'pending'), ('jane@example.com', 'pending')],
+        )
+
+    def test_drain_delivers_and_marks_confirmation(self):
+        create_weekday_schedule()
+        appointment = Appointment.objects.create(
+            client_name="John Doe",
+            client_email="john@example.com",
+            client_phone="+1-555-0123",
+            appointment_date=next_weekday(0),
+            appointment_time=time(10, 0),
+        )
+        send_appointment_confirmation_email(appointment)
+
+        with BrevoStub() as stub, self.settings(BREVO_API_URL=stub.url):
+            processed = drain(workers=2)
+
+        self.assertEqual(len(processed), 2)
+        self.assertEqual(len(stub.requests), 1)
+        self.assertEqual({version['to'][0]['email'] for version in stub.requests[0]['messageVersions']},
+                         {'john@example.com', 'equitylawandco@gmail.com'})
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+        appointment.refresh_from_db()
+        self.assertTrue(appointment.confirmation_sent)
+        self.assertEqual(queue_depth()['sent'], 2)
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        email = enqueue_email("jane@example.com", "Subject", "<p>Body</p>")
+
+        with BrevoStub(responses=[503, 500]) as stub, self.settings(
+            BREVO_API_URL=stub.url, BREVO_MAX_RETRIES=0, EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+        ):
+            drain(workers=1)
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ('pending', 1))
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            self.assertEqual(queue_depth()['due'], 0)
+
+            OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+            drain(workers=1)
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 2))
+        self.assertEqual(len(stub.requests), 2)
+
+    def test_only_transient_failures_are_retried(self):
+        retried = {0: 'ConnectionError', 408: 'timeout', 429: 'rate limited', 500: 'error', 503: 'unavailable'}
+        rejected = {400: 'invalid email', 401: 'key not found', 403: 'forbidden', 422: 'bad payload'}
+
+        for status_code, detail in {**retried, **rejected}.items():
+            with self.subTest(status_code=status_code):
+                email = enqueue_email("jane@example.com", "Subject", "<p>Body</p>")
+                record_result(email, status_code, detail)
+                email.refresh_from_db()
+
+                expected = 'pending' if status_code in retried else 'failed'
+                self.assertEqual((email.status, email.attempts, email.last_error), (expected, 1, detail))
+                if status_code in retried:
+                    self.assertGreater(email.next_attempt_at, timezone.now())
+
+    def test_backoff_doubles_up_to_cap(self):
+        with self.settings(EMAIL_OUTBOX_BACKOFF_SECONDS=10, EMAIL_OUTBOX_MAX_BACKOFF_SECONDS=60):
+            self.assertEqual([backoff_delay(n).total_seconds() for n in range(1, 6)], [10, 20, 40, 60, 60])
+
+
+class EmailTemplateTest(TestCase):
+    """Test the precompiled email templates"""
+
+    def test_user_input_is_escaped(self):
+        html = render_email('contact_admin', {
+            'name': '<b>Mallory</b>',
+            'email': 'mallory@example.com',
+            'message': '<script>alert(1)</script>',
+            'received_at': datetime(2026, 3, 4, 15, 5),
+        })
+
+        self.assertNotIn('<script>', html)
+        self.assertIn('&lt;script&gt;alert(1)&lt;/script&gt;', html)
+        self.assertIn('&lt;b&gt;Mallory&lt;/b&gt;', html)
+        self.assertIn('March 04, 2026 at 03:05 PM', html)
+
+    def test_templates_compile_once(self):
+        context = {'name': 'Jane', 'email': 'jane@example.com', 'message': 'Hi', 'received_at': datetime.now()}
+        template = get_email_template('contact_confirmation')
+        render_email('contact_confirmation', context)
+
+        with mock.patch.object(FilesystemLoader, 'get_contents') as get_contents:
+            html = render_email('contact_confirmation', context)
+
+        get_contents.assert_not_called()
+        self.assertIs(get_email_template('contact_confirmation'), template)
+        self.assertIn('.header h1{font-size:40px;}', html)
+        self.assertIn('Dear Jane,', html)
+
+    def test_appointment_emails_render_details(self):
+        appointment = Appointment(
+            client_name="O'Brien & Sons",
+            client_email="client@example.com",
+            client_phone="+1-555-0100",
+            appointment_date=date(2026, 5, 4),
+            appointment_time=time(14, 30),
+            duration_minutes=90,
+        )
+
+        with mock.patch('pages.utils.enqueue_emails') as enqueue:
+            send_appointment_confirmation_email(appointment)
+
+        client_email, admin_email = enqueue.call_args[0][0]
+        self.assertIn('May 04, 2026', client_email['html_content'])
+        self.assertIn('02:30 PM', client_email['html_content'])
+        self.assertIn('General Inquiry', client_email['html_content'])
+        self.assertIn('O&#x27;Brien &amp; Sons', admin_email['html_content'])
+        self.assertIn('N/A', admin_email['html_content'])
+
+
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class PracticeAreaAPITest(TestCase):
+    """List pages get a slim payload with a query count independent of the number of areas"""
+
+    def setUp(self):
+        cache.clear()
+
+    def create_areas(self, count):
+        for i in range(count):
+            area = PracticeArea.objects.create(
+                name=f"Area {PracticeArea.objects.count()}",
+                description="<p>Full&nbsp;<strong>rich</strong> text</p>" * 50,
+            )
+            for order in range(3):
+                PracticeAreaImage.objects.create(
+                    practice_area=area, image=f'practice_areas/gallery/{area.slug}-{order}.jpg', order=order,
+                )
+
+    def list_query_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/practice-areas/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_list_query_count_is_constant(self):
+        self.create_areas(2)
+        few_queries, _ = self.list_query_count()
+
+        self.create_areas(6)
+        many_queries, data = self.list_query_count()
+
+        self.assertEqual(len(data['results']), 8)
+        self.assertEqual(few_queries, many_queries)
+
+    def test_list_returns_plain_text_summary(self):
+        self.create_areas(1)
+        _, data = self.list_query_count()
+
+        area = data['results'][0]
+        self.assertEqual(
+            set(area), {
+                'id', 'name', 'slug', 'featured_image', 'featured_image_url', 'featured_image_srcset',
+                'featured_image_width', 'featured_image_height', 'featured_image_placeholder', 'summary', 'gallery_count',
+            }
+        )
+        self.assertEqual(area['gallery_count'], 3)
+        self.assertTrue(area['summary'].startswith('Full rich text Full rich text'))
+        self.assertLessEqual(len(area['summary']), 150)
+        self.assertNotIn('<', area['summary'])
+
+    def test_retrieve_keeps_full_payload(self):
+        self.create_areas(1)
+        area = PracticeArea.objects.get()
+
+        response = self.client.get(f'/api/practice-areas/{area.slug}/')
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(data['description'], area.description)
+        self.assertEqual(len(data['gallery_images']), 3)
+
+
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class ResponseCacheTest(TestCase):
+    """Public content responses are served from the cache until their models change"""
+
+    def setUp(self):
+        cache.clear()
+        self.area = PracticeArea.objects.create(name="Property Law", description="<p>Land</p>")
+        self.attorney = Attorney.objects.create(full_name="Jane Doe", job_title="Partner", photo='attorneys/jane.jpg')
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_repeat_request_is_served_without_queries(self):
+        first, first_queries = self.get('/api/practice-areas/')
+        second, second_queries = self.get('/api/practice-areas/')
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertGreater(first_queries, 0)
+        self.assertEqual(second_queries, 0)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second['Content-Type'], 'application/json')
+
+    def test_query_string_is_part_of_the_key(self):
+        self.get('/api/practice-areas/')
+        response, _ = self.get('/api/practice-areas/?search=Property')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_related_model_change_invalidates_only_its_collection(self):
+        self.get('/api/practice-areas/')
+        self.get('/api/attorneys/')
+
+        PracticeAreaImage.objects.create(practice_area=self.area, image='practice_areas/gallery/a.jpg')
+
+        response, _ = self.get('/api/practice-areas/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['results'][0]['gallery_count'], 1)
+        response, _ = self.get('/api/attorneys/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_retrieve_is_cached_and_invalidated_on_delete(self):
+        url = f'/api/attorneys/{self.attorney.slug}/'
+        self.get(url)
+        response, _ = self.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+        self.attorney.delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_browsable_api_is_not_cached(self):
+        self.get('/api/practice-areas/?format=api')
+        response, queries = self.get('/api/practice-areas/?format=api')
+        self.assertNotIn('X-Cache', response)
+        self.assertGreater(queries, 0)
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            with self.settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+            }}):
+                first, _ = self.get('/api/practice-areas/')
+                second, queries = self.get('/api/practice-areas/')
+                self.assertEqual(second['X-Cache'], 'HIT')
+                self.assertEqual(queries, 0)
+                self.assertEqual(first.content, second.content)
+
+                self.area.save()
+                response, _ = self.get('/api/practice-areas/')
+                self.assertEqual(response['X-Cache'], 'MISS')
+
+
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class ConditionalGetTest(TestCase):
+    """Content endpoints answer revalidations with 304 until the collection changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.area = PracticeArea.objects.create(name="Property Law", description="<p>Land</p>")
+        self.attorney = Attorney.objects.create(full_name="Jane Doe", job_title="Partner", photo='attorneys/jane.jpg')
+
+    def test_list_not_modified_skips_serializer(self):
+        response = self.client.get('/api/attorneys/')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+        cache.clear()
+        with mock.patch('pages.serializers.AttorneySerializer.to_representation') as to_representation:
+            with CaptureQueriesContext(connection) as queries:
+                not_modified = self.client.get('/api/attorneys/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        self.assertEqual(len(queries), 1)
+        to_representation.assert_not_called()
+
+    def test_write_during_serialization_is_not_hidden_by_the_etag(self):
+        """Validators are read before the body, so a concurrent write never gets a stale body a 304"""
+        serialize = AttorneySerializer.to_representation
+        attorney = self.attorney
+
+        def write_meanwhile(serializer, instance):
+            data = serialize(serializer, instance)
+            attorney.job_title = "Senior Partner"
+            attorney.save()
+            return data
+
+        with mock.patch.object(AttorneySerializer, 'to_representation', write_meanwhile):
+            stale = self.client.get('/api/attorneys/')
+        self.assertEqual(stale.json()['results'][0]['job_title'], "Partner")
+
+        response = self.client.get('/api/attorneys/', HTTP_IF_NONE_MATCH=stale['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['job_title'], "Senior Partner")
+
+    def test_cache_hit_keeps_validators(self):
+        first = self.client.get('/api/attorneys/')
+        second = self.client.get('/api/attorneys/')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertEqual(first['Last-Modified'], second['Last-Modified'])
+
+    def test_cached_response_revalidates_without_queries(self):
+        first = self.client.get('/api/attorneys/')
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = self.client.get('/api/attorneys/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+    def test_if_modified_since(self):
+        response = self.client.get(f'/api/attorneys/{self.attorney.slug}/')
+        not_modified = self.client.get(
+            f'/api/attorneys/{self.attorney.slug}/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_etag_changes_with_collection(self):
+        etag = self.client.get('/api/practice-areas/')['ETag']
+
+        PracticeAreaImage.objects.create(practice_area=self.area, image='practice_areas/gallery/a.jpg')
+        response = self.client.get('/api/practice-areas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        PracticeArea.objects.create(name="Tax Law", description="<p>Tax</p>")
+        self.assertEqual(self.client.get('/api/practice-areas/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_differs_per_query_string(self):
+        etag = self.client.get('/api/practice-areas/')['ETag']
+        response = self.client.get('/api/practice-areas/?search=Property', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_object_is_404(self):
+        response = self.client.get('/api/practice-areas/missing/', HTTP_IF_NONE_MATCH='"abc"')
+        self.assertEqual(response.status_code, 404)
+
+
+class AppointmentPaginationTest(TestCase):
+    """Appointments are paged by (-appointment_date, -appointment_time, id) keyset cursors"""
+
+    def setUp(self):
+        start = date.today() + timedelta(days=1)
+        for day in range(4):
+            for hour in range(9, 15):
+                Appointment.objects.create(
+                    client_name="Client", client_email="client@example.com", client_phone="9800000000",
+                    appointment_date=start + timedelta(days=day), appointment_time=time(hour, 0),
+                    duration_minutes=30,
+                )
+
+    def test_cursor_pages_follow_schedule_order(self):
+        seen = []
+        url = '/api/appointments/'
+        while url:
+            data = self.client.get(url).json()
+            seen.extend(appointment['id'] for appointment in data['results'])
+            url = data['next']
+
+        expected = Appointment.objects.order_by('-appointment_date', '-appointment_time', 'id')
+        self.assertEqual(seen, [str(pk) for pk in expected.values_list('id', flat=True)])
+
+    def test_keyset_query_seeks_an_index(self):
+        first = self.client.get('/api/appointments/').json()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first['next'])
+        page_query = queries[-1]['sql']
+        self.assertNotIn('OFFSET', page_query)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {page_query}')
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('USING INDEX', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_relation_and_nullable_orderings_page_by_number(self):
+        area = PracticeArea.objects.create(name="Family Law", description="Family")
+        Appointment.objects.filter(appointment_time=time(9, 0)).update(practice_area=area)
+
+        for ordering in ('practice_area', '-practice_area'):
+            response = self.client.get(f'/api/appointments/?ordering={ordering}')
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertEqual(data['count'], 24)
+
+    def test_wrongly_typed_cursor_is_404(self):
+        for values in (['2026-13-45', '10:00', str(uuid.uuid4())], [5, '10:00', str(uuid.uuid4())],
+                       [None, '10:00', str(uuid.uuid4())], ['2026-01-01', [], str(uuid.uuid4())]):
+            cursor = base64.urlsafe_b64encode(json.dumps({'v': values, 'r': 0}).encode()).decode()
+            self.assertEqual(self.client.get(f'/api/appointments/?cursor={cursor}').status_code, 404, values)
+
+
+def make_image(width, height, fmt='JPEG', mode='RGB', exif=None):
+    buffer = BytesIO()
+    options = {'exif': exif} if exif is not None else {}
+    Image.new(mode, (width, height), (180, 120, 40) if mode == 'RGB' else (180, 120, 40, 100)).save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+@override_settings(
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+        'image_staging': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    IMAGE_DERIVATIVE_WIDTHS=(320, 640, 1024),
+    IMAGE_DERIVATIVE_FORMATS=('webp',),
+)
+class ImageDerivativeTest(TestCase):
+    """Uploads are rendered into width-bounded WebP and fallback copies exposed as srcsets"""
+
+    def setUp(self):
+        cache.clear()
+
+    def create_attorney(self, data, name='jane.jpg'):
+        attorney = Attorney.objects.create(
+            full_name="Jane Doe", job_title="Partner", photo=SimpleUploadedFile(name, data),
+        )
+        self.process_queue()
+        attorney.refresh_from_db()
+        return attorney
+
+    def process_queue(self):
+        # In this thread, since TestCase data is invisible to the worker pool's connections
+        for job in image_queue.claim_due(100):
+            image_queue.process_job(job)
+
+    def test_upload_is_rendered_at_bounded_widths(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera Maker'
+        attorney = self.create_attorney(make_image(800, 400, exif=exif.tobytes()))
+        attorney.refresh_from_db()
+
+        formats = attorney.photo_derivatives['formats']
+        self.assertEqual(attorney.photo_derivatives['source'], attorney.photo.name)
+        self.assertEqual(set(formats), {'webp', 'jpeg'})
+        # 1024 would upscale, so the largest copy is the original width
+        self.assertEqual(list(formats['webp']), ['320', '640', '800'])
+
+        with default_storage.open(formats['jpeg']['320']) as derivative:
+            image = Image.open(derivative)
+            self.assertEqual(image.size, (320, 160))
+            self.assertEqual(dict(image.getexif()), {})
+
+    def test_size_and_placeholder_are_stored_upright(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotate 90 degrees on display
+        attorney = self.create_attorney(make_image(800, 400, exif=exif.tobytes()))
+
+        self.assertEqual((attorney.photo_width, attorney.photo_height), (400, 800))
+        self.assertTrue(attorney.photo_placeholder.startswith('data:image/webp;base64,'))
+        self.assertLess(len(attorney.photo_placeholder), 400)
+        with Image.open(BytesIO(base64.b64decode(attorney.photo_placeholder.split(',')[1]))) as preview:
+            self.assertEqual(preview.size, (8, 16))
+
+        data = self.client.get(f'/api/attorneys/{attorney.slug}/').json()
+        self.assertEqual((data['photo_width'], data['photo_height']), (400, 800))
+        self.assertEqual(data['photo_placeholder'], attorney.photo_placeholder)
+
+    def test_transparent_images_fall_back_to_png(self):
+        attorney = self.create_attorney(make_image(200, 200, 'PNG', 'RGBA'), name='logo.png')
+        attorney.refresh_from_db()
+        self.assertEqual(set(attorney.photo_derivatives['formats']), {'webp', 'png'})
+        self.assertEqual(list(attorney.photo_derivatives['formats']['png']), ['200'])
+
+    def test_serializer_exposes_srcset(self):
+        attorney = self.create_attorney(make_image(700, 700))
+
+        data = self.client.get(f'/api/attorneys/{attorney.slug}/').json()
+        self.assertEqual(list(data['photo_srcset']['webp']), ['320', '640', '700'])
+        self.assertTrue(data['photo_srcset']['jpeg']['320'].endswith('-320w.jpg'))
+
+    def test_replacing_the_upload_replaces_derivatives(self):
+        attorney = self.create_attorney(make_image(700, 700))
+        old_names = list(attorney.photo_derivatives['formats']['webp'].values())
+
+        attorney.photo = SimpleUploadedFile('jane-new.jpg', make_image(500, 500))
+        attorney.save()
+        self.process_queue()
+        attorney.refresh_from_db()
+
+        self.assertEqual(list(attorney.photo_derivatives['formats']['webp']), ['320', '500'])
+        self.assertFalse(any(default_storage.exists(name) for name in old_names))
+
+    def test_unreadable_upload_keeps_serving_the_original(self):
+        attorney = self.create_attorney(b'not an image')
+        attorney.refresh_from_db()
+
+        self.assertIn('error', attorney.photo_derivatives)
+        self.assertEqual(attorney.photo_state, 'failed')
+        data = self.client.get(f'/api/attorneys/{attorney.slug}/').json()
+        self.assertIsNone(data['photo_srcset'])
+        self.assertTrue(data['photo_url'])
+
+    def test_backfill_command_processes_existing_media(self):
+        default_storage.save('attorneys/legacy.jpg', BytesIO(make_image(400, 300)))
+        attorney = Attorney.objects.create(full_name="Legacy", job_title="Partner", photo='attorneys/legacy.jpg')
+        Attorney.objects.filter(pk=attorney.pk).update(photo_derivatives={})
+
+        out = StringIO()
+        call_command('generate_image_derivatives', stdout=out)
+
+        self.assertIn('Attorney.photo: 1 processed, 0 failed', out.getvalue())
+        attorney.refresh_from_db()
+        self.assertEqual(list(attorney.photo_derivatives['formats']['webp']), ['320', '400'])
+
+
+class ImageQueueTest(TransactionTestCase):
+    """Uploads are parked in staging by the request and finished by the worker pool"""
+
+    def setUp(self):
+        cache.clear()
+        media = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(self.settings(
+            STORAGES={
+                'default': {
+                    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                    'OPTIONS': {'location': f'{media}/media', 'base_url': '/media/'},
+                },
+                'image_staging': {
+                    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                    'OPTIONS': {'location': f'{media}/staging', 'base_url': '/media/staging/'},
+                },
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+            IMAGE_DERIVATIVE_WIDTHS=(320,),
+            IMAGE_DERIVATIVE_FORMATS=('webp',),
+        ))
+        exif = Image.Exif()
+        exif[0x8825] = {0x0002: (27.0, 42.0, 0.0)}  # GPS latitude
+        self.upload = make_image(600, 400, exif=exif.tobytes())
+
+    def test_save_parks_the_upload_and_serves_it_from_staging(self):
+        attorney = Attorney.objects.create(
+            full_name="Jane Doe", job_title="Partner", photo=SimpleUploadedFile('jane.jpg', self.upload),
+        )
+
+        self.assertEqual(attorney.photo_state, 'pending')
+        self.assertEqual((attorney.photo_width, attorney.photo_height), (600, 400))
+        self.assertTrue(images.staging_storage().exists(attorney.photo.name))
+        self.assertFalse(default_storage.exists(attorney.photo.name))
+        self.assertEqual(image_queue.queue_depth()['pending'], 1)
+
+        data = self.client.get(f'/api/attorneys/{attorney.slug}/').json()
+        self.assertEqual(data['photo_url'], f'http://testserver/media/staging/{attorney.photo.name}')
+        self.assertEqual(data['photo'], data['photo_url'])
+        self.assertIsNone(data['photo_srcset'])
+
+    def test_worker_uploads_cleans_and_renders(self):
+        attorney = Attorney.objects.create(
+            full_name="Jane Doe", job_title="Partner", photo=SimpleUploadedFile('jane.jpg', self.upload),
+        )
+        staged_name = attorney.photo.name
+
+        processed = image_queue.drain(workers=2)
+
+        self.assertEqual([job.status for job in processed], ['done'])
+        attorney.refresh_from_db()
+        self.assertEqual(attorney.photo_state, 'ready')
+        self.assertFalse(images.staging_storage().exists(staged_name))
+        with default_storage.open(attorney.photo.name) as original:
+            image = Image.open(original)
+            self.assertEqual(image.size, (600, 400))
+            self.assertEqual(dict(image.getexif()), {})
+
+        data = self.client.get(f'/api/attorneys/{attorney.slug}/').json()
+        self.assertEqual(data['photo_url'], f'http://testserver/media/{attorney.photo.name}')
+        self.assertEqual(list(data['photo_srcset']['webp']), ['320'])
+
+    def test_replaced_upload_supersedes_the_queued_one(self):
+        attorney = Attorney.objects.create(
+            full_name="Jane Doe", job_title="Partner", photo=SimpleUploadedFile('jane.jpg', self.upload),
+        )
+        first_name = attorney.photo.name
+        attorney.photo = SimpleUploadedFile('jane-2.jpg', make_image(300, 300))
+        attorney.save()
+
+        processed = image_queue.drain(workers=1)
+
+        self.assertEqual(sorted(job.last_error for job in processed), ['', 'Superseded'])
+        self.assertFalse(images.staging_storage().exists(first_name))
+        attorney.refresh_from_db()
+        self.assertEqual((attorney.photo_state, list(attorney.photo_derivatives['formats']['jpeg'])), ('ready', ['300']))
+
+    def test_files_are_processed_outside_transactions(self):
+        Attorney.objects.create(
+            full_name="Jane Doe", job_title="Partner", photo=SimpleUploadedFile('jane.jpg', self.upload),
+        )
+        in_transaction = []
+        save = FileSystemStorage.save
+
+        def recording_save(storage, *args, **kwargs):
+            in_transaction.append(connection.in_atomic_block)
+            return save(storage, *args, **kwargs)
+
+        with mock.patch.object(FileSystemStorage, 'save', recording_save):
+            processed = image_queue.drain(workers=1)
+
+        self.assertEqual([job.status for job in processed], ['done'])
+        self.assertTrue(in_transaction)
+        self.assertNotIn(True, in_transaction)
+
+    def test_upload_replaced_during_processing_is_discarded(self):
+        attorney = Attorney.objects.create(
+            full_name="Jane Doe", job_title="Partner", photo=SimpleUploadedFile('jane.jpg', self.upload),
+        )
+        refresh = images.refresh_derivatives
+
+        def replace_meanwhile(instance, field_name, data=None):
+            result = refresh(instance, field_name, data)
+            Attorney.objects.filter(pk=attorney.pk).update(photo='attorneys/newer.jpg')
+            return result
+
+        with mock.patch.object(images, 'refresh_derivatives', replace_meanwhile):
+            processed = image_queue.drain(workers=1)
+
+        job = processed[0]
+        self.assertEqual((job.status, job.last_error), ('done', 'Superseded'))
+        attorney.refresh_from_db()
+        self.assertEqual((attorney.photo.name, attorney.photo_state), ('attorneys/newer.jpg', 'pending'))
+        self.assertEqual([files for _, _, files in os.walk(default_storage.location) if files], [])
+        self.assertFalse(images.staging_storage().exists(job.source_name))
+
+    def test_storage_errors_are_retried(self):
+        attorney = Attorney.objects.create(
+            full_name="Jane Doe", job_title="Partner", photo=SimpleUploadedFile('jane.jpg', self.upload),
+        )
+
+        with mock.patch('django.core.files.storage.FileSystemStorage.save', side_effect=OSError("bucket unavailable")):
+            processed = image_queue.drain(workers=1)
+
+        job = processed[0]
+        self.assertEqual((job.status, job.attempts), ('pending', 1))
+        self.assertIn('bucket unavailable', job.last_error)
+        attorney.refresh_from_db()
+        self.assertEqual(attorney.photo_state, 'pending')
+
+
+class SlugAllocationTest(TestCase):
+    """Slugs are allocated from one lookup per base rather than one query per taken candidate"""
+
+    def slug_queries(self, queries):
+        return [q for q in queries.captured_queries if 'LIKE' in q['sql']]
+
+    def test_duplicates_get_the_next_suffix_in_one_query(self):
+        for _ in range(5):
+            PracticeArea.objects.create(name="Tax Law", description="<p>Tax</p>")
+
+        with CaptureQueriesContext(connection) as queries:
+            area = PracticeArea.objects.create(name="Tax Law", description="<p>Tax</p>")
+
+        self.assertEqual(area.slug, 'tax-law-5')
+        self.assertEqual(len(self.slug_queries(queries)), 1)
+        self.assertEqual(
+            sorted(PracticeArea.objects.values_list('slug', flat=True)),
+            ['tax-law', 'tax-law-1', 'tax-law-2', 'tax-law-3', 'tax-law-4', 'tax-law-5'],
+        )
+
+    def test_gaps_and_lookalike_slugs(self):
+        PracticeArea.objects.create(name="Tax Law", slug='tax-law-2', description="")
+        PracticeArea.objects.create(name="Tax Law 2024", slug='tax-law-2024-1', description="")
+
+        self.assertEqual(PracticeArea.objects.create(name="Tax Law", description="").slug, 'tax-law')
+        self.assertEqual(PracticeArea.objects.create(name="Tax Law", description="").slug, 'tax-law-1')
+        self.assertEqual(PracticeArea.objects.create(name="Tax Law", description="").slug, 'tax-law-3')
+
+    def test_bulk_allocation_is_one_query(self):
+        PracticeArea.objects.create(name="Family Law", description="")
+        PracticeArea.objects.create(name="Family Law", slug='family-law-3', description="")
+        areas = [PracticeArea(name="Family Law" if i % 2 else f"Area {i % 10}", description="") for i in range(1000)]
+
+        with CaptureQueriesContext(connection) as queries:
+            assign_unique_slugs(areas, lambda area: slugify(area.name))
+
+        self.assertEqual(len(queries), 1)
+        slugs = [area.slug for area in areas]
+        self.assertEqual(len(set(slugs)), 1000)
+        self.assertEqual(slugs[1:8:2], ['family-law-1', 'family-law-2', 'family-law-4', 'family-law-5'])
+        PracticeArea.objects.bulk_create(areas)
+
+    def test_collision_with_a_concurrent_save_is_retried(self):
+        PracticeArea.objects.create(name="Labour Law", description="")
+        real_unique_slug = slugs.unique_slug
+        # The first lookup misses the row another request just inserted
+        picks = iter(['labour-law'])
+
+        def stale_then_real(instance, base, field='slug'):
+            return next(picks, None) or real_unique_slug(instance, base, field)
+
+        with mock.patch('pages.slugs.unique_slug', side_effect=stale_then_real):
+            area = PracticeArea.objects.create(name="Labour Law", description="")
+
+        self.assertEqual(area.slug, 'labour-law-1')
+
+    def test_long_titles_are_clamped_only_for_a_suffix(self):
+        first = PracticeArea.objects.create(name="x" * 250, description="")
+        second = PracticeArea.objects.create(name="x" * 250, description="")
+        third = PracticeArea.objects.create(name="x" * 300, description="")
+        self.assertEqual(first.slug, "x" * 250)
+        self.assertEqual(second.slug, "x" * (255 - slugs.SUFFIX_ROOM) + '-1')
+        self.assertEqual(third.slug, "x" * 255)
+
+        areas = [PracticeArea(name="x" * 250, description="") for _ in range(2)]
+        assign_unique_slugs(areas, lambda area: slugify(area.name))
+        self.assertEqual([area.slug[-2:] for area in areas], ['-2', '-3'])
+
+    def test_bulk_allocation_skips_suffixes_taken_in_the_batch(self):
+        areas = [PracticeArea(name=name, description="") for name in ("Tax Law 1", "Tax Law", "Tax Law", "Tax Law")]
+        assign_unique_slugs(areas, lambda area: slugify(area.name))
+        self.assertEqual([area.slug for area in areas], ['tax-law-1', 'tax-law', 'tax-law-2', 'tax-law-3'])
+
+
+class ContentTransferTest(TestCase):
+    """export_content/import_content round trip and upsert"""
+
+    def setUp(self):
+        self.area = PracticeArea.objects.create(name="Tax Law", description="<p>Tax</p>", featured_image='practice_areas/tax.jpg')
+        PracticeAreaImage.objects.create(practice_area=self.area, image='practice_areas/gallery/office.jpg', title="Office")
+        Attorney.objects.create(full_name="Jane Doe", job_title="Partner", photo='attorneys/jane.jpg')
+        self.blog = Blog.objects.create(
+            title="Filing Taxes", author="Jane", excerpt="How to file", content="<h2>Deadlines</h2><p>File by April</p>",
+        )
+        Blog.objects.filter(pk=self.blog.pk).update(published_date=date(2024, 3, 1))
+
+    def export(self, **options):
+        out = StringIO()
+        with mock.patch('sys.stderr', StringIO()):
+            call_command('export_content', stdout=out, **options)
+        return out.getvalue()
+
+    def import_lines(self, lines, **options):
+        path = tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False, encoding='utf-8')
+        self.addCleanup(os.remove, path.name)
+        with path:
+            path.write(lines if isinstance(lines, str) else ''.join(json.dumps(line) + '\n' for line in lines))
+        out = StringIO()
+        call_command('import_content', path.name, stdout=out, **options)
+        return out.getvalue()
+
+    def test_round_trip_into_an_empty_database(self):
+        exported = self.export()
+        self.assertEqual(
+            [json.loads(line)['model'] for line in exported.splitlines()],
+            ['pages.practicearea', 'pages.practiceareaimage', 'pages.attorney', 'pages.blog'],
+        )
+        for model in (Blog, Attorney, PracticeArea):
+            model.objects.all().delete()
+        ImageJob.objects.all().delete()
+
+        output = self.import_lines(exported)
+
+        self.assertIn("Blog: 1 created, 0 updated", output)
+        area = PracticeArea.objects.get(slug='tax-law')
+        self.assertEqual(area.gallery_images.get().image.name, 'practice_areas/gallery/office.jpg')
+        blog = Blog.objects.get(slug='filing-taxes')
+        self.assertEqual(blog.published_date, date(2024, 3, 1))
+        # What Blog.save would have derived
+        self.assertEqual(blog.toc, [{'level': 2, 'text': 'Deadlines', 'id': 'deadlines'}])
+        self.assertEqual(blog.word_count, 4)
+        self.assertEqual([hit.id for hit in blog_search.search('april')], [blog.pk])
+        # Media is referenced by name and processed later by the image worker
+        self.assertEqual(
+            sorted(ImageJob.objects.values_list('model_label', 'source_name')),
+            [('pages.Attorney', 'attorneys/jane.jpg'), ('pages.PracticeArea', 'practice_areas/tax.jpg'),
+             ('pages.PracticeAreaImage', 'practice_areas/gallery/office.jpg')],
+        )
+
+    def test_upsert_by_slug(self):
+        output = self.import_lines([
+            {'model': 'pages.blog', 'fields': {'slug': 'filing-taxes', 'excerpt': "Updated"}},
+            {'model': 'pages.blog', 'fields': {'title': "Filing Taxes Abroad", 'author': "Jane", 'excerpt': "e", 'content': "<p>x</p>"}},
+            {'model': 'pages.practiceareaimage', 'fields': {'practice_area': 'tax-law', 'image': 'practice_areas/gallery/office.jpg', 'order': 3}},
+        ])
+
+        self.assertIn("Blog: 1 created, 1 updated", output)
+        self.assertIn("PracticeAreaImage: 0 created, 1 updated", output)
+        self.blog.refresh_from_db()
+        self.assertEqual((self.blog.excerpt, self.blog.title), ("Updated", "Filing Taxes"))
+        self.assertTrue(Blog.objects.filter(slug='filing-taxes-abroad').exists())
+        self.assertEqual(PracticeAreaImage.objects.get().order, 3)
+        # The gallery image is still queued from its save and is not queued twice
+        self.assertEqual(ImageJob.objects.filter(model_label='pages.PracticeAreaImage').count(), 1)
+
+    def test_bulk_import_query_count(self):
+        def run(count):
+            records = [
+                {'model': 'pages.attorney', 'fields': {'full_name': "Associate", 'job_title': "Associate", 'photo': f'attorneys/{i}.jpg'}}
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                self.import_lines(records, batch_size=500)
+            return len(queries)
+
+        # Saving one by one would take several queries per attorney; SQLite splits large inserts a little
+        self.assertLess(run(200), 20)
+        self.assertEqual(run(5), 6)
+        self.assertEqual(Attorney.objects.filter(slug__startswith='associate').count(), 205)
+
+    def test_bad_record_names_its_line(self):
+        with self.assertRaisesMessage(CommandError, "Line 2: no PracticeArea with slug 'missing'"):
+            self.import_lines([
+                {'model': 'pages.practicearea', 'fields': {'slug': 'new-area', 'name': "New", 'description': "<p>New</p>"}},
+                {'model': 'pages.practiceareaimage', 'fields': {'practice_area': 'missing', 'image': 'x.jpg'}},
+            ], batch_size=1)
+        # Batches before the failing record are kept
+        self.assertTrue(PracticeArea.objects.filter(slug='new-area').exists())
+
+
+class ExportTest(TestCase):
+    """Streaming CSV/XLSX exports from the admin and the staff API"""
+
+    def setUp(self):
+        self.staff = User.objects.create_user('staff', password='pw', is_staff=True, is_superuser=True)
+        area = PracticeArea.objects.create(name="Tax Law", description="<p>Tax</p>")
+        for day in (1, 15, 28):
+            Appointment.objects.create(
+                client_name=f"Client {day}", client_email='c@example.com', client_phone='123',
+                practice_area=area, appointment_date=date(2025, 2, day), appointment_time=time(9, 30),
+                status='confirmed', notes="=HYPERLINK(\"http://evil\")",
+            )
+        Appointment.objects.create(
+            client_name="March", client_email='m@example.com', client_phone='123',
+            appointment_date=date(2025, 3, 3), appointment_time=time(14, 0),
+        )
+        ContactMessage.objects.create(name="Reader", email='r@example.com', message="Hello")
+        self.client.force_login(self.staff)
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(StringIO(content)))
+
+    def read_xlsx(self, response):
+        self.assertTrue(response.streaming)
+        archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertIn('xl/workbook.xml', archive.namelist())
+        ns = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        return [
+            [''.join(cell.itertext()) for cell in row.findall('s:c', ns)]
+            for row in sheet.iterfind('s:sheetData/s:row', ns)
+        ]
+
+    def test_staff_only(self):
+        self.client.logout()
+        self.assertIn(self.client.get('/api/appointments/export/').status_code, (401, 403))
+        User.objects.create_user('visitor', password='pw')
+        self.client.login(username='visitor', password='pw')
+        self.assertEqual(self.client.get('/api/contact/export/').status_code, 403)
+
+    def test_csv_is_filtered_and_streamed_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/appointments/export/', {'date_from': '2025-02-01', 'date_to': '2025-02-28'})
+            rows = self.read_csv(response)
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="appointments-', response['Content-Disposition'])
+        self.assertEqual(rows[0][:3], ['ID', 'Client', 'Email'])
+        self.assertEqual([row[1] for row in rows[1:]], ['Client 1', 'Client 15', 'Client 28'])
+        self.assertEqual(rows[1][4:9], ['Tax Law', '2025-02-01', '09:30', '60', 'Confirmed'])
+        # Formulas typed into a public form are not run by spreadsheet apps
+        self.assertTrue(rows[1][10].startswith("'="))
+        self.assertEqual(len([q for q in queries.captured_queries if 'pages_appointment' in q['sql']]), 1)
+
+    def test_xlsx(self):
+        response = self.client.get('/api/appointments/export/', {'filetype': 'xlsx', 'status': 'pending'})
+        rows = self.read_xlsx(response)
+
+        self.assertEqual(response['Content-Disposition'][-6:], '.xlsx"')
+        self.assertEqual(rows[0][1], 'Client')
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], 'March')
+        # Dates are stored as spreadsheet day numbers
+        self.assertEqual(rows[1][5], str((date(2025, 3, 3) - date(1899, 12, 30)).days))
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/appointments/export/', {'filetype': 'pdf'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/appointments/export/', {'date_from': '03/2025'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/contact/export/', {'is_read': 'maybe'}).status_code, 400)
+
+        rows = self.read_csv(self.client.get('/api/contact/export/', {'is_read': 'false'}))
+        self.assertEqual([row[1] for row in rows[1:]], ['Reader'])
+
+    def test_admin_actions(self):
+        ids = list(Appointment.objects.filter(status='confirmed').values_list('pk', flat=True))
+        response = self.client.post('/admin/pages/appointment/', {'action': 'export_csv', '_selected_action': ids})
+        self.assertEqual(len(self.read_csv(response)), 4)
+
+        response = self.client.post('/admin/pages/contactmessage/', {
+            'action': 'export_xlsx', '_selected_action': list(ContactMessage.objects.values_list('pk', flat=True)),
+        })
+        self.assertEqual(self.read_xlsx(response)[1][1], 'Reader')
+
+
+class AppointmentQueryPlanTest(TestCase):
+    """The occupancy lookup of active appointments is answered from the Appointment status/date index"""
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            # Scanning a near-empty test table is cheaper; show the plan the planner picks at scale
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_booked_appointments_use_the_covering_index(self):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.skipTest("Plan format is database specific")
+        index = next(index.name for index in Appointment._meta.indexes if index.fields[0] == 'status')
+        start = date(2025, 3, 3)
+
+        for end in (start, start + timedelta(days=30)):
+            plan = self.explain(booked_appointments(start, end))
+            self.assertIn(index, plan)
+            if connection.vendor == 'sqlite':
+                self.assertIn('COVERING INDEX', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+            else:
+                self.assertIn('Index Only Scan', plan)
+
+
+class DayOccupancyTest(BookingMixin, TestCase):
+    """The per-date occupancy bitmap follows every appointment change"""
+
+    def setUp(self):
+        create_weekday_schedule()
+        self.monday = next_weekday(0)
+        self.tuesday = self.monday + timedelta(days=1)
+
+    def occupied(self, day):
+        return occupancy_by_date(day, day).get(day, 0)
+
+    def test_bitmap_follows_bookings(self):
+        appointment = self.book(time(10, 0), 60)
+        self.book(time(14, 0), 30)
+        self.assertEqual(
+            self.occupied(self.monday),
+            span_mask(reservation_units(time(10, 0), 60)) | span_mask(reservation_units(time(14, 0), 30)),
+        )
+
+        appointment.status = 'cancelled'
+        appointment.save()
+        self.assertEqual(self.occupied(self.monday), span_mask(reservation_units(time(14, 0), 30)))
+
+        appointment.status = 'confirmed'
+        appointment.appointment_date = self.tuesday
+        appointment.save()
+        self.assertEqual(self.occupied(self.tuesday), span_mask(reservation_units(time(10, 0), 60)))
+
+        appointment.delete()
+        self.assertEqual(self.occupied(self.tuesday), 0)
+
+    def test_slots_are_read_from_the_bitmap(self):
+        self.book(time(10, 0), 60)
+        with CaptureQueriesContext(connection) as queries:
+            slots = get_available_slots(self.monday, 60)
+
+        self.assertNotIn(time(10, 0), slots)
+        self.assertIn(time(11, 0), slots)
+        self.assertTrue(all('"pages_appointment"' not in q['sql'] for q in queries.captured_queries))
+
+    def test_rebuild_repairs_drift(self):
+        appointment = self.book(time(10, 0), 60)
+        self.book(time(9, 0), 30, appointment_date=self.tuesday)
+        # update() skips the signals that keep the bitmap in step
+        Appointment.objects.filter(pk=appointment.pk).update(status='cancelled')
+        self.assertNotEqual(self.occupied(self.monday), 0)
+
+        out = StringIO()
+        call_command('rebuild_occupancy', stdout=out)
+
+        self.assertEqual(self.occupied(self.monday), 0)
+        self.assertEqual(self.occupied(self.tuesday), span_mask(reservation_units(time(9, 0), 30)))
+        self.assertIn("Checked 2 day(s), repaired 1", out.getvalue())
+
+
+class AvailabilityCacheTest(BookingMixin, TestCase):
+    """available_slots and available_dates are cached until a date they cover or the schedule changes"""
+
+    def setUp(self):
+        cache.clear()
+        create_weekday_schedule()
+        self.monday = next_weekday(0)
+        self.tuesday = self.monday + timedelta(days=1)
+        self.next_monday = self.monday + timedelta(weeks=1)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def slots(self, day):
+        return self.get(f'/api/appointments/available_slots/?date={day.isoformat()}')
+
+    def test_repeat_requests_are_served_without_queries(self):
+        first, _ = self.slots(self.monday)
+        second, queries = self.slots(self.monday)
+        self.assertEqual(first, second)
+        self.assertEqual(queries, 0)
+
+        first, _ = self.get('/api/appointments/available_dates/?days_ahead=30')
+        second, queries = self.get('/api/appointments/available_dates/?days_ahead=30')
+        self.assertEqual(first, second)
+        self.assertEqual(queries, 0)
+
+    def test_booking_invalidates_only_its_week(self):
+        monday, _ = self.slots(self.monday)
+        self.slots(self.next_monday)
+        dates, _ = self.get('/api/appointments/available_dates/?days_ahead=30')
+
+        appointment = self.book(time(10, 0))
+
+        updated, queries = self.slots(self.monday)
+        self.assertGreater(queries, 0)
+        self.assertEqual(updated['count'], monday['count'] - 3)
+        _, queries = self.slots(self.next_monday)
+        self.assertEqual(queries, 0)
+        updated_dates, _ = self.get('/api/appointments/available_dates/?days_ahead=30')
+        counts = {entry['date']: entry['slots_count'] for entry in updated_dates['available_dates']}
+        self.assertEqual(counts[self.monday.isoformat()], monday['count'] - 3)
+        self.assertNotEqual(updated_dates, dates)
+
+        appointment.delete()
+        self.assertEqual(self.slots(self.monday)[0], monday)
+
+    def test_year_long_range_fits_a_small_cache(self):
+        with self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'OPTIONS': {'MAX_ENTRIES': 300},
+        }}):
+            first, _ = self.get('/api/appointments/available_dates/?days_ahead=365')
+            second, queries = self.get('/api/appointments/available_dates/?days_ahead=365')
+
+        self.assertEqual(first, second)
+        self.assertEqual(queries, 0)
+
+    def test_horizon_beyond_a_year_is_rejected(self):
+        response = self.client.get('/api/appointments/available_dates/?days_ahead=367')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('366', response.json()['error'])
+
+        # The limit itself is served in full, up to the last weekday of the horizon
+        last_day = date.today() + timedelta(days=366)
+        while last_day.weekday() >= 5:
+            last_day -= timedelta(days=1)
+        data, _ = self.get('/api/appointments/available_dates/?days_ahead=366')
+        self.assertEqual(data['available_dates'][-1]['date'], last_day.isoformat())
+
+    def test_schedule_change_invalidates_everything(self):
+        self.slots(self.tuesday)
+        AvailableHours.objects.create(
+            day=AppointmentDay.objects.get(day_of_week=1), start_time=time(18, 0), end_time=time(19, 0),
+        )
+
+        data, queries = self.slots(self.tuesday)
+        self.assertGreater(queries, 0)
+        self.assertIn('18:00', data['available_slots'])
+
+    def test_entries_expire_at_midnight(self):
+        self.assertEqual(cache_timeout(datetime(2026, 10, 18, 23, 59, 30)), 30)
+        self.assertEqual(cache_timeout(datetime(2026, 10, 18, 23, 59, 59, 900000)), 1)
+        with override_settings(API_RESPONSE_CACHE_TIMEOUT=600):
+            self.assertEqual(cache_timeout(datetime(2026, 10, 18, 9, 0)), 600)
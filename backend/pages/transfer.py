@@ -0,0 +1,262 @@
+"""
+Content transfer between environments as JSON Lines.
+
+export_content writes one object per row:
+
+    {"model": "pages.blog", "fields": {"slug": "...", "title": "...", "featured_image": "blogs/a.jpg", ...}}
+
+Practice areas come before their gallery images, which refer to the area
+by slug. Images are written as storage names, not bytes: the environments
+are expected to share (or have synced) the media storage, and imported
+images are queued for the image worker, which renders derivatives and
+placeholders later.
+
+import_content upserts rows by natural key (the slug; area and image name
+for gallery images) in batches of bulk_create/bulk_update. Fields missing
+from a record keep their current value, or the default for new rows; new
+rows without a slug get one from pages.slugs. Bulk writes skip save() and
+signals, so each batch does what they would: runs the blog content
+pipeline, indexes blogs for search, touches gallery parents and queues
+images. Only one batch is held in memory at a time, and each commits on
+its own: a bad record stops the import, keeping the batches before it.
+"""
+import json
+from collections import Counter, namedtuple
+
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+from blogs import search as blog_search
+
+from . import content as content_pipeline
+from . import image_queue, images
+from .response_cache import invalidate_namespace
+from .slugs import assign_unique_slugs
+
+
+# `key` identifies a row across environments; relations are written as the related row's slug
+TransferSpec = namedtuple('TransferSpec', ['label', 'key', 'fields', 'namespace'])
+
+SPECS = [
+    TransferSpec(
+        'pages.PracticeArea', ('slug',), ['slug', 'name', 'description', 'featured_image'], 'practice-areas',
+    ),
+    TransferSpec(
+        'pages.PracticeAreaImage', ('practice_area', 'image'),
+        ['practice_area', 'image', 'title', 'description', 'order'], 'practice-areas',
+    ),
+    TransferSpec(
+        'pages.Attorney', ('slug',),
+        ['slug', 'full_name', 'job_title', 'short_bio', 'professional_background', 'email', 'phone', 'photo',
+         'order', 'is_active', 'specializations'],
+        'attorneys',
+    ),
+    TransferSpec(
+        'pages.Blog', ('slug',),
+        ['slug', 'title', 'author', 'featured_image', 'excerpt', 'content', 'category', 'published_date',
+         'is_published'],
+        'blogs',
+    ),
+]
+SPECS_BY_NAME = {spec.label.lower(): spec for spec in SPECS}
+
+
+class ImportFailed(Exception):
+    """Raised for a record that cannot be imported; the message names its line"""
+
+
+def _column(value):
+    # Files compare and serialize by their storage name
+    return value.name if isinstance(value, FieldFile) else value
+
+
+def export_records(labels=None, chunk_size=500):
+    """Yield the export records of the models in `labels` (all by default), streaming from the database"""
+    for spec in SPECS:
+        if labels and spec.label.lower() not in labels:
+            continue
+        model = apps.get_model(spec.label)
+        lookups = [
+            f'{name}__slug' if model._meta.get_field(name).is_relation else name for name in spec.fields
+        ]
+        rows = model._default_manager.order_by('pk').values_list(*lookups)
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield {'model': spec.label.lower(), 'fields': dict(zip(spec.fields, row))}
+
+
+def write_jsonl(records, stream):
+    count = 0
+    for record in records:
+        stream.write(json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def read_jsonl(stream):
+    """Yield (line number, record) for each non-blank line"""
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            raise ImportFailed(f"Line {number}: invalid JSON ({e})") from e
+
+
+class Importer:
+    """Buffers records of one model at a time and writes them a batch at a time"""
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+        self.spec = None
+        self.pending = []
+        self.created = Counter()
+        self.updated = Counter()
+        self.namespaces = set()
+
+    def feed(self, number, record):
+        name = str(record.get('model', '')).lower() if isinstance(record, dict) else ''
+        spec = SPECS_BY_NAME.get(name)
+        if spec is None or not isinstance(record.get('fields'), dict):
+            raise ImportFailed(f"Line {number}: expected {{\"model\": ..., \"fields\": {{...}}}} for one of "
+                               f"{', '.join(SPECS_BY_NAME)}")
+        if spec is not self.spec or len(self.pending) >= self.batch_size:
+            self.flush()
+        self.spec = spec
+        self.pending.append((number, record['fields']))
+
+    def run(self, records):
+        for number, record in records:
+            self.feed(number, record)
+        self.flush()
+        for namespace in self.namespaces:
+            invalidate_namespace(namespace)
+        return self
+
+    def flush(self):
+        if not self.pending:
+            return
+        spec, pending = self.spec, self.pending
+        self.pending = []
+        model = apps.get_model(spec.label)
+        try:
+            with transaction.atomic():
+                created, updated = self._write(spec, model, pending)
+        except IntegrityError as e:
+            raise ImportFailed(f"Lines {pending[0][0]}-{pending[-1][0]}: {e}") from e
+        self.created[model.__name__] += created
+        self.updated[model.__name__] += updated
+        self.namespaces.add(spec.namespace)
+
+    def _resolve(self, model, spec, pending):
+        """Turn each record into {attname: value}, replacing related slugs with primary keys"""
+        fields = {name: model._meta.get_field(name) for name in spec.fields}
+        related = {}
+        for name, field in fields.items():
+            if field.is_relation:
+                slugs = {values[name] for _, values in pending if values.get(name)}
+                related[name] = dict(
+                    field.related_model._default_manager.filter(slug__in=slugs).values_list('slug', 'pk')
+                )
+
+        resolved = []
+        for number, values in pending:
+            row = {}
+            for name, value in values.items():
+                if name not in fields:
+                    raise ImportFailed(f"Line {number}: {spec.label} has no importable field {name!r}")
+                if name in related:
+                    if value not in related[name]:
+                        raise ImportFailed(f"Line {number}: no {fields[name].related_model.__name__} with slug {value!r}")
+                    value = related[name][value]
+                row[fields[name].attname] = value
+            resolved.append((number, row))
+        return resolved
+
+    def _write(self, spec, model, pending):
+        fields = [model._meta.get_field(name) for name in spec.fields]
+        key = [model._meta.get_field(name).attname for name in spec.key]
+        image_names = images.image_fields(model)
+        resolved = self._resolve(model, spec, pending)
+
+        # One query for the rows that already exist; keyless records are always new
+        keyed = [row for _, row in resolved if all(row.get(attname) for attname in key)]
+        existing = {}
+        if keyed:
+            condition = Q(**{f'{attname}__in': {row[attname] for row in keyed} for attname in key})
+            loaded = [field.attname for field in fields]
+            for name in image_names:
+                loaded += [images.state_field(name), *images.metadata_fields(name)]
+            for obj in model._default_manager.filter(condition).only('pk', *loaded):
+                existing[tuple(_column(getattr(obj, attname)) for attname in key)] = obj
+
+        # Validate only what the import sets; other columns may be deferred
+        skipped = {field.name for field in model._meta.fields} - set(spec.fields)
+        batch = {}
+        for number, row in resolved:
+            row_key = tuple(row.get(attname) for attname in key)
+            obj = existing.get(row_key) or batch.get(row_key) or model()
+            previous = {name: getattr(obj, name).name for name in image_names}
+            for attname, value in row.items():
+                setattr(obj, attname, value)
+            for name in image_names:
+                if getattr(obj, name).name != previous[name]:
+                    # Derivatives stay on record so the worker can delete them when it replaces them
+                    setattr(obj, images.state_field(name), 'ready')
+                    for column in images.metadata_fields(name)[1:]:
+                        setattr(obj, column, model._meta.get_field(column).get_default())
+            try:
+                obj.clean_fields(exclude=skipped | {name for name, attname in zip(spec.key, key) if not row.get(attname)})
+            except Exception as e:
+                raise ImportFailed(f"Line {number}: {e}") from e
+            batch[row_key if all(row_key) else (number,)] = obj
+
+        objs = list(batch.values())
+        created = [obj for obj in objs if obj.pk is None]
+        updated = [obj for obj in objs if obj.pk is not None]
+        if 'slug' in spec.key:
+            assign_unique_slugs(created, lambda obj: obj.slug_base())
+
+        update_fields = list(spec.fields)
+        for name in image_names:
+            update_fields += [images.state_field(name), *images.metadata_fields(name)]
+        if model._meta.label == 'pages.Blog':
+            for obj in objs:
+                content_pipeline.apply_to_blog(obj)
+            update_fields += content_pipeline.DERIVED_FIELDS
+
+        now = timezone.now()
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False):
+                update_fields.append(field.name)
+                for obj in updated:
+                    setattr(obj, field.attname, now)
+
+        # bulk_create stamps auto_now_add fields with the current time; put exported values back afterwards
+        stamped = [field for field in fields if getattr(field, 'auto_now_add', False)]
+        kept = [(obj, {field.attname: getattr(obj, field.attname) for field in stamped}) for obj in created]
+        model._default_manager.bulk_create(created)
+        kept = [(obj, values) for obj, values in kept if any(value is not None for value in values.values())]
+        for obj, values in kept:
+            for attname, value in values.items():
+                if value is not None:
+                    setattr(obj, attname, value)
+        if kept:
+            model._default_manager.bulk_update([obj for obj, _ in kept], [field.name for field in stamped])
+        if updated:
+            model._default_manager.bulk_update(updated, update_fields)
+
+        for name in image_names:
+            image_queue.enqueue_stored(objs, name)
+        if model._meta.label == 'pages.Blog':
+            blog_search.index_blogs(objs)
+        if model._meta.label == 'pages.PracticeAreaImage':
+            # What gallery_image_changed does per save: the parent's ETag must change
+            parents = {obj.practice_area_id for obj in objs}
+            apps.get_model('pages.PracticeArea')._default_manager.filter(pk__in=parents).update(updated_at=now)
+
+        return len(created), len(updated)
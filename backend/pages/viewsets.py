@@ -4,24 +4,50 @@ from rest_framework.decorators import action
 from datetime import datetime, timedelta
 from .models import PracticeArea, ContactMessage, Appointment, AppointmentDay, AvailableHours, Attorney
 from .serializers import (
-    PracticeAreaSerializer, ContactMessageSerializer, 
+    PracticeAreaSerializer, PracticeAreaListSerializer, ContactMessageSerializer, 
     AppointmentSerializer, AppointmentDaySerializer, AvailableHoursSerializer, AttorneySerializer
 )
 from .utils import send_contact_email_async, send_appointment_confirmation_email, get_available_time_slots
+from .availability import get_available_slot_counts
+from .availability_cache import cached_availability
+from .schedule import get_weekly_schedule
+from .booking import book_appointment, SlotUnavailable
+from .conditional import ConditionalGetMixin
+from .exports import APPOINTMENT_COLUMNS, CONTACT_MESSAGE_COLUMNS, StaffExportMixin
+from .pagination import AppointmentPagination
+from .response_cache import CachedResponseMixin
 
 
-class PracticeAreaViewSet(viewsets.ModelViewSet):
-    queryset = PracticeArea.objects.all()
+SLOT_TAKEN_MESSAGE = "This time slot or a portion of it is already booked. Please choose another time."
+
+# Longest horizon available_dates answers; longer requests are rejected rather than truncated
+MAX_DAYS_AHEAD = 366
+
+
+class PracticeAreaViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
+    queryset = PracticeArea.objects.prefetch_related('gallery_images')
     serializer_class = PracticeAreaSerializer
     lookup_field = 'slug'
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'id']
     ordering = ['name']
+    cache_namespace = 'practice-areas'
+    
+    def get_serializer_class(self):
+        # List pages only need a card per area; retrieve keeps the full payload
+        if self.action == 'list':
+            return PracticeAreaListSerializer
+        return PracticeAreaSerializer
 
 
-class ContactMessageViewSet(viewsets.ModelViewSet):
+class ContactMessageViewSet(StaffExportMixin, viewsets.ModelViewSet):
     queryset = ContactMessage.objects.all()
     serializer_class = ContactMessageSerializer
+    export_columns = CONTACT_MESSAGE_COLUMNS
+    export_filename = 'contact-messages'
+    export_date_field = 'created_at'
+    export_filters = {'is_read': 'is_read'}
+    export_ordering = ['created_at', 'id']
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -41,13 +67,19 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
         )
 
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(StaffExportMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing appointments with availability checking
     """
     queryset = Appointment.objects.all()
     serializer_class = AppointmentSerializer
+    pagination_class = AppointmentPagination
     ordering = ['-appointment_date', '-appointment_time']
+    export_columns = APPOINTMENT_COLUMNS
+    export_filename = 'appointments'
+    export_date_field = 'appointment_date'
+    export_filters = {'status': 'status', 'practice_area': 'practice_area__slug'}
+    export_ordering = ['appointment_date', 'appointment_time', 'id']
     
     def create(self, request, *args, **kwargs):
         """Create a new appointment with availability validation"""
@@ -69,29 +101,28 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         
         # Get appointment day for this day of the week
         day_of_week = appointment_date.weekday()
-        try:
-            appointment_day = AppointmentDay.objects.get(day_of_week=day_of_week)
-        except AppointmentDay.DoesNotExist:
+        schedule = get_weekly_schedule()
+        if not schedule.has_day(day_of_week):
             return Response(
                 {"error": "Appointments cannot be booked on this day."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if not appointment_day.is_active:
+        if not schedule.is_active(day_of_week):
             return Response(
                 {"error": "The office is closed on this day."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         # Check if appointment time is within available windows
-        available_windows = appointment_day.available_hours.all()
+        available_windows = schedule.windows(day_of_week)
         is_within_window = False
         
-        for window in available_windows:
+        for window_start, window_end in available_windows:
             appointment_end = (datetime.combine(appointment_date, appointment_time) + 
                               timedelta(minutes=duration_minutes)).time()
             
-            if window.start_time <= appointment_time and appointment_end <= window.end_time:
+            if window_start <= appointment_time and appointment_end <= window_end:
                 is_within_window = True
                 break
         
@@ -101,31 +132,11 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check for overlapping appointments
-        appointment_start_dt = datetime.combine(appointment_date, appointment_time)
-        appointment_end_dt = appointment_start_dt + timedelta(minutes=duration_minutes)
-        
-        # Get all existing appointments for this date
-        existing_appointments = Appointment.objects.filter(
-            appointment_date=appointment_date,
-            status__in=['pending', 'confirmed']
-        )
-        
-        # Check if this appointment overlaps with any existing appointment
-        for appt in existing_appointments:
-            appt_start_dt = datetime.combine(appointment_date, appt.appointment_time)
-            appt_end_dt = appt_start_dt + timedelta(minutes=appt.duration_minutes)
-            
-            # Check for overlap: new appointment starts before existing ends AND new appointment ends after existing starts
-            if appointment_start_dt < appt_end_dt and appointment_end_dt > appt_start_dt:
-                return Response(
-                    {"error": "This time slot or a portion of it is already booked. Please choose another time."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        # Save the appointment
-        self.perform_create(serializer)
-        appointment = serializer.instance
+        # Save the appointment and reserve its time units atomically
+        try:
+            appointment = book_appointment(serializer)
+        except SlotUnavailable:
+            return Response({"error": SLOT_TAKEN_MESSAGE}, status=status.HTTP_400_BAD_REQUEST)
         
         # Send confirmation email
         send_appointment_confirmation_email(appointment)
@@ -138,6 +149,16 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
     
+    def update(self, request, *args, **kwargs):
+        """Update or reschedule an appointment; moving it onto a booked time is rejected"""
+        try:
+            return super().update(request, *args, **kwargs)
+        except SlotUnavailable:
+            return Response({"error": SLOT_TAKEN_MESSAGE}, status=status.HTTP_400_BAD_REQUEST)
+    
+    def perform_update(self, serializer):
+        book_appointment(serializer)
+    
     @action(detail=False, methods=['get'])
     def available_slots(self, request):
         """
@@ -161,7 +182,10 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        available_slots = get_available_time_slots(appointment_date, duration_minutes)
+        available_slots = cached_availability(
+            'slots', appointment_date, appointment_date, duration_minutes,
+            lambda: get_available_time_slots(appointment_date, duration_minutes),
+        )
         
         return Response({
             "date": appointment_date,
@@ -173,24 +197,32 @@ class AppointmentViewSet(viewsets.ModelViewSet):
     def available_dates(self, request):
         """
         Get available dates for appointment booking (next 30 days)
+        Query params: days_ahead (optional, default 30, at most 366), duration_minutes (optional, default 60)
         """
         days_ahead = int(request.query_params.get('days_ahead', 30))
         duration_minutes = int(request.query_params.get('duration_minutes', 60))
         
-        available_dates = []
+        if days_ahead > MAX_DAYS_AHEAD:
+            return Response(
+                {"error": f"days_ahead cannot be more than {MAX_DAYS_AHEAD}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         today = datetime.now().date()
+        start_date, end_date = today + timedelta(days=1), today + timedelta(days=days_ahead)
+        slot_counts = cached_availability(
+            'counts', start_date, end_date, duration_minutes,
+            lambda: get_available_slot_counts(start_date, end_date, duration_minutes),
+        )
         
-        for i in range(1, days_ahead + 1):
-            check_date = today + timedelta(days=i)
-            
-            # Check if there are available slots for this date
-            slots = get_available_time_slots(check_date, duration_minutes)
-            if slots:
-                available_dates.append({
-                    "date": check_date,
-                    "day": check_date.strftime('%A'),
-                    "slots_count": len(slots)
-                })
+        available_dates = [
+            {
+                "date": check_date,
+                "day": check_date.strftime('%A'),
+                "slots_count": slots_count
+            }
+            for check_date, slots_count in slot_counts.items()
+        ]
         
         return Response({
             "available_dates": available_dates,
@@ -212,7 +244,7 @@ class AvailableHoursViewSet(viewsets.ModelViewSet):
     ordering = ['day', 'start_time']
 
 
-class AttorneyViewSet(viewsets.ModelViewSet):
+class AttorneyViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """ViewSet for managing attorneys/team members"""
     queryset = Attorney.objects.filter(is_active=True).order_by('order', 'full_name')
     serializer_class = AttorneySerializer
@@ -220,4 +252,5 @@ class AttorneyViewSet(viewsets.ModelViewSet):
     ordering_fields = ['order', 'full_name', 'job_title']
     ordering = ['order', 'full_name']
     lookup_field = 'slug'
+    cache_namespace = 'attorneys'
 
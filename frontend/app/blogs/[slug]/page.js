@@ -1,7 +1,7 @@
 import Link from 'next/link';
 import { fetchBlogs, fetchBlog } from '@/lib/api';
 import { generateBlogSchema, generateBreadcrumbSchema, baseUrl } from '@/lib/seo';
-import { Calendar, User, ChevronRight } from 'lucide-react';
+import { Calendar, User, ChevronRight, Clock } from 'lucide-react';
 import { notFound } from 'next/navigation';
 
 // Generate static pages for all blogs at build time
@@ -118,6 +118,9 @@ export default async function BlogDetailPage({ params }) {
               <img
                 src={blog.featured_image}
                 alt={blog.title}
+                width={blog.featured_image_width || undefined}
+                height={blog.featured_image_height || undefined}
+                style={blog.featured_image_placeholder ? { backgroundImage: `url(${blog.featured_image_placeholder})`, backgroundSize: 'cover' } : undefined}
                 className="w-full h-48 sm:h-72 md:h-96 object-cover"
               />
             </div>
@@ -140,6 +143,12 @@ export default async function BlogDetailPage({ params }) {
                   <User size={16} />
                   <span>{blog.author}</span>
                 </div>
+                {blog.reading_time_minutes > 0 && (
+                  <div className="flex items-center space-x-2">
+                    <Clock size={16} />
+                    <span>{blog.reading_time_minutes} min read</span>
+                  </div>
+                )}
               </div>
             </div>
 
@@ -157,7 +166,7 @@ export default async function BlogDetailPage({ params }) {
             <div
               className="text-amber-900 leading-relaxed space-y-6"
               dangerouslySetInnerHTML={{
-                __html: blog.content,
+                __html: blog.content_html || blog.content,
               }}
             />
           </div>
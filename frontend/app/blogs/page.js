@@ -78,6 +78,10 @@ export default async function BlogsPage() {
                       <img
                         src={blog.featured_image}
                         alt={blog.title}
+                        width={blog.featured_image_width || undefined}
+                        height={blog.featured_image_height || undefined}
+                        loading="lazy"
+                        style={blog.featured_image_placeholder ? { backgroundImage: `url(${blog.featured_image_placeholder})`, backgroundSize: 'cover' } : undefined}
                         className="w-full h-full object-cover hover:scale-110 transition-transform duration-700"
                       />
                       {blog.category && (
@@ -4,7 +4,7 @@ import Link from 'next/link';
 import Image from 'next/image';
 
 export default function AttorneyCard({ attorney, priority = false }) {
-  const { slug, full_name, job_title, photo_url } = attorney;
+  const { slug, full_name, job_title, photo_url, photo_placeholder } = attorney;
   
   // Pastel color rotation for card backgrounds
   const colors = [
@@ -35,6 +35,8 @@ export default function AttorneyCard({ attorney, priority = false }) {
                 height={192}
                 className="w-full h-full object-cover object-[50%_10%] rounded-lg shadow-xl group-hover:scale-110 transition-transform duration-300"
                 sizes="(max-width: 640px) 144px, 192px"
+                placeholder={photo_placeholder ? 'blur' : 'empty'}
+                blurDataURL={photo_placeholder || undefined}
                 priority={priority}
               />
             ) : (
@@ -10,21 +10,6 @@ export default function PracticeAreasShowMore({ practiceAreas }) {
   const initialDisplay = 6;
   const displayedAreas = showMore ? practiceAreas : practiceAreas.slice(0, initialDisplay);
 
-  // Helper function to strip HTML and truncate description
-  const getPlainTextDescription = (htmlDescription, maxLength = 150) => {
-    if (!htmlDescription) return 'Expert legal services tailored to your needs.';
-    
-    // Strip HTML tags
-    const plainText = htmlDescription.replace(/<[^>]*>/g, '');
-    
-    // Truncate to maxLength and add ellipsis if needed
-    if (plainText.length > maxLength) {
-      return plainText.substring(0, maxLength).trim() + '...';
-    }
-    
-    return plainText;
-  };
-
   return (
     <>
       <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-4 gap-4 sm:gap-6">
@@ -50,7 +35,7 @@ export default function PracticeAreasShowMore({ practiceAreas }) {
               
               {/* Description */}
               <p className="text-sm sm:text-base text-slate-600 leading-relaxed mb-4 sm:mb-6 flex-grow">
-                {getPlainTextDescription(area.description)}
+                {area.summary || 'Expert legal services tailored to your needs.'}
               </p>
               
               {/* Learn More Link */}
@@ -48,6 +48,23 @@ export async function cacheImage(remoteUrl) {
   }
 }
 
+/**
+ * Pick the URL of the widest derivative no wider than maxWidth from a srcset map
+ * ({ webp: { "320": url, ... }, jpeg: {...} }) as served by the API, preferring WebP.
+ * Returns null when the image has no derivatives yet, so callers fall back to the original.
+ */
+export function pickDerivative(srcset, maxWidth) {
+  if (!srcset) return null;
+  const variants = srcset.webp || Object.values(srcset)[0];
+  if (!variants) return null;
+
+  const widths = Object.keys(variants).map(Number).sort((a, b) => a - b);
+  if (widths.length === 0) return null;
+  const fitting = widths.filter((width) => width <= maxWidth);
+  const width = fitting.length > 0 ? fitting[fitting.length - 1] : widths[0];
+  return variants[String(width)];
+}
+
 /**
  * Process all image URLs in an attorney object, downloading and caching them.
  * Returns a new attorney object with local image URLs.
@@ -57,7 +74,7 @@ export async function cacheAttorneyImages(attorney) {
 
   const cached = { ...attorney };
   if (cached.photo_url) {
-    cached.photo_url = await cacheImage(cached.photo_url);
+    cached.photo_url = await cacheImage(pickDerivative(cached.photo_srcset, 640) || cached.photo_url);
   }
   return cached;
 }
@@ -71,12 +88,17 @@ export async function cacheBlogImages(blog) {
 
   const cached = { ...blog };
   if (cached.featured_image) {
-    cached.featured_image = await cacheImage(cached.featured_image);
+    cached.featured_image = await cacheImage(
+      pickDerivative(cached.featured_image_srcset, 1600) || cached.featured_image
+    );
   }
   // Also rewrite image URLs inside the HTML content
   if (cached.content) {
     cached.content = await rewriteHtmlImages(cached.content);
   }
+  if (cached.content_html) {
+    cached.content_html = await rewriteHtmlImages(cached.content_html);
+  }
   return cached;
 }
 
@@ -89,10 +111,11 @@ export async function cachePracticeAreaImages(area) {
 
   const cached = { ...area };
   if (cached.featured_image_url) {
+    const featuredUrl = pickDerivative(cached.featured_image_srcset, 1600) || cached.featured_image_url;
     cached.featured_image_url = await cacheImage(
-      cached.featured_image_url.startsWith('http')
-        ? cached.featured_image_url
-        : `${process.env.NEXT_PUBLIC_API_BASE || 'http://localhost:8000'}${cached.featured_image_url}`
+      featuredUrl.startsWith('http')
+        ? featuredUrl
+        : `${process.env.NEXT_PUBLIC_API_BASE || 'http://localhost:8000'}${featuredUrl}`
     );
   }
   // Cache gallery images
@@ -101,7 +124,7 @@ export async function cachePracticeAreaImages(area) {
       cached.gallery_images.map(async (img) => {
         const newImg = { ...img };
         if (newImg.image_url) {
-          let imageUrl = newImg.image_url;
+          let imageUrl = pickDerivative(newImg.image_srcset, 1024) || newImg.image_url;
           if (!imageUrl.startsWith('http')) {
             const apiBase = process.env.NEXT_PUBLIC_API_BASE || 'http://localhost:8000';
             imageUrl = `${apiBase}${imageUrl.startsWith('/') ? '' : '/'}${imageUrl}`;